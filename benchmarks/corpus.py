@@ -0,0 +1,144 @@
+"""Synthetic message corpus for benchmarks
+
+Scales up create_sample_files.py: the same text/timestamp/user_id layout,
+with messages assembled from emotion-bearing and neutral sentences so the
+keyword and sentiment paths all get exercised. Message lengths follow a
+log-normal word count (median ~15 words, long tail of journal-style
+entries), which is closer to real check-in data than fixed-size samples.
+
+    python benchmarks/corpus.py --size 100000 --formats csv txt parquet
+"""
+import argparse
+import math
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DATA_DIR = os.path.join(REPO_ROOT, 'benchmarks', 'data')
+
+SENTENCES = {
+    'stress': [
+        "I feel extremely stressed about my upcoming exams and deadlines.",
+        "The pressure is overwhelming.",
+        "Feeling anxious about the presentation tomorrow.",
+        "Work pressure is getting too much.",
+        "I can't cope with this anxiety anymore.",
+        "Overwhelmed with everything going on.",
+        "I'm worried I won't finish in time.",
+        "My shoulders are tense and I keep panicking.",
+    ],
+    'depression': [
+        "I feel worthless and alone.",
+        "Nothing seems to matter anymore.",
+        "Life feels empty and meaningless.",
+        "I don't see the point anymore.",
+        "Feeling depressed and lonely today.",
+        "I'm so tired of everything.",
+        "I feel hopeless.",
+        "Sometimes I just want to give up.",
+    ],
+    'positive': [
+        "I'm so happy today!",
+        "Everything is going great and I feel blessed.",
+        "I'm excited about my new project!",
+        "Had an amazing day with friends.",
+        "Feeling grateful and loved.",
+        "Life is beautiful and full of joy.",
+        "Had a great workout, feeling energized.",
+        "What a wonderful weekend.",
+    ],
+    'neutral': [
+        "Just feeling okay today, nothing special happening.",
+        "Work is getting intense but I'm managing it well with breaks.",
+        "Went to the store and then cooked dinner.",
+        "The meeting ran a bit long.",
+        "I watched a documentary in the evening.",
+        "Planning to call my parents this weekend.",
+        "The weather was cloudy most of the day.",
+        "I read a few chapters of my book.",
+    ],
+}
+
+# Rough mix of emotions in check-in data
+EMOTION_WEIGHTS = {'neutral': 0.4, 'positive': 0.25, 'stress': 0.22, 'depression': 0.13}
+
+def message_lengths(size, rng):
+    """Yield target word counts from a clipped log-normal distribution"""
+    for _ in range(size):
+        yield max(3, min(400, int(rng.lognormvariate(math.log(15), 0.7))))
+
+def generate_messages(size, seed=0):
+    """Yield ``size`` synthetic messages, deterministic for a given seed"""
+    rng = random.Random(seed)
+    emotions = list(EMOTION_WEIGHTS)
+    weights = list(EMOTION_WEIGHTS.values())
+    for target in message_lengths(size, rng):
+        # Each message leans towards one emotion, with some mixed-in sentences
+        main = rng.choices(emotions, weights)[0]
+        sentences = []
+        words = 0
+        while words < target:
+            emotion = main if rng.random() < 0.7 else rng.choices(emotions, weights)[0]
+            sentence = rng.choice(SENTENCES[emotion])
+            sentences.append(sentence)
+            words += sentence.count(' ') + 1
+        yield ' '.join(sentences)
+
+def generate_frame(size, seed=0):
+    """Return a DataFrame with text, timestamp and user_id columns"""
+    import pandas as pd
+
+    rng = random.Random(seed + 1)
+    start = datetime(2025, 10, 27, 9, 0)
+    users = max(10, size // 100)
+    return pd.DataFrame({
+        'text': list(generate_messages(size, seed)),
+        'timestamp': [(start + timedelta(minutes=15 * i)).strftime('%Y-%m-%d %H:%M') for i in range(size)],
+        'user_id': [f'user{str(rng.randrange(users) + 1).zfill(len(str(users)))}' for _ in range(size)],
+    })
+
+def write_corpus(size, formats=('csv', 'txt', 'parquet'), data_dir=DEFAULT_DATA_DIR, seed=0):
+    """Write the corpus in each format, reusing existing files; return {format: path}"""
+    os.makedirs(data_dir, exist_ok=True)
+    paths = {fmt: os.path.join(data_dir, f'corpus_{size}_{seed}.{fmt}') for fmt in formats}
+    missing = [fmt for fmt, path in paths.items() if not os.path.exists(path)]
+    if not missing:
+        return paths
+
+    df = generate_frame(size, seed)
+    for fmt in missing:
+        path = paths[fmt]
+        if fmt == 'csv':
+            df.to_csv(path, index=False)
+        elif fmt == 'txt':
+            with open(path, 'w', encoding='utf-8') as f:
+                for text in df['text']:
+                    f.write(text + '\n')
+        elif fmt == 'xlsx':
+            df.to_excel(path, index=False)
+        elif fmt == 'parquet':
+            df.to_parquet(path, index=False)
+        elif fmt == 'feather':
+            df.to_feather(path)
+        else:
+            raise ValueError(f'Unknown corpus format: {fmt}')
+    return paths
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate a synthetic benchmark corpus.')
+    parser.add_argument('--size', type=int, nargs='+', default=[10000], help='messages per corpus')
+    parser.add_argument('--formats', nargs='+', default=['csv', 'txt', 'parquet'],
+                        choices=['csv', 'txt', 'xlsx', 'parquet', 'feather'])
+    parser.add_argument('--out', default=DEFAULT_DATA_DIR, help='output directory (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    for size in args.size:
+        for fmt, path in write_corpus(size, args.formats, args.out, args.seed).items():
+            print(f'{size:>9} {fmt:<8} {path}')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
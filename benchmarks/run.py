@@ -0,0 +1,211 @@
+"""Throughput and latency benchmarks for the scoring pipeline
+
+Each case runs in a fresh interpreter, with the result cache disabled, so
+peak RSS and timings aren't skewed by earlier cases. Results are printed as
+JSON; save them per commit and pass one back with ``--baseline`` to see
+what changed.
+
+    python benchmarks/run.py --sizes 10000 100000 --output bench.json
+    python benchmarks/run.py --sizes 10000 --baseline bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.corpus import DEFAULT_DATA_DIR, write_corpus  # noqa: E402
+
+# Per-message latency is sampled on at most this many messages
+LATENCY_SAMPLE = 5000
+
+PARSE_FORMATS = ['csv', 'txt', 'xlsx', 'parquet']
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def _summary(messages, seconds, latencies=None):
+    result = {
+        'messages': messages,
+        'seconds': round(seconds, 4),
+        'messages_per_sec': round(messages / seconds, 1) if seconds else None,
+        'p50_ms': None,
+        'p99_ms': None,
+    }
+    if latencies:
+        latencies = sorted(latencies)
+        result['p50_ms'] = round(statistics.median(latencies) * 1000, 4)
+        result['p99_ms'] = round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 4)
+    return result
+
+def _load_texts(paths, limit=None):
+    with open(paths['txt'], encoding='utf-8') as f:
+        texts = [line.rstrip('\n') for line in f]
+    return texts[:limit] if limit else texts
+
+# Libraries each reader imports on first use; loaded before timing starts so
+# the parse cases measure parsing rather than import time
+PARSE_IMPORTS = {
+    'csv': ['pandas'],
+    'txt': ['pandas'],
+    'xlsx': ['pandas', 'openpyxl'],
+    'parquet': ['pandas', 'pyarrow.parquet'],
+}
+
+def _per_message(function, texts):
+    # The first call loads the sentiment lexicon; keep it out of the timings
+    function("warm up")
+    latencies = []
+    clock = time.perf_counter
+    started = clock()
+    for text in texts:
+        t0 = clock()
+        function(text)
+        latencies.append(clock() - t0)
+    return _summary(len(texts), clock() - started, latencies)
+
+def case_detect_emotion(paths, options):
+    from wellness.scoring import detect_emotion
+    return _per_message(detect_emotion, _load_texts(paths, LATENCY_SAMPLE))
+
+def case_analyze_sentiment(paths, options):
+    from wellness.scoring import analyze_sentiment
+    return _per_message(analyze_sentiment, _load_texts(paths, LATENCY_SAMPLE))
+
+def _parse_case(fmt):
+    def case(paths, options):
+        import importlib
+
+        from wellness.ingest import iter_messages
+        for module in PARSE_IMPORTS[fmt]:
+            importlib.import_module(module)
+        started = time.perf_counter()
+        messages = sum(len(batch) for batch in iter_messages(paths[fmt]))
+        result = _summary(messages, time.perf_counter() - started)
+        result['megabytes_per_sec'] = round(os.path.getsize(paths[fmt]) / 1024 / 1024 / result['seconds'], 2)
+        return result
+    return case
+
+def case_batch(paths, options):
+    """End to end: stream the CSV, score every batch, discard the results"""
+    from wellness.ingest import iter_messages
+    from wellness.pipeline import score_batches
+    from wellness.scoring import score_batch
+
+    score_batch(["warm up"])
+    latencies = []
+    messages = 0
+    clock = time.perf_counter
+    started = t0 = clock()
+    for results in score_batches(iter_messages(paths['csv'], batch_size=options['batch_size']),
+                                 workers=options['workers']):
+        now = clock()
+        # Amortised per-message latency of each batch
+        latencies.extend([(now - t0) / len(results)] * len(results))
+        messages += len(results)
+        t0 = now
+    result = _summary(messages, clock() - started, latencies)
+    result['workers'] = options['workers']
+    return result
+
+CASES = {
+    'detect_emotion': case_detect_emotion,
+    'analyze_sentiment': case_analyze_sentiment,
+    **{f'parse_{fmt}': _parse_case(fmt) for fmt in PARSE_FORMATS},
+    'batch': case_batch,
+}
+
+def _run_case_in_subprocess(case, size, options):
+    command = [sys.executable, os.path.abspath(__file__), '--_case', case, '--sizes', str(size),
+               '--data-dir', options['data_dir'], '--batch-size', str(options['batch_size'])]
+    if case == 'batch':
+        command += ['--workers', str(options['workers'])]
+    env = dict(os.environ, WELLNESS_CACHE_SIZE='0')
+    output = subprocess.run(command, cwd=REPO_ROOT, env=env, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def _metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'sentiment_backend': os.environ.get('WELLNESS_SENTIMENT_BACKEND', 'textblob'),
+    }
+
+def _print_comparison(report, baseline):
+    previous = {(r['case'], r['size'], r.get('workers')): r for r in baseline['results']}
+    print(f"{'case':<20} {'size':>9} {'msg/s':>12} {'change':>8} {'p99 ms':>10} {'rss MB':>8}", file=sys.stderr)
+    for result in report['results']:
+        old = previous.get((result['case'], result['size'], result.get('workers')))
+        change = ''
+        if old and old.get('messages_per_sec') and result.get('messages_per_sec'):
+            change = f"{(result['messages_per_sec'] / old['messages_per_sec'] - 1) * 100:+.1f}%"
+        print(f"{result['case']:<20} {result['size']:>9} {result['messages_per_sec'] or 0:>12,.1f} {change:>8} "
+              f"{result['p99_ms'] if result['p99_ms'] is not None else '-':>10} {result['peak_rss_mb']:>8.1f}",
+              file=sys.stderr)
+
+def main(argv=None):
+    from wellness.parallel import DEFAULT_WORKERS
+
+    parser = argparse.ArgumentParser(description='Benchmark the scoring pipeline.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000], help='corpus sizes (default: %(default)s)')
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES))
+    parser.add_argument('--workers', type=int, nargs='+', default=sorted({1, DEFAULT_WORKERS}),
+                        help='worker counts for the batch case (default: %(default)s)')
+    parser.add_argument('--batch-size', type=int, default=20000)
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help='where generated corpora are kept')
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    parser.add_argument('--baseline', help='earlier JSON report to compare against')
+    parser.add_argument('--_case', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args._case:
+        # Child process: run one case and print its result
+        paths = write_corpus(args.sizes[0], ['csv', 'txt', 'xlsx', 'parquet'] if args._case == 'parse_xlsx'
+                             else ['csv', 'txt', 'parquet'], args.data_dir)
+        options = {'workers': args.workers[0], 'batch_size': args.batch_size}
+        result = CASES[args._case](paths, options)
+        result['peak_rss_mb'] = round(_peak_rss_mb(), 1)
+        print(json.dumps(result))
+        return 0
+
+    report = {'meta': _metadata(), 'results': []}
+    for size in args.sizes:
+        formats = ['csv', 'txt', 'parquet'] + (['xlsx'] if 'parse_xlsx' in args.cases else [])
+        write_corpus(size, formats, args.data_dir)
+        for case in args.cases:
+            for workers in (args.workers if case == 'batch' else [None]):
+                options = {'workers': workers, 'batch_size': args.batch_size, 'data_dir': args.data_dir}
+                print(f'running {case} size={size}' + (f' workers={workers}' if workers else ''), file=sys.stderr)
+                result = _run_case_in_subprocess(case, size, options)
+                report['results'].append({'case': case, 'size': size, **result})
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    if args.baseline:
+        with open(args.baseline) as f:
+            _print_comparison(report, json.load(f))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
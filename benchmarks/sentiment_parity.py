@@ -0,0 +1,92 @@
+"""Parity check between wellness.sentiment and TextBlob
+
+Scores the benchmark corpus plus randomly assembled edge-case messages
+(negations, intensifiers, contractions, quotes, abbreviations, emoticons,
+"(!)", line breaks) with both engines and fails if any polarity or
+subjectivity differs by more than PARITY_TOLERANCE. Also reports the speedup.
+Run from the repository root:
+
+    python benchmarks/sentiment_parity.py [--size N] [--fuzz N] [--seed S]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.corpus import generate_messages  # noqa: E402
+from wellness.sentiment import PARITY_TOLERANCE, lexicon_sentiment  # noqa: E402
+
+# Pieces the fuzzer glues together, chosen to hit every branch of pattern's
+# tokeniser and assessment loop
+FUZZ_PIECES = [
+    'not', 'no', 'never', "n't", "don't", "isn't", "I'm", "it's", "we'll", "they've", "you'd",
+    'very', 'really', 'extremely', 'terribly', 'horribly', 'so', 'too', 'a', 'is', 'the', 'at',
+    'good', 'bad', 'happy', 'sad', 'great', 'terrible', 'awful', 'nice', 'love', 'hate', 'best',
+    'worst', 'amazing', 'stressed', 'anxious', 'calm', 'ok', 'fine', 'wonderful', 'horrible',
+    '!', '!!', '?', '.', '...', ',', ';', ':', '(!)', '( ! )', '(', ')', '"', "'", '“', '”', '‘', '’',
+    ':)', ':-)', ':(', ":'(", ':D', 'xD', 'XD', '<3', '♥', ':P', ';)', ':/', 'o.O', '>:[', ':-s',
+    'e.g.', 'etc.', 'Mr.', 'U.S.', 'T.', 'good.', 'bad!', '(great)', '"nice"', "'sad'", 'well...',
+    'END-OF-SENTENCE', '\n\n', '\n', '\r\n', '\t', '#1', '@home', '50%', 'co-worker', 'ÜBER', 'naïve',
+]
+
+def fuzz_messages(count, seed):
+    rng = random.Random(seed)
+    for _ in range(count):
+        pieces = rng.choices(FUZZ_PIECES, k=rng.randint(1, 14))
+        yield ''.join(piece + rng.choice(('', ' ', ' ', ' ', '  ')) for piece in pieces)
+
+def textblob_sentiment(text):
+    from textblob import TextBlob
+
+    return tuple(TextBlob(text).sentiment)
+
+def compare(texts):
+    """Return (max difference, mismatching texts) over texts"""
+    worst = 0.0
+    mismatches = []
+    for text in texts:
+        expected = textblob_sentiment(text)
+        actual = lexicon_sentiment(text)
+        difference = max(abs(a - b) for a, b in zip(actual, expected))
+        worst = max(worst, difference)
+        if difference > PARITY_TOLERANCE:
+            mismatches.append((text, expected, actual))
+    return worst, mismatches
+
+def throughput(function, texts):
+    function("warm up")
+    started = time.perf_counter()
+    for text in texts:
+        function(text)
+    return len(texts) / (time.perf_counter() - started)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=5000, help='corpus messages to compare (default: %(default)s)')
+    parser.add_argument('--fuzz', type=int, default=20000, help='edge-case messages to compare (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    corpus = list(generate_messages(args.size, seed=args.seed))
+    fuzz = list(fuzz_messages(args.fuzz, args.seed))
+
+    failed = False
+    for name, texts in (('corpus', corpus), ('fuzz', fuzz)):
+        worst, mismatches = compare(texts)
+        status = 'ok' if not mismatches else f'FAIL: {len(mismatches)} over {PARITY_TOLERANCE:g}'
+        print(f'{name:<8} {len(texts):>7} messages  max difference {worst:.3g}  {status}')
+        for text, expected, actual in mismatches[:5]:
+            print(f'    {text!r}: TextBlob {expected}, lexicon {actual}')
+        failed = failed or bool(mismatches)
+
+    before = throughput(textblob_sentiment, corpus)
+    after = throughput(lexicon_sentiment, corpus)
+    print(f'TextBlob {before:,.0f} messages/s, lexicon {after:,.0f} messages/s ({after / before:.1f}x)')
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""Cold-start import budget for the scoring core
+
+Imports each module in a fresh interpreter several times and fails if the
+median import time goes over budget, or if any of the heavy libraries that
+should only load on first use were pulled in. Run from the repository root:
+
+    python benchmarks/startup.py [--budget SECONDS] [--runs N]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules whose import must stay cheap
+MODULES = ['wellness.scoring', 'wellness.cli']
+
+# Libraries that must not be imported just by loading the modules above
+HEAVY_MODULES = ['pandas', 'numpy', 'textblob', 'nltk', 'pyarrow', 'plotly', 'openpyxl', 'torch', 'sklearn']
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{'seconds': elapsed, 'loaded': [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+def measure(module, runs):
+    """Return (median seconds, heavy modules loaded) over fresh interpreters"""
+    timings = []
+    loaded = set()
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=REPO_ROOT, check=True, capture_output=True, text=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        timings.append(result['seconds'])
+        loaded.update(result['loaded'])
+    return statistics.median(timings), sorted(loaded)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--budget', type=float, default=0.25,
+                        help='maximum median import time in seconds (default: %(default)s)')
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters per module (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module in MODULES:
+        seconds, loaded = measure(module, args.runs)
+        status = 'ok'
+        if seconds > args.budget:
+            status = f'FAIL: over {args.budget:.3f}s budget'
+            failed = True
+        if loaded:
+            status = f"FAIL: imported {', '.join(loaded)}"
+            failed = True
+        print(f'{module:<20} {seconds * 1000:8.1f} ms  {status}')
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""Node memory as the worker pool grows
+
+For each worker count, starts a fresh interpreter that scores a corpus on a
+pool of that size and then sums the proportional set size (PSS) of the
+parent and its workers, which counts pages shared between them once. With
+the scoring resources shared (see wellness.resources), each added worker
+should cost little more than its own interpreter. Run from the repository
+root:
+
+    python benchmarks/worker_memory.py [--workers 1 2 4] [--start-method forkserver]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_PROBE = """
+import json, multiprocessing
+if {start_method!r}:
+    multiprocessing.set_start_method({start_method!r})
+from benchmarks.corpus import generate_messages
+from wellness import parallel, resources
+parallel.score_parallel(generate_messages({size}), workers={workers}, chunk_size=200, cache=None)
+pool = parallel.get_pool({workers})
+pids = ['self'] + [str(pid) for pid in pool._processes]
+memory = [resources.process_memory(pid) for pid in pids]
+print(json.dumps({{'pss': [m['pss'] for m in memory], 'resources': resources.report()}}))
+parallel.shutdown_pools()
+"""
+
+def measure(workers, size, start_method):
+    """Return (PSS bytes of the parent and each worker, parent resource report)"""
+    output = subprocess.run(
+        [sys.executable, '-c', _PROBE.format(workers=workers, size=size, start_method=start_method)],
+        cwd=REPO_ROOT, check=True, capture_output=True, text=True,
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    return result['pss'], result['resources']
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help='pool sizes to measure')
+    parser.add_argument('--size', type=int, default=4000, help='messages scored per run (default: %(default)s)')
+    parser.add_argument('--start-method', choices=['fork', 'forkserver', 'spawn'],
+                        help="how workers are started (default: the platform's)")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        print('PSS needs /proc/<pid>/smaps_rollup (Linux)', file=sys.stderr)
+        return 1
+    previous = None
+    for workers in args.workers:
+        pss, report = measure(workers, args.size, args.start_method)
+        total = sum(pss) / 2 ** 20
+        line = (f'{workers:3d} workers  {total:8.1f} MB total  parent {pss[0] / 2 ** 20:6.1f} MB  '
+                f'workers {", ".join(f"{value / 2 ** 20:.1f}" for value in pss[1:])} MB')
+        if previous is not None:
+            line += f'  (+{(total - previous[1]) / (workers - previous[0]):.1f} MB per added worker)'
+        print(line)
+        previous = (workers, total)
+    for row in report:
+        loaded = 'n/a' if row['loaded_bytes'] is None else f"{row['loaded_bytes'] / 2 ** 20:.1f} MB"
+        print(f"  {row['resource']:<24} {loaded:>9} loaded  {row['mapped_bytes'] / 2 ** 20:6.1f} MB mapped  "
+              f"{row['source']}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,10 +1,24 @@
 import streamlit as st
-from textblob import TextBlob
-import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
 from datetime import datetime
+import functools
 import io
+import sqlite3
+import sys
+import time
+
+# pandas and plotly are imported where they're first needed so a cold start
+# only pays for what the chosen input mode uses
+
+from wellness import metrics, resources
+from wellness.export import EXPORT_FORMATS, ResultWriter
+from wellness.ingest import SUPPORTED_EXTENSIONS, iter_messages
+from wellness.pipeline import score_batches
+from wellness.results import ResultTable
+from wellness.scoring import RESULT_CACHE, SEVERITIES, detect_emotion, rules_version, scoring_version, warm_up
+from wellness.segments import DEFAULT_SEGMENT, detect_emotion_segmented
+from wellness.store import ResultStore
+from wellness.summary import ResultSummary
+from wellness.trends import TrendTracker
 
 # Page configuration
 st.set_page_config(
@@ -14,6 +28,31 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+@st.cache_resource
+def get_result_store():
+    """Open the on-disk result store once per server process, or None if it can't be opened"""
+    try:
+        return ResultStore(version=scoring_version)
+    except (OSError, sqlite3.Error) as e:
+        print(f"Result store unavailable, caching results in memory only: {e}", file=sys.stderr)
+        return None
+
+@st.cache_resource(show_spinner="Loading the sentiment lexicon...")
+def load_scoring_resources():
+    """Load the lexicon, keyword matcher and any model once per server process"""
+    warm_up()
+    return resources.report()
+
+# Back the in-memory result cache with the on-disk store shared by all
+# sessions, when it can be opened
+RESULT_CACHE.attach_store(get_result_store())
+
+# Charts are redrawn at most this often while a batch is being scored
+CHART_REFRESH_SECONDS = 2.0
+
+# Rows per page of the detailed batch results table
+RESULTS_PAGE_SIZE = 500
+
 # Test Data Samples
 TEST_DATA = {
     'text_samples': [
@@ -127,11 +166,7 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Keywords and recommendations (same as before)
-STRESS_KEYWORDS = ['stress', 'pressure', 'overwhelm', 'anxious', 'anxiety', 'worried', 'tense', 'panic', 'burden', 'exhausted']
-DEPRESSION_KEYWORDS = ['depressed', 'sad', 'lonely', 'hopeless', 'worthless', 'empty', 'tired', 'suicide', 'die', 'harm', 'hate myself', 'give up', 'no point']
-POSITIVE_KEYWORDS = ['happy', 'joy', 'excited', 'grateful', 'blessed', 'love', 'great', 'wonderful', 'amazing', 'fantastic', 'good']
-
+# Recommendations shown for each detected emotion
 MUSIC_RECOMMENDATIONS = {
     'stress': [
         '🎵 Weightless - Marconi Union',
@@ -200,44 +235,9 @@ ACTIVITIES = {
     ]
 }
 
-def analyze_sentiment(text):
-    """Analyze sentiment using TextBlob"""
-    blob = TextBlob(text)
-    polarity = blob.sentiment.polarity
-    subjectivity = blob.sentiment.subjectivity
-    return polarity, subjectivity
-
-def detect_emotion(text):
-    """Detect emotions based on keywords and sentiment"""
-    text_lower = text.lower()
-    
-    # Keyword-based detection
-    critical_score = sum(1 for keyword in DEPRESSION_KEYWORDS if keyword in text_lower)
-    stress_score = sum(1 for keyword in STRESS_KEYWORDS if keyword in text_lower)
-    positive_score = sum(1 for keyword in POSITIVE_KEYWORDS if keyword in text_lower)
-    
-    polarity, subjectivity = analyze_sentiment(text)
-    
-    # Decision logic
-    if critical_score >= 2 or (critical_score >= 1 and polarity < -0.3):
-        emotion, severity = 'depression', 'critical'
-    elif critical_score >= 1 or (stress_score >= 2 and polarity < -0.1):
-        emotion, severity = 'depression', 'high'
-    elif stress_score >= 2 or (polarity < -0.2 and subjectivity > 0.5):
-        emotion, severity = 'stress', 'moderate'
-    elif stress_score >= 1 or (polarity < 0 and polarity > -0.3):
-        emotion, severity = 'stress', 'low'
-    elif positive_score >= 2 or polarity > 0.3:
-        emotion, severity = 'positive', 'good'
-    elif polarity >= 0:
-        emotion, severity = 'neutral', 'normal'
-    else:
-        emotion, severity = 'stress', 'low'
-    
-    return emotion, severity, polarity, subjectivity
-
 def display_results(text, emotion, severity, polarity, subjectivity):
     """Display analysis results with beautiful UI"""
+    import plotly.graph_objects as go
     
     # Emotion icons
     emotion_icons = {
@@ -357,40 +357,22 @@ def display_results(text, emotion, severity, polarity, subjectivity):
         for activity in activities:
             st.markdown(f"- {activity}")
 
+def show_flagged_passages(text, spans, limit=5):
+    """Quote the passages of a long message that decided its result"""
+    st.markdown("### 🔎 Flagged Passages")
+    for start, end in spans[:limit]:
+        st.markdown(f"> {text[start:end]}")
+    if len(spans) > limit:
+        st.caption(f"...and {len(spans) - limit} more")
+
 def process_file(uploaded_file):
-    """Process uploaded files and extract text"""
-    texts = []
-    
+    """Stream batches of messages from an uploaded file"""
     try:
-        if uploaded_file.name.endswith('.csv'):
-            df = pd.read_csv(uploaded_file)
-            # Try to find text column
-            text_cols = [col for col in df.columns if 'text' in col.lower() or 'message' in col.lower() or 'content' in col.lower()]
-            if text_cols:
-                texts = df[text_cols[0]].dropna().tolist()
-            else:
-                # Use first column
-                texts = df.iloc[:, 0].dropna().tolist()
-        
-        elif uploaded_file.name.endswith(('.xlsx', '.xls')):
-            df = pd.read_excel(uploaded_file)
-            text_cols = [col for col in df.columns if 'text' in col.lower() or 'message' in col.lower() or 'content' in col.lower()]
-            if text_cols:
-                texts = df[text_cols[0]].dropna().tolist()
-            else:
-                texts = df.iloc[:, 0].dropna().tolist()
-        
-        elif uploaded_file.name.endswith('.txt'):
-            content = uploaded_file.read().decode('utf-8')
-            texts = [line.strip() for line in content.split('\n') if line.strip()]
-        
-        else:
-            st.error("Unsupported file format. Please upload CSV, Excel, or TXT files.")
-            
+        yield from iter_messages(uploaded_file, uploaded_file.name)
+    except ValueError as e:
+        st.error(str(e))
     except Exception as e:
         st.error(f"Error processing file: {str(e)}")
-    
-    return texts
 
 # Main app
 def main():
@@ -416,6 +398,15 @@ def main():
         use_test_data = st.checkbox("🧪 Use Test Data", value=False, 
                                      help="Load sample data for testing")
         
+        # Long messages are judged by their most severe sentence
+        st.checkbox("✂️ Sentence-level Analysis", value=DEFAULT_SEGMENT, key="segment",
+                    help="Score long messages sentence by sentence and point to the most severe passages")
+        
+        # Per-stage timings for diagnosing slow batches; collection itself is
+        # process-wide and set by WELLNESS_METRICS, so this only shows the panel
+        st.checkbox("🩺 Diagnostics", value=metrics.enabled(), key="diagnostics",
+                    help="Show parse, scoring and render timings under the batch results")
+        
         st.markdown("---")
         st.markdown("## 📊 About")
         st.info("""
@@ -492,15 +483,23 @@ def main():
             if len(user_text.strip()) < 5:
                 st.error("Please enter a longer message (at least 5 characters)")
             else:
+                load_scoring_resources()
                 with st.spinner("🤖 Analyzing your emotions..."):
-                    emotion, severity, polarity, subjectivity = detect_emotion(user_text)
+                    spans = []
+                    if st.session_state.get('segment'):
+                        emotion, severity, polarity, subjectivity, spans = detect_emotion_segmented(user_text)
+                    else:
+                        emotion, severity, polarity, subjectivity = detect_emotion(user_text)
                     
                     st.markdown("---")
                     st.markdown("## 📋 Analysis Results")
                     st.markdown(f"**Analyzed Text:** _{user_text}_")
                     st.markdown(f"**Timestamp:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+                    st.markdown(f"**Rules version:** {rules_version()}")
                     
                     display_results(user_text, emotion, severity, polarity, subjectivity)
+                    if spans and spans != [(0, len(user_text))]:
+                        show_flagged_passages(user_text, spans)
         elif analyze_button:
             st.error("Please enter some text to analyze!")
     
@@ -542,24 +541,14 @@ def main():
                 process_button = st.button("🔍 Analyze Test Data", use_container_width=True)
             
             if process_button:
-                # Process test data
-                if file_type == 'csv':
-                    df = pd.read_csv(io.StringIO(test_data))
-                    text_cols = [col for col in df.columns if 'text' in col.lower() or 'message' in col.lower()]
-                    texts = df[text_cols[0]].dropna().tolist() if text_cols else df.iloc[:, 0].dropna().tolist()
-                else:  # txt
-                    texts = [line.strip() for line in test_data.split('\n') if line.strip()]
-                
-                if texts:
-                    st.markdown(f"### 📊 Found {len(texts)} messages to analyze")
-                    process_texts(texts)
-                else:
-                    st.error("No valid messages found in test data.")
+                # Process test data through the same readers as uploads
+                test_file = io.BytesIO(test_data.encode('utf-8'))
+                process_texts(iter_messages(test_file, f"sample_data.{file_type}"))
         else:
             # Normal file upload
             uploaded_file = st.file_uploader(
-                "Upload a CSV, Excel, or TXT file containing messages",
-                type=['csv', 'xlsx', 'xls', 'txt']
+                "Upload a CSV, Excel, TXT, Parquet or Feather file containing messages",
+                type=[extension.lstrip('.') for extension in SUPPORTED_EXTENSIONS]
             )
             
             if uploaded_file:
@@ -570,108 +559,219 @@ def main():
                     process_button = st.button("🔍 Analyze File", use_container_width=True)
                 
                 if process_button:
-                    texts = process_file(uploaded_file)
-                    
-                    if texts:
-                        st.markdown(f"### 📊 Found {len(texts)} messages to analyze")
-                        process_texts(texts)
-                    else:
-                        st.error("Could not extract messages from the file.")
+                    process_texts(process_file(uploaded_file))
+        
+        if 'batch_results' in st.session_state:
+            show_batch_results(st.session_state['batch_results'], st.session_state['batch_summary'],
+                               st.session_state.get('batch_trends'))
+
+def show_diagnostics():
+    """Show per-stage timings and counters collected so far"""
+    if not metrics.enabled():
+        st.info("🩺 Timings are not being recorded. Start the app with WELLNESS_METRICS=1 to collect them.")
+        return
+    snapshot = metrics.snapshot()
+    with st.expander("🩺 Diagnostics"):
+        st.table({
+            'Stage': list(snapshot['stages']),
+            'Calls': [stage['count'] for stage in snapshot['stages'].values()],
+            'Seconds': [round(stage['seconds'], 3) for stage in snapshot['stages'].values()]
+        })
+        st.json(snapshot['counters'])
+        
+        # Memory each shared resource took to load in this process
+        rows = resources.report()
+        st.table({
+            'Resource': [row['resource'] for row in rows],
+            'Loaded MB': [None if row['loaded_bytes'] is None else round(row['loaded_bytes'] / 2 ** 20, 1)
+                          for row in rows],
+            'Mapped MB': [round(row['mapped_bytes'] / 2 ** 20, 1) for row in rows],
+            'Source': [row['source'] for row in rows]
+        })
 
-def process_texts(texts):
-    """Process and analyze a list of texts"""
-    results = []
+def process_texts(batches):
+    """Score batches of texts as they arrive, showing running totals as they grow"""
+    import pandas as pd
+    
+    st.session_state.pop('batch_results', None)
+    st.session_state.pop('batch_summary', None)
+    st.session_state.pop('batch_trends', None)
+    load_scoring_resources()
     
     progress_bar = st.progress(0)
     status_text = st.empty()
+    cards = st.empty()
+    charts = st.empty()
     
-    for idx, text in enumerate(texts[:50]):  # Limit to 50 for performance
-        if len(str(text).strip()) > 5:
-            emotion, severity, polarity, subjectivity = detect_emotion(str(text))
-            results.append({
-                'Message': text[:100] + '...' if len(str(text)) > 100 else text,
-                'Emotion': emotion,
-                'Severity': severity,
-                'Polarity': round(polarity, 2),
-                'Subjectivity': round(subjectivity, 2)
-            })
-        
-        progress_bar.progress((idx + 1) / min(len(texts), 50))
-        status_text.text(f"Analyzing message {idx + 1} of {min(len(texts), 50)}...")
+    summary = ResultSummary()
+    trends = TrendTracker()
+    # Rows are kept as typed codes and text buffers, not a frame per batch
+    table = ResultTable(coded=('User', 'Rules'))
+    last_chart_refresh = 0.0
     
-    status_text.empty()
-    progress_bar.empty()
+    def show_progress(done, total):
+        progress_bar.progress(done / total)
+        status_text.text(f"Analyzed {summary.total} messages, scoring {done} of {total} new ones in this batch...")
     
-    if results:
-        st.markdown("---")
-        st.markdown("## 📊 Batch Analysis Results")
-        
-        df_results = pd.DataFrame(results)
-        
-        # Summary stats
-        col1, col2, col3, col4 = st.columns(4)
-        
-        with col1:
-            st.markdown(f"""
-            <div class="metric-card">
-                <h3>😢 Depression</h3>
-                <h2>{len(df_results[df_results['Emotion'] == 'depression'])}</h2>
-            </div>
-            """, unsafe_allow_html=True)
+    for results in score_batches(batches, on_progress=show_progress, segment=st.session_state.get('segment', False)):
+        messages = results['message']
+        # Keep only the truncated message so the full batch text can be freed
+        frame = {'Message': messages.where(messages.str.len() <= 100, messages.str.slice(0, 100) + '...')}
+        if 'timestamp' in results:
+            frame['Timestamp'] = results['timestamp']
+        if 'user_id' in results:
+            frame['User'] = results['user_id']
+        if 'spans' in results:
+            # The first passage behind the result of each segmented message
+            frame['Flagged'] = [
+                message[spans[0][0]:spans[0][1]][:100] if segments > 1 and len(spans) else ''
+                for message, spans, segments in zip(messages, results['spans'], results['segments'])
+            ]
+        table.append(pd.DataFrame(dict(
+            frame,
+            Emotion=results['emotion'],
+            Severity=results['severity'],
+            Polarity=results['polarity'].round(2),
+            Subjectivity=results['subjectivity'].round(2),
+            Rules=results['rules_version'],
+            **({'Duplicates': results['duplicates']} if 'duplicates' in results else {})
+        )))
+        summary.update(results['emotion'], results['severity'])
+        if 'timestamp' in results and 'user_id' in results:
+            trends.update(results)
+        status_text.text(f"Analyzed {summary.total} messages...")
         
-        with col2:
-            st.markdown(f"""
-            <div class="metric-card">
-                <h3>😰 Stress</h3>
-                <h2>{len(df_results[df_results['Emotion'] == 'stress'])}</h2>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col3:
-            st.markdown(f"""
-            <div class="metric-card">
-                <h3>😊 Positive</h3>
-                <h2>{len(df_results[df_results['Emotion'] == 'positive'])}</h2>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col4:
+        with cards.container():
+            show_summary_cards(summary)
+        # Redrawing charts is the slow part, so limit how often it happens
+        if time.monotonic() - last_chart_refresh >= CHART_REFRESH_SECONDS:
+            with charts.container():
+                show_summary_charts(summary, key=f"live_{len(table)}")
+            last_chart_refresh = time.monotonic()
+    
+    if not len(table):
+        status_text.empty()
+        progress_bar.empty()
+        st.warning("No valid messages found to analyze.")
+        return
+    
+    # Keep the results across reruns so paging through the table doesn't rescore
+    st.session_state['batch_results'] = table
+    st.session_state['batch_summary'] = summary
+    if trends.users:
+        st.session_state['batch_trends'] = trends
+    st.session_state.pop('results_page', None)
+    st.rerun()
+
+def show_summary_cards(summary):
+    """Show one card per emotion with its message count"""
+    counts = summary.emotion_counts()
+    cards = [('😢 Depression', 'depression'), ('😰 Stress', 'stress'),
+             ('😊 Positive', 'positive'), ('😐 Neutral', 'neutral')]
+    for col, (title, emotion) in zip(st.columns(len(cards)), cards):
+        with col:
             st.markdown(f"""
             <div class="metric-card">
-                <h3>😐 Neutral</h3>
-                <h2>{len(df_results[df_results['Emotion'] == 'neutral'])}</h2>
+                <h3>{title}</h3>
+                <h2>{counts[emotion]}</h2>
             </div>
             """, unsafe_allow_html=True)
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def summary_figures(counts):
+    """Build the emotion and severity charts for an emotion x severity count matrix"""
+    import plotly.express as px
+    
+    # Only the handful of aggregated counts go into the figures, never the rows
+    summary = ResultSummary(counts)
+    emotion_counts = summary.emotion_counts()
+    emotion_fig = px.pie(names=list(emotion_counts), values=list(emotion_counts.values()),
+                         title='Emotion Distribution', color_discrete_sequence=px.colors.qualitative.Set3)
+    severity_fig = px.bar(summary.severity_table(), x='Severity', y='Count', title='Severity Levels',
+                          color='Emotion', barmode='group', category_orders={'Severity': SEVERITIES})
+    return emotion_fig, severity_fig
+
+def show_summary_charts(summary, key):
+    """Plot the emotion and severity distributions from the aggregated counts"""
+    emotion_fig, severity_fig = summary_figures(summary.counts)
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("### 📈 Emotion Distribution")
+        st.plotly_chart(emotion_fig, use_container_width=True, key=f"{key}_emotions")
+    
+    with col2:
+        st.markdown("### 📊 Severity Distribution")
+        st.plotly_chart(severity_fig, use_container_width=True, key=f"{key}_severities")
+
+def show_user_trends(trends):
+    """Show the users whose recent messages are most concerning, and one user's trend over time"""
+    import plotly.express as px
+    
+    st.markdown("### 👥 User Trends")
+    window = st.slider(f"Trend window ({trends.bucket} buckets)", min_value=1, max_value=60, value=7,
+                       key='trend_window')
+    user_summary = trends.summary(window)
+    st.caption(f"{len(trends.users)} users; last {window} buckets up to {trends.latest()}, "
+               "compared with the ones before")
+    st.dataframe(user_summary, use_container_width=True, hide_index=True)
+    
+    user = st.selectbox("Show trend for user", user_summary['user_id'], key='trend_user')
+    if user is not None:
+        trend = trends.user_trend(user, window).reset_index()
+        fig = px.line(trend, x='bucket', y=['mean_polarity', 'rolling_polarity'], markers=True,
+                      title=f'Polarity of {user}')
+        st.plotly_chart(fig, use_container_width=True, key='trend_user_chart')
+
+def export_results(table, fmt):
+    """Serialise the results table for a download, a chunk of rows at a time"""
+    buffer = io.BytesIO()
+    with ResultWriter(buffer, fmt) as writer:
+        for frame in table.iter_frames():
+            writer.write(frame)
+    return buffer.getvalue()
+
+def show_batch_results(table, summary, trends=None):
+    """Show the summary, charts, a page of the detailed results, user trends and downloads"""
+    st.markdown("---")
+    st.markdown("## 📊 Batch Analysis Results")
+    st.markdown(f"### Analyzed {summary.total} messages")
+    
+    show_summary_cards(summary)
+    
+    with metrics.timer('render'):
+        show_summary_charts(summary, key="results")
         
-        # Visualizations
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.markdown("### 📈 Emotion Distribution")
-            fig = px.pie(df_results, names='Emotion', title='Emotion Distribution', 
-                        color_discrete_sequence=px.colors.qualitative.Set3)
-            st.plotly_chart(fig, use_container_width=True)
-        
-        with col2:
-            st.markdown("### 📊 Severity Distribution")
-            fig = px.histogram(df_results, x='Severity', title='Severity Levels',
-                             color='Emotion', barmode='group')
-            st.plotly_chart(fig, use_container_width=True)
-        
-        # Show detailed results
+        # Show detailed results one page at a time
         st.markdown("### 📋 Detailed Results")
-        st.dataframe(df_results, use_container_width=True)
+        pages = max(1, -(-len(table) // RESULTS_PAGE_SIZE))
+        page = 1
+        if pages > 1:
+            page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1,
+                                   key='results_page')
+        start = (page - 1) * RESULTS_PAGE_SIZE
+        # Only the rows of this page are turned into a DataFrame
+        st.dataframe(table.to_frame(start, start + RESULTS_PAGE_SIZE), use_container_width=True)
         
-        # Download results
-        csv = df_results.to_csv(index=False)
-        st.download_button(
-            label="📥 Download Results as CSV",
-            data=csv,
-            file_name=f"mental_wellness_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-            mime="text/csv"
-        )
-    else:
-        st.warning("No valid messages found to analyze.")
+        if trends is not None:
+            show_user_trends(trends)
+    
+    if st.session_state.get('diagnostics'):
+        show_diagnostics()
+    
+    # Download results; files are only built when a button is clicked
+    file_stem = f"mental_wellness_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    for col, fmt in zip(st.columns(len(EXPORT_FORMATS)), EXPORT_FORMATS):
+        label, extension, mime = EXPORT_FORMATS[fmt]
+        with col:
+            st.download_button(
+                label=f"📥 Download Results as {label}",
+                data=functools.partial(export_results, table, fmt),
+                file_name=file_stem + extension,
+                mime=mime,
+                on_click="ignore"
+            )
 
 if __name__ == "__main__":
     main()
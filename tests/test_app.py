@@ -0,0 +1,86 @@
+import functools
+import pathlib
+
+import pytest
+
+pytest.importorskip('streamlit')
+pytest.importorskip('plotly')
+
+import streamlit as st  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from wellness import metrics, store  # noqa: E402
+from wellness.scoring import RESULT_CACHE  # noqa: E402
+
+APP = str(pathlib.Path(__file__).parent.parent / 'streamlit_app.py')
+
+def _run_app(store_path, monkeypatch):
+    # Point the app's result store at store_path instead of the user's cache directory
+    monkeypatch.setattr(store, 'ResultStore', functools.partial(store.ResultStore, str(store_path)))
+    monkeypatch.setattr(RESULT_CACHE, 'store', None)
+    st.cache_resource.clear()
+    app = AppTest.from_file(APP, default_timeout=120)
+    app.run()
+    return app
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    app = _run_app(tmp_path / 'results.sqlite3', monkeypatch)
+    assert not app.exception
+    yield app
+    st.cache_resource.clear()
+
+# A parent that is a file (OSError) and a path that is a directory (sqlite3.Error)
+@pytest.mark.parametrize('unwritable', ['file/results.sqlite3', 'directory'])
+def test_app_runs_without_its_result_store(tmp_path, monkeypatch, capsys, unwritable):
+    (tmp_path / 'file').write_text('')
+    (tmp_path / 'directory').mkdir()
+    app = _run_app(tmp_path / unwritable, monkeypatch)
+    try:
+        assert not app.exception
+        assert RESULT_CACHE.store is None
+        assert 'caching results in memory only' in capsys.readouterr().err
+        app.text_area[0].input('I feel so stressed about my exams')
+        _button(app, 'Analyze My Emotions').click()
+        app.run()
+        assert not app.exception
+    finally:
+        st.cache_resource.clear()
+
+def _button(app, label):
+    return next(button for button in app.button if label in button.label)
+
+def test_text_mode_scores_a_message(app):
+    app.text_area[0].input('I feel worthless and alone. Nothing seems to matter anymore.')
+    _button(app, 'Analyze My Emotions').click()
+    app.run()
+    assert not app.exception
+    assert any('Rules version' in markdown.value for markdown in app.markdown)
+
+@pytest.mark.parametrize('sample', ['CSV', 'TXT'])
+def test_sample_files_are_scored_in_full(app, sample):
+    app.sidebar.radio[0].set_value('📁 File Upload')
+    app.sidebar.checkbox[0].check()
+    app.run()
+    _button(app, f'Use Sample {sample}').click()
+    app.run()
+    _button(app, 'Analyze Test Data').click()
+    app.run()
+    assert not app.exception
+
+    table = app.session_state['batch_results']
+    summary = app.session_state['batch_summary']
+    assert summary.total == len(table) > 0
+
+@pytest.mark.parametrize('collecting', [True, False])
+def test_diagnostics_checkbox_never_changes_collection(app, monkeypatch, collecting):
+    monkeypatch.setattr(metrics, '_enabled', collecting)
+    diagnostics = next(box for box in app.sidebar.checkbox if 'Diagnostics' in box.label)
+    diagnostics.set_value(not collecting)
+    app.run()
+    assert not app.exception
+    assert metrics.enabled() is collecting
+    diagnostics = next(box for box in app.sidebar.checkbox if 'Diagnostics' in box.label)
+    diagnostics.set_value(collecting)
+    app.run()
+    assert metrics.enabled() is collecting
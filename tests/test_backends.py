@@ -0,0 +1,28 @@
+import pytest
+
+from wellness import backends
+from wellness.sentiment import lexicon_sentiment
+
+def test_default_backend_is_the_lexicon():
+    backend = backends.get_backend('textblob')
+    texts = ['I am very happy today', 'This is not good at all', '']
+    assert backend.score(texts) == [lexicon_sentiment(text) for text in texts]
+    # An empty version keeps the cache keys results had before backends were pluggable
+    assert backend.version == ''
+    assert backends.get_backend('textblob') is backend
+
+def test_unknown_backend():
+    with pytest.raises(ValueError, match='Unknown sentiment backend'):
+        backends.get_backend('vader')
+
+def test_transformer_backend_scores_on_the_same_scales():
+    pytest.importorskip('torch')
+    pytest.importorskip('transformers')
+    backend = backends.get_backend('transformer')
+    try:
+        backend.warm_up()
+    except OSError as e:
+        pytest.skip(f'model not available: {e}')
+    for polarity, subjectivity in backend.score(['I am so happy', 'I feel hopeless']):
+        assert -1 <= polarity <= 1 and 0 <= subjectivity <= 1
+    assert backend.version
@@ -0,0 +1,34 @@
+from wellness.cache import ResultCache, cache_key, normalize_text
+from wellness.scoring import score_batch
+
+RESULT = ('stress', 'low', -0.1, 0.4)
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResultCache(maxsize=2)
+    cache.put('a', RESULT)
+    cache.put('b', RESULT)
+    assert cache.get('a') == RESULT
+    cache.put('c', RESULT)
+    assert cache.get('b') is None
+    assert cache.get('a') == cache.get('c') == RESULT
+    assert (cache.stats()['hits'], cache.stats()['misses'], len(cache)) == (3, 1, 2)
+
+def test_zero_size_disables_caching():
+    cache = ResultCache(maxsize=0)
+    cache.put('a', RESULT)
+    assert cache.get('a') is None
+
+def test_keys_depend_on_text_and_version():
+    key = cache_key(normalize_text('I feel  so\ntired'), 'v1')
+    assert key == cache_key('I feel so tired', 'v1')
+    assert key != cache_key('I feel so tired', 'v2')
+    assert key != cache_key('i feel so tired', 'v1')
+
+def test_cached_scoring_matches_uncached():
+    cache = ResultCache()
+    texts = ['I feel so stressed', 'What a wonderful day', 'I feel so stressed', 'I feel  so stressed']
+    first = score_batch(texts, cache=cache)
+    assert cache.stats()['size'] == 2
+    again = score_batch(texts, cache=cache)
+    assert first.equals(again) and first.equals(score_batch(texts, cache=None))
+    assert cache.stats()['hits'] == 4
@@ -0,0 +1,23 @@
+import csv
+
+import pytest
+
+from wellness import cli
+
+def test_scores_a_text_file(tmp_path):
+    source = tmp_path / 'messages.txt'
+    source.write_text('I feel so stressed about my exams\nWhat a wonderful happy day\n', encoding='utf-8')
+    output = tmp_path / 'results.csv'
+    assert cli.main([str(source), '-o', str(output), '-q']) == 0
+    with open(output, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    assert [row['emotion'] for row in rows] == ['stress', 'positive']
+
+@pytest.mark.parametrize('name', ['missing.csv', '.'])
+def test_unreadable_input_is_a_usage_error(tmp_path, capsys, name):
+    output = tmp_path / 'results.csv'
+    with pytest.raises(SystemExit) as exited:
+        cli.main([str(tmp_path / name), '-o', str(output)])
+    assert exited.value.code == 2
+    assert "can't read" in capsys.readouterr().err
+    assert not output.exists()
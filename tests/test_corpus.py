@@ -0,0 +1,28 @@
+import pandas as pd
+
+from benchmarks.corpus import generate_frame, generate_messages, write_corpus
+from wellness.ingest import iter_messages
+
+def test_messages_are_reproducible():
+    assert list(generate_messages(200, seed=3)) == list(generate_messages(200, seed=3))
+    assert list(generate_messages(200, seed=3)) != list(generate_messages(200, seed=4))
+
+def test_frame_is_reproducible():
+    pd.testing.assert_frame_equal(generate_frame(200, seed=3), generate_frame(200, seed=3))
+    assert list(generate_frame(200, seed=3).columns) == ['text', 'timestamp', 'user_id']
+
+def test_write_corpus_round_trip(tmp_path):
+    paths = write_corpus(100, formats=('csv', 'txt'), data_dir=str(tmp_path), seed=5)
+    expected = list(generate_messages(100, seed=5))
+    for path in paths.values():
+        with open(path, 'rb') as f:
+            frame = pd.concat(iter_messages(f, path), ignore_index=True)
+        assert frame['message'].tolist() == expected
+
+def test_write_corpus_reuses_files(tmp_path):
+    paths = write_corpus(50, formats=('txt',), data_dir=str(tmp_path))
+    with open(paths['txt'], 'w', encoding='utf-8') as f:
+        f.write('kept\n')
+    assert write_corpus(50, formats=('txt',), data_dir=str(tmp_path)) == paths
+    with open(paths['txt'], encoding='utf-8') as f:
+        assert f.read() == 'kept\n'
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from benchmarks.corpus import generate_messages
+from wellness import dedup
+from wellness.pipeline import score_batches
+
+def test_exact_mode_leaves_results_unchanged():
+    texts = list(generate_messages(400, seed=7))
+    texts += [text.replace(' ', '  ', 1) for text in texts[:50]] + texts[:50]
+    off, = score_batches([texts], dedup_mode='off', segment=False)
+    exact, = score_batches([texts], dedup_mode='exact', segment=False)
+    assert exact.drop(columns='duplicates').equals(off)
+    assert exact['duplicates'].sum() > len(texts)
+
+def test_groups_and_representatives():
+    texts = ['b  text here', 'a text', 'b text here', 'A TEXT', 'a text']
+    groups, representatives = dedup.collapse(texts, 'exact')
+    assert groups.tolist() == [0, 1, 0, 2, 1]
+    assert representatives.tolist() == [0, 1, 3]
+    groups, representatives = dedup.collapse(texts, 'off')
+    assert groups.tolist() == representatives.tolist() == list(range(5))
+
+def test_near_mode_merges_similar_messages_only():
+    base = 'I have been feeling really stressed about the exams and deadlines at work this week'
+    texts = [base, base.upper() + '!', base.replace('week', 'weak'), 'Completely different message about lunch plans']
+    groups, _ = dedup.collapse(texts, 'near', threshold=0.8)
+    assert groups[0] == groups[1] == groups[2] != groups[3]
+
+def test_signatures_estimate_similarity():
+    texts = ['the quick brown fox jumps over the lazy dog', 'the quick brown fox jumps over the lazy cat',
+             'lorem ipsum dolor sit amet']
+    signatures = dedup.minhash_signatures(texts, num_perm=256)
+    similarity = (signatures[:, None, :] == signatures[None, :, :]).mean(axis=2)
+    assert similarity[0, 1] > 0.6 and similarity[0, 2] < 0.1
+    assert np.array_equal(signatures, dedup.minhash_signatures(texts, num_perm=256))
+
+def test_unknown_mode():
+    with pytest.raises(ValueError, match='Unknown dedup mode'):
+        dedup.collapse(['a'], 'fuzzy')
@@ -0,0 +1,38 @@
+import io
+
+import pandas as pd
+import pytest
+
+from wellness.export import ResultWriter, export_bytes
+
+RESULTS = pd.DataFrame({
+    'message': ['I feel so stressed', 'What a wonderful day', 'I feel hopeless'],
+    'emotion': ['stress', 'positive', 'depression'],
+    'severity': ['low', 'good', 'critical'],
+    'polarity': [-0.1, 0.9, -0.6],
+})
+
+def _read(data, fmt):
+    if fmt == 'csv':
+        return pd.read_csv(io.BytesIO(data))
+    if fmt == 'parquet':
+        return pd.read_parquet(io.BytesIO(data))
+    return pd.read_feather(io.BytesIO(data))
+
+@pytest.mark.parametrize('fmt', ['csv', 'parquet', 'feather'])
+def test_export_round_trip(fmt):
+    if fmt != 'csv':
+        pytest.importorskip('pyarrow')
+    read = _read(export_bytes(RESULTS, fmt), fmt)
+    assert read.astype({'emotion': str, 'severity': str}).equals(RESULTS)
+
+@pytest.mark.parametrize('fmt', ['csv', 'parquet', 'feather'])
+def test_batches_written_incrementally_match_one_write(tmp_path, fmt):
+    if fmt != 'csv':
+        pytest.importorskip('pyarrow')
+    path = tmp_path / f'results.{fmt}'
+    with ResultWriter(str(path), fmt) as writer:
+        writer.write(RESULTS.iloc[:2])
+        writer.write(RESULTS.iloc[2:])
+    assert writer.rows == 3
+    assert _read(path.read_bytes(), fmt).equals(_read(export_bytes(RESULTS, fmt), fmt))
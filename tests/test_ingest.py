@@ -0,0 +1,52 @@
+import io
+
+import pandas as pd
+import pytest
+
+from wellness.ingest import iter_messages
+
+FRAME = pd.DataFrame({
+    'user': [f'u{index % 3}' for index in range(23)],
+    'Message Text': [f'message {index}, I feel fine' for index in range(23)],
+    'timestamp': [f'2026-01-{index % 28 + 1:02d}T10:00:00' for index in range(23)],
+})
+
+def _read(source, name=None, batch_size=5):
+    batches = list(iter_messages(source, name, batch_size=batch_size))
+    assert all(len(batch) <= batch_size for batch in batches)
+    return pd.concat(batches, ignore_index=True)
+
+def _expected():
+    return pd.DataFrame({'message': FRAME['Message Text'].astype(object), 'timestamp': FRAME['timestamp'],
+                         'user_id': FRAME['user']})
+
+@pytest.mark.parametrize('extension, write', [
+    ('.csv', lambda frame, path: frame.to_csv(path, index=False)),
+    ('.xlsx', lambda frame, path: frame.to_excel(path, index=False)),
+    ('.parquet', lambda frame, path: frame.to_parquet(path, index=False)),
+    ('.feather', lambda frame, path: frame.to_feather(path)),
+])
+def test_batches_add_up_to_the_whole_file(tmp_path, extension, write):
+    if extension == '.xlsx':
+        pytest.importorskip('openpyxl')
+    elif extension != '.csv':
+        pytest.importorskip('pyarrow')
+    path = tmp_path / f'messages{extension}'
+    write(FRAME, path)
+    for source, name in ((str(path), None), (io.BytesIO(path.read_bytes()), path.name)):
+        read = _read(source, name)
+        assert read['message'].tolist() == _expected()['message'].tolist()
+        assert read['user_id'].tolist() == _expected()['user_id'].tolist()
+        assert read['timestamp'].tolist() == _expected()['timestamp'].tolist()
+
+def test_text_files_skip_blank_lines(tmp_path):
+    path = tmp_path / 'messages.txt'
+    path.write_text('first line\n\n  \nsecond line\nthird\n', encoding='utf-8')
+    assert _read(str(path), batch_size=2)['message'].tolist() == ['first line', 'second line', 'third']
+    source = io.BytesIO(path.read_bytes())
+    assert _read(source, 'upload.txt')['message'].tolist() == ['first line', 'second line', 'third']
+    assert not source.closed
+
+def test_unsupported_format():
+    with pytest.raises(ValueError, match='Unsupported'):
+        iter_messages('messages.pdf')
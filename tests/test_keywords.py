@@ -0,0 +1,41 @@
+import random
+
+import pandas as pd
+
+from wellness import lexicons
+from wellness.scoring import KeywordMatcher
+
+CATEGORIES = lexicons.KEYWORDS['en']
+
+def substring_counts(categories, text_lower):
+    # The per-keyword scan KeywordMatcher replaced
+    return {category: sum(1 for keyword in keywords if keyword in text_lower)
+            for category, keywords in categories.items()}
+
+def random_texts(rng, count):
+    # Keywords glued to each other and to filler, so overlaps and prefixes occur
+    words = [word for keywords in CATEGORIES.values() for word in keywords]
+    filler = ['i', 'am', 'so', 'the', 'x', 'ing', 'un', '', ' ', '  ', '\n', '.', 'really', 'not']
+    return [''.join(rng.choice(words if rng.random() < 0.4 else filler) + rng.choice(['', ' '])
+                    for _ in range(rng.randint(0, 20)))
+            for _ in range(count)]
+
+def test_count_matches_substring_scan():
+    matcher = KeywordMatcher(CATEGORIES)
+    for text in random_texts(random.Random(0), 5000):
+        assert matcher.count(text) == substring_counts(CATEGORIES, text), text
+
+def test_count_batch_matches_substring_scan():
+    matcher = KeywordMatcher(CATEGORIES)
+    texts = random_texts(random.Random(1), 5000)
+    counts = matcher.count_batch(pd.Series(texts, dtype=object))
+    for index, text in enumerate(texts):
+        assert {category: counts[category][index] for category in CATEGORIES} == substring_counts(CATEGORIES, text)
+
+def test_overlapping_and_shared_keywords():
+    categories = {'a': ['give up', 'give', 'up'], 'b': ['up', 'pup'], 'c': ['zzz']}
+    matcher = KeywordMatcher(categories)
+    for text in ['give up', 'pup', 'giveup', 'gi ve', '', 'puppy gives up']:
+        assert matcher.count(text) == substring_counts(categories, text)
+    counts = matcher.count_batch(pd.Series(['', 'zzz'], index=[5, 9], dtype=object))
+    assert counts['c'].tolist() == [0, 1]
@@ -0,0 +1,68 @@
+import pytest
+
+from wellness.languages import detect_language, detect_languages
+from wellness.scoring import detect_emotion, score_batch
+
+@pytest.mark.parametrize('text, language', [
+    ('I feel so stressed about my exams', 'en'),
+    ('Me siento muy triste y sola desde que se fue', 'es'),
+    ('मैं बहुत दुखी हूँ', 'hi'),
+    ('నాకు చాలా దిగులుగా ఉంది', 'te'),
+    ('I love this café so much 😊', 'en'),
+    ('ok', 'en'),
+])
+def test_detect_language(text, language):
+    assert detect_language(text) == language
+    assert detect_languages([text.lower()])[0] == language
+
+# Sadness and hopelessness in each language must not slip through as stress or neutral
+@pytest.mark.parametrize('text', [
+    'Estoy muy triste y desesperada',
+    'Soy infeliz, no quiero vivir',
+    'Ya no puedo más, me siento vacía',
+    'मैं बहुत दुखी हूँ',
+    'अब कोई उम्मीद नहीं है, जीना नहीं चाहता',
+    'मैं बहुत उदास और अकेला हूँ',
+    'నాకు చాలా దిగులుగా ఉంది',
+    'నాకు బతకాలని లేదు',
+    'నేను చాలా బాధగా ఉన్నాను',
+])
+def test_sadness_scores_as_depression(text):
+    assert detect_emotion(text)[0] == 'depression'
+
+# A negated "fine" is not a positive message
+@pytest.mark.parametrize('text', [
+    'No estoy bien',
+    'Hoy no me siento bien, no estoy bien',
+    'मुझे अच्छा नहीं लग रहा',
+    'आज मेरा दिन अच्छा नहीं था',
+])
+def test_negated_positive_words_are_not_positive(text):
+    assert detect_emotion(text)[0] != 'positive'
+
+@pytest.mark.parametrize('text', [
+    'Estoy muy feliz y contenta con todo',
+    'मैं बहुत खुश हूँ, आज का दिन बढ़िया था',
+    'నేను చాలా సంతోషంగా ఉన్నాను, అద్భుతమైన రోజు',
+])
+def test_happiness_scores_as_positive(text):
+    assert detect_emotion(text)[0] == 'positive'
+
+# Code-switched messages routed to Spanish keep their English keyword hits
+@pytest.mark.parametrize('text, severity', [
+    ('I want to die, no tengo ganas de nada', 'high'),
+    ('I feel worthless, no puedo con esto', 'critical'),
+    ('I feel sad, la vida es dura', 'critical'),
+    ('I feel so depressed y no sé qué hacer con mi vida', 'high'),
+])
+def test_code_switched_messages_keep_english_hits(text, severity):
+    assert detect_language(text) == 'es'
+    assert detect_emotion(text)[:2] == ('depression', severity)
+    frame = score_batch([text], cache=None)
+    assert (frame['emotion'][0], frame['severity'][0]) == ('depression', severity)
+
+def test_batch_routing_matches_single_messages():
+    texts = ['Estoy muy triste y desesperada', 'मैं बहुत दुखी हूँ', 'I feel so stressed about my exams',
+             'నేను చాలా సంతోషంగా ఉన్నాను', 'No estoy bien']
+    frame = score_batch(texts, cache=None)
+    assert list(zip(frame['emotion'], frame['severity'])) == [detect_emotion(text)[:2] for text in texts]
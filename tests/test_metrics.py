@@ -0,0 +1,50 @@
+import pathlib
+import re
+
+import pytest
+
+from wellness import metrics
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setattr(metrics, '_enabled', True)
+    metrics.reset()
+    yield
+    metrics.reset()
+
+def test_disabled_collection_records_nothing(monkeypatch):
+    monkeypatch.setattr(metrics, '_enabled', False)
+    metrics.reset()
+    metrics.inc('messages_scored_total')
+    with metrics.timer('score'):
+        pass
+    assert metrics.export_state() == ({}, {})
+
+def test_counters_and_stage_timings(enabled):
+    metrics.inc('messages_scored_total', 3)
+    metrics.inc('messages_scored_total')
+    with metrics.timer('score'):
+        pass
+    snapshot = metrics.snapshot()
+    assert snapshot['counters']['messages_scored_total'] == 4
+    assert snapshot['stages']['score']['count'] == 1
+    text = metrics.render_prometheus()
+    assert 'wellness_messages_scored_total 4' in text
+    assert 'wellness_stage_seconds_bucket{stage="score",le="+Inf"} 1' in text
+    assert 'wellness_stage_seconds_count{stage="score"} 1' in text
+
+def test_worker_state_merges(enabled):
+    metrics.inc('batches_scored_total', 2)
+    metrics.observe('stage_seconds', 0.01, 'score')
+    state = metrics.export_state()
+    metrics.merge_state(state)
+    counters, histograms = metrics.export_state()
+    assert counters['batches_scored_total'] == 4
+    assert histograms[('stage_seconds', 'score')][2] == 2
+
+def test_every_recorded_metric_is_registered():
+    # A metric missing from METRICS is counted but never exported
+    source = '\n'.join(path.read_text(encoding='utf-8')
+                       for path in pathlib.Path(metrics.__file__).parent.glob('*.py'))
+    recorded = set(re.findall(r"metrics\.(?:inc|observe)\('([a-z_]+)'", source))
+    assert recorded and recorded <= set(metrics.METRICS)
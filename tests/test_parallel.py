@@ -0,0 +1,27 @@
+import pytest
+
+from benchmarks.corpus import generate_messages
+from wellness import parallel, rules, scoring
+
+@pytest.fixture(autouse=True)
+def shutdown_pools():
+    yield
+    parallel.shutdown_pools()
+
+def test_pool_matches_in_process_scoring():
+    texts = list(generate_messages(300, seed=5))
+    progress = []
+    pooled = parallel.score_parallel(texts, workers=2, chunk_size=50, cache=None,
+                                     on_progress=lambda done, total: progress.append((done, total)))
+    assert pooled.equals(scoring.score_batch(texts, cache=None))
+    assert progress[-1] == (300, 300)
+
+def test_workers_use_the_pinned_rules():
+    ruleset = rules.RuleSet({'version': 'all-neutral', 'rules': [
+        {'emotion': 'neutral', 'severity': 'normal', 'when': {'polarity': '>= -2'}}],
+        'otherwise': {'emotion': 'neutral', 'severity': 'normal'}})
+    texts = ['I feel hopeless and worthless'] + [f'message number {index}' for index in range(99)]
+    with rules.pinned(ruleset):
+        pooled = parallel.score_parallel(texts, workers=2, chunk_size=25, cache=None)
+    assert set(pooled['emotion']) == {'neutral'}
+    assert set(pooled['rules_version']) == {'all-neutral'}
@@ -0,0 +1,25 @@
+from wellness.pipeline import score_batches
+
+LONG = ("I had a nice walk with friends today and lunch was great. " * 4
+        + "I want to give up, I feel hopeless and worthless.")
+
+def _flagged(results):
+    return [[message[start:end] for start, end in spans]
+            for message, spans in zip(results['message'], results['spans'])]
+
+def test_segment_spans_point_into_each_message():
+    texts = [LONG, LONG.replace('. ', '.   '), LONG.upper()]
+    for dedup_mode in ('exact', 'near'):
+        results, = score_batches([texts], segment=True, dedup_mode=dedup_mode)
+        for flagged in _flagged(results):
+            assert [passage.lower() for passage in flagged] == ['i want to give up, i feel hopeless and worthless.']
+
+def test_segment_shares_results_of_identical_messages():
+    results, = score_batches([[LONG, LONG, LONG + ' ']], segment=True)
+    assert results['duplicates'].tolist() == [2, 2, 1]
+
+def test_dedup_fans_results_out():
+    texts = ['I feel so stressed  about work', 'I feel so stressed about work', 'What a wonderful day']
+    results, = score_batches([texts], segment=False)
+    assert results['duplicates'].tolist() == [2, 2, 1]
+    assert results['emotion'].tolist()[:2] == ['stress', 'stress']
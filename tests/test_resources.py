@@ -0,0 +1,56 @@
+import json
+import os
+
+import pytest
+
+from wellness import resources
+
+@pytest.fixture
+def resource_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(resources, 'RESOURCE_DIR', str(tmp_path))
+    monkeypatch.setattr(resources, '_resources', {})
+    return tmp_path
+
+def _save(value, directory):
+    with open(os.path.join(directory, 'value.json'), 'w') as f:
+        json.dump(value, f)
+
+def _load(directory):
+    with open(os.path.join(directory, 'value.json')) as f:
+        return json.load(f)
+
+def test_built_once_per_process(resource_dir):
+    builds = []
+    for _ in range(3):
+        value = resources.shared('table', lambda: builds.append(1) or {'a': 1})
+    assert value == {'a': 1} and len(builds) == 1
+    assert [row['resource'] for row in resources.report()] == ['table']
+
+def test_snapshot_is_loaded_instead_of_building(resource_dir, monkeypatch):
+    assert resources.shared('table', lambda: {'a': 1}, version='v1', save=_save, load=_load) == {'a': 1}
+    assert os.path.isdir(resources.snapshot_path('table', 'v1'))
+
+    # Another process: nothing loaded yet, so the snapshot is read
+    monkeypatch.setattr(resources, '_resources', {})
+    value = resources.shared('table', lambda: pytest.fail('rebuilt'), version='v1', save=_save, load=_load)
+    assert value == {'a': 1}
+    assert resources.report()[0]['source'] == 'snapshot'
+
+def test_damaged_snapshot_falls_back_to_building(resource_dir):
+    path = resources.snapshot_path('table', 'v1')
+    os.makedirs(path)
+    with open(os.path.join(path, 'value.json'), 'w') as f:
+        f.write('{not json')
+    assert resources.shared('table', lambda: {'a': 2}, version='v1', save=_save, load=_load) == {'a': 2}
+    assert resources.report()[0]['source'].startswith('built, snapshot unreadable')
+
+def test_lexicon_snapshot_scores_like_textblob(resource_dir, monkeypatch):
+    textblob = pytest.importorskip('textblob')
+    from wellness.sentiment import LexiconSentiment
+
+    LexiconSentiment().score('warm up')
+    monkeypatch.setattr(resources, '_resources', {})
+    scorer = LexiconSentiment()
+    texts = ['I am very happy :)', 'not bad at all!', 'This is the worst day ever']
+    assert [scorer.score(text) for text in texts] == [tuple(textblob.TextBlob(text).sentiment) for text in texts]
+    assert resources.report()[0]['source'] == 'snapshot'
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from wellness.results import ResultTable  # noqa: E402
+
+def _batch(start, count):
+    rng = np.random.default_rng(start)
+    return pd.DataFrame({
+        'message': [f'message {index} ✓' if index % 7 else None for index in range(start, start + count)],
+        'user_id': rng.choice(['u1', 'u2', None], count),
+        'emotion': rng.choice(['depression', 'stress', 'positive', 'neutral'], count),
+        'severity': rng.choice(['critical', 'low', 'good', 'normal'], count),
+        'polarity': rng.uniform(-1, 1, count),
+        'duplicates': rng.integers(1, 4, count),
+    })
+
+def _values(column):
+    return [None if pd.isna(value) else value for value in column.astype(object)]
+
+def test_rows_read_back_as_written():
+    batches = [_batch(0, 700), _batch(700, 900), _batch(1600, 5)]
+    table = ResultTable(coded=['user_id'])
+    for batch in batches:
+        table.append(batch)
+    expected = pd.concat(batches, ignore_index=True)
+    assert len(table) == len(expected)
+
+    for start, stop in ((0, None), (650, 1620), (1600, 1605)):
+        frame = table.to_frame(start, stop)
+        rows = expected.iloc[start:stop]
+        assert frame.index.tolist() == rows.index.tolist()
+        for column in ('message', 'user_id', 'emotion', 'severity'):
+            assert _values(frame[column]) == _values(rows[column])
+        assert np.allclose(frame['polarity'], rows['polarity'], atol=1e-6)
+        assert frame['duplicates'].tolist() == rows['duplicates'].tolist()
+
+    paged = pd.concat(table.iter_frames(rows=256))
+    assert len(paged) == len(expected)
+    assert table.nbytes < expected.memory_usage(deep=True).sum()
+
+def test_columns_must_match():
+    table = ResultTable()
+    table.append(_batch(0, 3))
+    with pytest.raises(ValueError, match='Expected columns'):
+        table.append(_batch(3, 3).drop(columns='polarity'))
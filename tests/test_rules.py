@@ -0,0 +1,109 @@
+import json
+import pickle
+import random
+
+import numpy as np
+import pytest
+
+from wellness import rulefile, rules
+
+def ladder(critical_score, stress_score, positive_score, polarity, subjectivity):
+    # The decision ladder the built-in rules replaced
+    if critical_score >= 2 or (critical_score >= 1 and polarity < -0.3):
+        return 'depression', 'critical'
+    elif critical_score >= 1 or (stress_score >= 2 and polarity < -0.1):
+        return 'depression', 'high'
+    elif stress_score >= 2 or (polarity < -0.2 and subjectivity > 0.5):
+        return 'stress', 'moderate'
+    elif stress_score >= 1 or (polarity < 0 and polarity > -0.3):
+        return 'stress', 'low'
+    elif positive_score >= 2 or polarity > 0.3:
+        return 'positive', 'good'
+    elif polarity >= 0:
+        return 'neutral', 'normal'
+    return 'stress', 'low'
+
+def random_features(rng, count):
+    # Thresholds themselves are drawn often, so both sides of every comparison are hit
+    edges = [-1.0, -0.3, -0.2, -0.1, 0.0, 0.3, 0.5, 1.0]
+    def number():
+        return rng.choice(edges) if rng.random() < 0.3 else rng.uniform(-1, 1)
+    return [(rng.randint(0, 3), rng.randint(0, 3), rng.randint(0, 3), number(), abs(number()))
+            for _ in range(count)]
+
+def test_decide_matches_ladder():
+    ruleset = rules.DEFAULT
+    for features in random_features(random.Random(0), 20000):
+        assert ruleset.labels[ruleset.decide(features)] == ladder(*features), features
+
+def test_decide_batch_matches_ladder():
+    ruleset = rules.DEFAULT
+    features = random_features(random.Random(1), 20000)
+    columns = [np.array(column) for column in zip(*features)]
+    branches = ruleset.decide_batch(columns)
+    assert [ruleset.labels[branch] for branch in branches] == [ladder(*row) for row in features]
+
+def test_dumped_rules_round_trip(tmp_path, capsys):
+    path = tmp_path / 'rules.json'
+    assert rulefile.main(['dump', '-o', str(path)]) == 0
+    assert rules.load(path).fingerprint == rules.DEFAULT.fingerprint
+    assert rulefile.main(['check', str(path)]) == 0
+
+def test_rules_pickle_to_the_same_rules():
+    ruleset = rules.RuleSet(dict(rules.DEFAULT_RULES, version='2', keywords={'en': {'stress': ['deadline']}}))
+    copy = pickle.loads(pickle.dumps(ruleset))
+    assert (copy.version, copy.fingerprint, copy.keywords('en')) == (ruleset.version, ruleset.fingerprint,
+                                                                    ruleset.keywords('en'))
+
+@pytest.mark.parametrize('config, message', [
+    ({'rules': []}, "'version'"),
+    ({'version': '1', 'rules': [{'emotion': 'sad', 'severity': 'low', 'when': {'polarity': '< 0'}}]}, 'emotion'),
+    ({'version': '1', 'rules': [{'emotion': 'stress', 'severity': 'low', 'when': {'mood': '< 0'}}]}, 'feature'),
+    ({'version': '1', 'rules': [{'emotion': 'stress', 'severity': 'low', 'when': {'polarity': 'low'}}]}, 'condition'),
+])
+def test_invalid_rules_are_rejected(config, message):
+    with pytest.raises(ValueError, match=message):
+        rules.RuleSet(config)
+
+@pytest.fixture
+def rules_file(tmp_path, monkeypatch):
+    path = tmp_path / 'rules.json'
+    monkeypatch.setattr(rules, 'RULES_PATH', str(path))
+    monkeypatch.setattr(rules, 'RELOAD_SECONDS', 0)
+    monkeypatch.setattr(rules, '_active', rules.DEFAULT)
+    monkeypatch.setattr(rules, '_state', {'loaded_at': 0.0, 'signature': None, 'next_check': 0.0,
+                                          'error': None, 'reloads': 0})
+    return path
+
+def _write(path, version, **changes):
+    path.write_text(json.dumps(dict(rules.DEFAULT_RULES, version=version, **changes)), encoding='utf-8')
+
+def test_reload_picks_up_changes(rules_file):
+    _write(rules_file, 'a')
+    assert rules.current().version == 'a'
+    _write(rules_file, 'bb')
+    assert rules.current().version == 'bb'
+    assert rules.status()['reloads'] == 2
+
+@pytest.mark.parametrize('broken', ['{"version": "b", "rules": [', '{"version": "b", "rules": []}',
+                                    '{"version": "b", "rules": [{"emotion": "sad"}]}'])
+def test_reload_keeps_previous_rules_when_file_is_invalid(rules_file, broken, capsys):
+    _write(rules_file, 'a')
+    assert rules.current().version == 'a'
+    rules_file.write_text(broken, encoding='utf-8')
+    assert rules.current().version == 'a'
+    assert rules.status()['error']
+    assert 'Keeping rules a' in capsys.readouterr().err
+    rules_file.unlink()
+    assert rules.current().version == 'a'
+    _write(rules_file, 'ccc')
+    assert rules.current().version == 'ccc'
+    assert rules.status()['error'] is None
+
+def test_pinned_rules_ignore_reloads(rules_file):
+    _write(rules_file, 'a')
+    ruleset = rules.current()
+    with rules.pinned(ruleset):
+        _write(rules_file, 'bb')
+        assert rules.current() is ruleset
+    assert rules.current().version == 'bb'
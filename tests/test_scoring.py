@@ -0,0 +1,57 @@
+import pytest
+
+from benchmarks.corpus import generate_messages
+from wellness.cache import normalize_text
+from wellness.scoring import (DEPRESSION_KEYWORDS, POSITIVE_KEYWORDS, RESULT_COLUMNS, STRESS_KEYWORDS,
+                              detect_emotion, score_batch)
+
+@pytest.mark.parametrize('text, spaced', [
+    ('I hate myself so much', 'I hate  myself so much'),
+    ('I just want to give up on everything', 'I just want to give\nup on everything'),
+])
+def test_whitespace_is_collapsed_before_scoring(text, spaced):
+    assert detect_emotion(spaced)[:2] == detect_emotion(text)[:2]
+    assert score_batch([spaced], cache=None).iloc[0, :2].tolist() == list(detect_emotion(text)[:2])
+
+def test_keyword_phrases_match_across_line_breaks():
+    assert detect_emotion('I want to give\nup')[:2] == ('depression', 'high')
+
+def test_score_batch_matches_detect_emotion():
+    texts = ['I feel so stressed about my exams', 'What a wonderful, happy day with friends',
+             'I feel worthless and want to end it all', 'The meeting is at noon', '']
+    frame = score_batch(texts, cache=None)
+    assert list(frame.columns) == RESULT_COLUMNS
+    for text, row in zip(texts, frame.itertuples(index=False)):
+        emotion, severity, polarity, subjectivity = detect_emotion(text)
+        assert (row.emotion, row.severity) == (emotion, severity)
+        assert row.polarity == pytest.approx(polarity)
+        assert row.subjectivity == pytest.approx(subjectivity)
+
+def baseline_detect_emotion(text):
+    # The app's original per-message scorer: a substring scan per keyword, then TextBlob
+    from textblob import TextBlob
+
+    text_lower = text.lower()
+    critical_score = sum(1 for keyword in DEPRESSION_KEYWORDS if keyword in text_lower)
+    stress_score = sum(1 for keyword in STRESS_KEYWORDS if keyword in text_lower)
+    positive_score = sum(1 for keyword in POSITIVE_KEYWORDS if keyword in text_lower)
+    polarity, subjectivity = TextBlob(text).sentiment
+    if critical_score >= 2 or (critical_score >= 1 and polarity < -0.3):
+        return 'depression', 'critical'
+    elif critical_score >= 1 or (stress_score >= 2 and polarity < -0.1):
+        return 'depression', 'high'
+    elif stress_score >= 2 or (polarity < -0.2 and subjectivity > 0.5):
+        return 'stress', 'moderate'
+    elif stress_score >= 1 or (polarity < 0 and polarity > -0.3):
+        return 'stress', 'low'
+    elif positive_score >= 2 or polarity > 0.3:
+        return 'positive', 'good'
+    elif polarity >= 0:
+        return 'neutral', 'normal'
+    return 'stress', 'low'
+
+def test_batch_scoring_matches_the_original_scorer():
+    pytest.importorskip('textblob')
+    texts = [normalize_text(text) for text in generate_messages(1000, seed=3)]
+    frame = score_batch(texts, cache=None)
+    assert list(zip(frame['emotion'], frame['severity'])) == [baseline_detect_emotion(text) for text in texts]
@@ -0,0 +1,37 @@
+import random
+
+import pandas as pd
+
+from wellness import segments
+from wellness.scoring import RESULT_COLUMNS, score_batch
+
+def test_short_messages_score_exactly_as_before():
+    texts = ['I feel so stressed about my exams', 'What a wonderful happy day', 'I feel hopeless']
+    segmented = segments.score_segmented(texts)
+    # Polarity goes through a length-weighted mean, so allow for rounding
+    pd.testing.assert_frame_equal(segmented[RESULT_COLUMNS], score_batch(texts, cache=None))
+    assert segmented['segments'].tolist() == [1, 1, 1]
+    assert segmented['spans'].tolist() == [[(0, len(text))] for text in texts]
+
+def test_spans_are_trimmed_and_in_order():
+    rng = random.Random(0)
+    pieces = ['I feel fine.', 'Ok.', 'Dr. Smith said so!', 'Really?', '\n\n', 'word ' * 150, 'मैं ठीक हूँ।', ' ']
+    for _ in range(200):
+        text = ' '.join(rng.choice(pieces) for _ in range(rng.randint(1, 12)))
+        spans = segments.split_segments(text, max_chars=200)
+        for start, end in spans:
+            assert 0 <= start < end <= len(text) and end - start <= 200
+            assert not text[start].isspace() and not text[end - 1].isspace()
+        assert all(a[1] <= b[0] for a, b in zip(spans, spans[1:]))
+
+def test_critical_sentence_sets_the_verdict():
+    text = 'I had a nice walk with friends today and lunch was great. ' * 6 + 'I feel hopeless and worthless.'
+    row = segments.score_segmented([text]).iloc[0]
+    assert (row['emotion'], row['severity']) == ('depression', 'critical')
+    assert [text[start:end] for start, end in row['spans']] == ['I feel hopeless and worthless.']
+
+def test_capped_messages_keep_depression_segments():
+    text = ' '.join(f'Sentence number {index} is about lunch.' for index in range(100)) + ' I feel hopeless.'
+    row = segments.score_segmented([text], max_segments=10).iloc[0]
+    assert row['segments'] == 10
+    assert row['emotion'] == 'depression'
@@ -0,0 +1,38 @@
+import pytest
+
+from benchmarks.corpus import generate_messages
+from benchmarks.sentiment_parity import fuzz_messages
+from wellness.sentiment import PARITY_TOLERANCE, LexiconSentiment
+
+textblob = pytest.importorskip('textblob')
+
+EDGE_CASES = [
+    # negation
+    'not good', "I don't feel happy", 'never been so sad', 'no, not bad at all', "isn't terrible",
+    # intensifiers
+    'very good', 'really really bad', 'extremely happy!', 'terribly sad', 'so very tired',
+    # punctuation
+    'good!', 'bad!!!', 'great (!)', 'nice...', '"happy"', '“sad”', 'well, fine; ok: good?',
+    ':) what a day', "I'm sad :'(", 'love it <3', 'e.g. good etc. bad',
+    # empty and whitespace
+    '', ' ', '\n\n', '\t',
+    # non-ASCII
+    'naïve but happy', 'ÜBER good', 'café was nice ☕', 'estoy muy bien', 'मैं बहुत खुश हूँ', '😊😊',
+]
+
+def _assert_parity(texts):
+    scorer = LexiconSentiment()
+    for text in texts:
+        expected = tuple(textblob.TextBlob(text).sentiment)
+        actual = scorer.score(text)
+        assert actual == pytest.approx(expected, abs=PARITY_TOLERANCE), text
+
+@pytest.mark.parametrize('text', EDGE_CASES)
+def test_edge_cases(text):
+    _assert_parity([text])
+
+def test_corpus():
+    _assert_parity(generate_messages(500, seed=0))
+
+def test_fuzzed_messages():
+    _assert_parity(fuzz_messages(2000, seed=0))
@@ -0,0 +1,62 @@
+import asyncio
+import json
+
+import pytest
+
+from wellness import metrics, service
+
+def request(app, method, path, body=None):
+    """Send one request through the ASGI app, returning (status, decoded JSON)"""
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': json.dumps(body).encode() if body is not None else b''}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app({'type': 'http', 'method': method, 'path': path}, receive, send))
+    start, response = sent
+    return start['status'], json.loads(response['body'])
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setattr(metrics, '_enabled', True)
+    metrics.reset()
+    yield service.ScoringService(workers=1)
+    metrics.reset()
+
+def test_score_one(app):
+    status, result = request(app, 'POST', '/score', {'text': 'I feel so stressed about my exams'})
+    assert status == 200
+    assert (result['emotion'], result['severity']) == ('stress', 'low')
+    assert metrics.snapshot()['counters']['messages_scored_total'] == 1
+
+def test_segmented_message_counts_once(app):
+    text = 'I had a nice walk with friends today and lunch was great. ' * 6 + 'I feel hopeless.'
+    status, result = request(app, 'POST', '/score', {'text': text, 'segment': True})
+    assert status == 200
+    assert result['segments'] > 1
+    assert metrics.snapshot()['counters']['messages_scored_total'] == 1
+
+def test_batch(app):
+    texts = ['I feel so stressed about my exams', 'What a wonderful happy day']
+    status, payload = request(app, 'POST', '/score/batch', {'texts': texts, 'segment': True})
+    assert status == 200
+    assert [result['emotion'] for result in payload['results']] == ['stress', 'positive']
+    assert metrics.snapshot()['counters']['messages_scored_total'] == 2
+
+def test_too_many_texts(app, monkeypatch):
+    monkeypatch.setattr(service, 'MAX_BULK_MESSAGES', 2)
+    status, payload = request(app, 'POST', '/score/batch', {'texts': ['a', 'b', 'c']})
+    assert status == 422
+    assert payload['limit'] == 2
+
+@pytest.mark.parametrize('method, path, body, status', [
+    ('POST', '/score', {'txt': 'hello'}, 400),
+    ('POST', '/score/batch', {'texts': 'hello'}, 400),
+    ('GET', '/score', None, 405),
+    ('GET', '/nowhere', None, 404),
+])
+def test_bad_requests(app, method, path, body, status):
+    assert request(app, method, path, body)[0] == status
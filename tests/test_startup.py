@@ -0,0 +1,8 @@
+import pytest
+
+from benchmarks.startup import MODULES, measure
+
+@pytest.mark.parametrize('module', MODULES)
+def test_import_loads_no_heavy_libraries(module):
+    _, loaded = measure(module, runs=1)
+    assert loaded == []
@@ -0,0 +1,29 @@
+from wellness.cache import ResultCache
+from wellness.scoring import score_batch
+from wellness.store import ResultStore
+
+RESULT = ('depression', 'high', -0.4, 0.9)
+
+def test_round_trip_and_purge(tmp_path):
+    path = str(tmp_path / 'results.sqlite3')
+    store = ResultStore(path, version='v1')
+    store.put_many([(b'a', RESULT)])
+    store.version = lambda: 'v2'
+    store.put_many([(b'b', RESULT)])
+    store.close()
+
+    store = ResultStore(path, version='v2')
+    assert store.get_many([b'a', b'b', b'c']) == [RESULT, RESULT, None]
+    assert store.stats()['versions'] == {'v1': 1, 'v2': 1}
+    assert store.purge(keep_version='v2') == 1
+    assert store.get_many([b'a', b'b']) == [None, RESULT]
+
+def test_results_survive_a_restart(tmp_path):
+    path = str(tmp_path / 'results.sqlite3')
+    texts = ['I feel so stressed about work', 'What a wonderful day']
+    first = score_batch(texts, cache=ResultCache(store=ResultStore(path)))
+
+    store = ResultStore(path)
+    again = score_batch(texts, cache=ResultCache(store=store))
+    assert again.equals(first)
+    assert store.hits == 2
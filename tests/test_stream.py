@@ -0,0 +1,58 @@
+import threading
+import time
+
+from wellness import metrics
+from wellness.stream import AlertDispatcher, AlertMonitor
+
+def test_slow_hooks_never_block_send(capsys, monkeypatch):
+    monkeypatch.setattr(metrics, '_enabled', True)
+    metrics.reset()
+    release = threading.Event()
+    busy = threading.Event()
+    received = []
+
+    def hook(alert):
+        busy.set()
+        release.wait()
+        received.append(alert['id'])
+
+    dispatcher = AlertDispatcher([hook], queue_size=2)
+    dispatcher.send({'id': 0}, time.monotonic())
+    busy.wait(5)
+    started = time.monotonic()
+    for index in range(1, 10):
+        dispatcher.send({'id': index}, time.monotonic())
+    assert time.monotonic() - started < 1
+    release.set()
+    dispatcher.close()
+    # One alert is held by the hook, two wait in the queue, the rest are dropped
+    assert received == [0, 1, 2]
+    assert (dispatcher.sent, dispatcher.dropped) == (3, 7)
+    assert 'alerts dropped' in capsys.readouterr().err
+    assert 'wellness_alerts_dropped_total 7' in metrics.render_prometheus()
+    metrics.reset()
+
+def test_every_critical_alert_is_logged_while_hooks_block():
+    release = threading.Event()
+    logged = []
+    dispatcher = AlertDispatcher([lambda alert: release.wait()], queue_size=1, log=logged.append)
+    monitor = AlertMonitor()
+    critical = {'emotion': 'depression', 'severity': 'critical', 'user_id': None}
+    for index in range(20):
+        for alert in monitor.check(dict(critical, id=index), index):
+            dispatcher.send(alert, time.monotonic())
+    release.set()
+    dispatcher.close()
+    assert dispatcher.dropped > 0
+    assert [alert['id'] for alert in logged if not alert.get('dropped')] == list(range(20))
+    assert len([alert for alert in logged if alert.get('dropped')]) == dispatcher.dropped
+    assert all(alert['alert'] == 'critical_message' for alert in logged)
+
+def test_window_alerts_once_until_points_drop():
+    monitor = AlertMonitor(window=60, threshold=6)
+    high = {'emotion': 'depression', 'severity': 'high', 'user_id': 'u1'}
+    raised = [monitor.check(high, at) for at in (0, 1, 2, 3)]
+    assert [[alert['alert'] for alert in alerts] for alerts in raised] == [[], [], ['user_window'], []]
+    assert monitor.check(high, 200) == []
+    critical = dict(high, severity='critical', user_id=None)
+    assert [alert['alert'] for alert in monitor.check(critical, 0)] == ['critical_message']
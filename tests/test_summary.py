@@ -0,0 +1,25 @@
+import pandas as pd
+
+from wellness.scoring import EMOTIONS
+from wellness.summary import ResultSummary
+
+def test_batched_counts_match_a_crosstab():
+    results = pd.DataFrame({
+        'emotion': ['stress', 'positive', 'depression', 'stress', 'neutral', 'depression', 'stress'],
+        'severity': ['low', 'good', 'critical', 'moderate', 'normal', 'critical', 'low'],
+    })
+    summary = ResultSummary()
+    for start in range(0, len(results), 3):
+        batch = results.iloc[start:start + 3]
+        summary.update(batch['emotion'], batch['severity'])
+
+    assert summary.total == len(results)
+    assert summary.emotion_counts() == {emotion: int((results['emotion'] == emotion).sum()) for emotion in EMOTIONS}
+    crosstab = results.value_counts(['severity', 'emotion']).to_dict()
+    table = summary.severity_table()
+    assert dict(zip(zip(table['Severity'], table['Emotion']), table['Count'])) == crosstab
+
+def test_unknown_labels_are_not_counted():
+    summary = ResultSummary()
+    summary.update(['stress', 'angry'], ['low', 'low'])
+    assert summary.total == 1
@@ -0,0 +1,25 @@
+import pytest
+
+from wellness import train
+
+def test_unknown_text_column_is_a_usage_error(tmp_path, capsys):
+    source = tmp_path / 'labelled.csv'
+    source.write_text('message,emotion,severity\nI feel so sad,depression,high\n', encoding='utf-8')
+    with pytest.raises(SystemExit) as exited:
+        train.main([str(source), '-o', str(tmp_path / 'model'), '--text-column', 'body'])
+    assert exited.value.code == 2
+    assert "no column 'body'" in capsys.readouterr().err
+
+def test_trained_model_scores_messages(tmp_path):
+    pytest.importorskip('sklearn')
+    from wellness.linear import LinearEmotionModel
+
+    rows = [('I feel hopeless and worthless', 'depression', 'critical'),
+            ('so much pressure and deadlines', 'stress', 'moderate'),
+            ('what a wonderful happy day', 'positive', 'good'),
+            ('the meeting is at noon', 'neutral', 'normal')] * 5
+    source = tmp_path / 'labelled.csv'
+    source.write_text('text,emotion,severity\n' + ''.join(','.join(row) + '\n' for row in rows), encoding='utf-8')
+    assert train.main([str(source), '-o', str(tmp_path / 'model'), '--test-size', '0']) == 0
+    scored = LinearEmotionModel(str(tmp_path / 'model')).score_frame([text for text, _, _ in rows[:4]])
+    assert scored['emotion'].tolist() == ['depression', 'stress', 'positive', 'neutral']
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+from wellness.trends import TrendTracker
+
+def _results(count, seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'user_id': rng.choice(['u1', 'u2', 'u3'], count),
+        'timestamp': (pd.Timestamp('2026-03-01') + pd.to_timedelta(rng.integers(0, 20 * 24, count), unit='h')).astype(str),
+        'emotion': rng.choice(['depression', 'stress', 'positive', 'neutral'], count),
+        'severity': rng.choice(['critical', 'high', 'low', 'normal'], count),
+        'polarity': rng.uniform(-1, 1, count),
+    })
+
+def test_batched_updates_match_grouping_everything():
+    results = _results(500, seed=0)
+    tracker = TrendTracker('1D')
+    for start in range(0, len(results), 64):
+        tracker.update(results.iloc[start:start + 64])
+
+    days = pd.to_datetime(results['timestamp']).dt.floor('1D')
+    for user_id, rows in results.groupby('user_id'):
+        expected = rows.groupby(days[rows.index])['polarity'].agg(['count', 'sum'])
+        trend = tracker.user_trend(user_id)
+        assert trend['messages'].tolist() == expected['count'].tolist()
+        assert np.allclose(trend['polarity_sum'], expected['sum'])
+
+def test_save_and_load_resume_tracking(tmp_path):
+    first, second = _results(200, seed=1), _results(200, seed=2)
+    whole = TrendTracker('1D')
+    whole.update(pd.concat([first, second], ignore_index=True))
+
+    resumed = TrendTracker('1D')
+    resumed.update(first)
+    resumed.save(tmp_path / 'trends.npz')
+    resumed = TrendTracker.load(tmp_path / 'trends.npz')
+    resumed.update(second)
+    pd.testing.assert_frame_equal(resumed.summary(window=7), whole.summary(window=7))
+
+def test_rows_without_user_or_time_are_skipped():
+    results = _results(3, seed=3)
+    results.loc[0, 'user_id'] = None
+    results.loc[1, 'timestamp'] = 'not a time'
+    assert TrendTracker().update(results) == 1
+
+def test_unknown_labels_are_not_counted():
+    results = _results(2, seed=4).assign(emotion=['angry', 'stress'], severity=['low', 'extreme'])
+    tracker = TrendTracker()
+    assert tracker.update(results) == 2
+    trends = pd.concat([tracker.user_trend(user_id) for user_id in tracker.users])
+    labels = trends.filter(regex='^(emotion|severity)_').sum()
+    assert labels[labels > 0].to_dict() == {'emotion_stress': 1, 'severity_low': 1}
+
+def _timed(timestamps):
+    return pd.DataFrame({'user_id': 'u1', 'timestamp': timestamps, 'emotion': 'stress', 'severity': 'low',
+                         'polarity': 0.0})
+
+def test_timestamps_with_one_offset_are_converted_to_utc():
+    tracker = TrendTracker('1h')
+    assert tracker.update(_timed(['2024-05-01T10:00:00+02:00', '2024-05-01T10:30:00+02:00'])) == 2
+    trend = tracker.user_trend('u1')
+    assert trend.index.tolist() == [pd.Timestamp('2024-05-01 08:00')]
+    assert trend['messages'].tolist() == [2]
+
+def test_mixed_offsets_and_naive_timestamps_share_utc_buckets():
+    tracker = TrendTracker('1h')
+    timestamps = ['2024-05-01T10:15:00+02:00', '2024-05-01T03:45:00-05:00', '2024-05-01 08:30', 'not a time']
+    assert tracker.update(_timed(timestamps)) == 3
+    trend = tracker.user_trend('u1')
+    assert trend.index.tolist() == [pd.Timestamp('2024-05-01 08:00')]
+    assert trend['messages'].tolist() == [3]
@@ -0,0 +1,8 @@
+"""Scoring core for the Mental Wellness Detector
+
+Kept free of Streamlit so it can be imported by worker processes and
+batch jobs.
+"""
+from wellness.scoring import analyze_sentiment, detect_emotion, score_batch
+
+__all__ = ['analyze_sentiment', 'detect_emotion', 'score_batch']
@@ -0,0 +1,191 @@
+"""Pluggable sentiment backends
+
+A backend turns a list of texts into ``(polarity, subjectivity)`` pairs on
+TextBlob's scales (-1..1 and 0..1), which the keyword decision ladder in
+wellness.scoring then combines with its keyword counts. The backend is chosen
+with WELLNESS_SENTIMENT_BACKEND:
+
+    textblob     TextBlob's pattern lexicon (default, no extra dependencies)
+    transformer  a Hugging Face sequence-classification model on CPU, from
+                 requirements-ml.txt
+
+Each backend is created once per process and shared by every caller; models
+are loaded on first use, not at import, through wellness.resources, which
+memory-maps float model weights from a snapshot so worker processes share
+them.
+"""
+import hashlib
+import os
+import threading
+
+from wellness import resources
+
+DEFAULT_BACKEND = os.environ.get('WELLNESS_SENTIMENT_BACKEND', 'textblob')
+
+# Hub name or local directory of the sequence-classification model
+DEFAULT_MODEL = os.environ.get('WELLNESS_MODEL', 'bhadresh-savani/distilbert-base-uncased-emotion')
+# Intra-op threads per process; 0 splits the CPUs between pool workers
+DEFAULT_THREADS = int(os.environ.get('WELLNESS_TORCH_THREADS', 0))
+DEFAULT_INFERENCE_BATCH_SIZE = int(os.environ.get('WELLNESS_INFERENCE_BATCH_SIZE', 32))
+# Longer messages are truncated to this many tokens
+DEFAULT_MAX_TOKENS = int(os.environ.get('WELLNESS_MAX_TOKENS', 128))
+DEFAULT_QUANTIZE = os.environ.get('WELLNESS_QUANTIZE', '').lower() not in ('', '0', 'false', 'no')
+
+# Valence of the labels used by common sentiment and emotion models; a
+# model's polarity is the probability-weighted sum over its labels
+LABEL_VALENCE = {
+    'positive': 1.0, 'pos': 1.0, 'joy': 1.0, 'love': 1.0, 'optimism': 1.0,
+    'negative': -1.0, 'neg': -1.0, 'sadness': -1.0, 'fear': -1.0, 'anger': -1.0, 'disgust': -1.0,
+    'neutral': 0.0, 'surprise': 0.0,
+}
+NEUTRAL_LABELS = {'neutral'}
+
+# File name of a float model's weights in its resource snapshot
+WEIGHTS_FILE = 'weights.pt'
+
+class TextBlobBackend:
+    """TextBlob polarity and subjectivity, one message at a time"""
+
+    name = 'textblob'
+    # Results from this backend keep the original cache keys
+    version = ''
+
+    def warm_up(self, threads=None):
+        self.score(["warm up"])
+
+    def score(self, texts):
+        from wellness.scoring import analyze_sentiment
+
+        return [analyze_sentiment(text) for text in texts]
+
+class TransformerBackend:
+    """Sentiment from a Hugging Face sequence-classification model on CPU
+
+    Polarity is the probability-weighted valence of the model's labels (see
+    LABEL_VALENCE). Subjectivity is the probability mass off the neutral
+    label; models without one fall back to TextBlob's subjectivity.
+
+    Messages are tokenised once, sorted by token count and batched so each
+    batch is only padded to its own longest message.
+    """
+
+    name = 'transformer'
+
+    def __init__(self, model=DEFAULT_MODEL, threads=DEFAULT_THREADS, batch_size=DEFAULT_INFERENCE_BATCH_SIZE,
+                 max_tokens=DEFAULT_MAX_TOKENS, quantize=DEFAULT_QUANTIZE):
+        self.model = model
+        self.threads = threads
+        self.batch_size = batch_size
+        self.max_tokens = max_tokens
+        self.quantize = quantize
+        self._lock = threading.Lock()
+        self._loaded = None
+
+    @property
+    def version(self):
+        return f"{self.name}:{self.model}:{self.max_tokens}:{'int8' if self.quantize else 'fp32'}"
+
+    def warm_up(self, threads=None):
+        """Load the model, using ``threads`` unless a thread count was configured"""
+        self._load(threads)
+        self.score(["warm up"])
+
+    def _load(self, threads=None):
+        with self._lock:
+            if self._loaded is not None:
+                return self._loaded
+            try:
+                import torch
+                import transformers  # noqa: F401
+            except ImportError as e:
+                raise ImportError("The transformer backend needs the ML extras: "
+                                  "pip install -r requirements-ml.txt") from e
+
+            threads = self.threads or threads
+            if threads:
+                torch.set_num_threads(threads)
+            # Float weights are snapshotted and memory-mapped so every process
+            # shares one copy; quantised ones are repacked per process
+            snapshot = {} if self.quantize else {
+                'version': hashlib.blake2b(f'{self.version}:torch{torch.__version__}'.encode(), digest_size=8).hexdigest(),
+                'save': self._save_weights,
+                'load': self._build,
+                'mapped': self._mapped_bytes,
+            }
+            self._loaded = resources.shared(f'transformer-{self.model.replace("/", "--")}', self._build, **snapshot)
+            return self._loaded
+
+    def _build(self, snapshot=None):
+        import torch
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+        tokenizer = AutoTokenizer.from_pretrained(self.model)
+        model = AutoModelForSequenceClassification.from_pretrained(self.model).eval()
+        if snapshot is not None:
+            # Swap the freshly loaded weights for read-only maps of the snapshot
+            weights = torch.load(os.path.join(snapshot, WEIGHTS_FILE), mmap=True, weights_only=True)
+            model.load_state_dict(weights, assign=True)
+        if self.quantize:
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+        labels = [model.config.id2label[index].lower() for index in range(model.config.num_labels)]
+        if not any(LABEL_VALENCE.get(label) for label in labels):
+            raise ValueError(f"Model {self.model} has no labels with a known valence: {labels}")
+        valence = torch.tensor([LABEL_VALENCE.get(label, 0.0) for label in labels])
+        neutral = [index for index, label in enumerate(labels) if label in NEUTRAL_LABELS]
+        return torch, tokenizer, model, valence, neutral
+
+    @staticmethod
+    def _save_weights(loaded, directory):
+        torch, _, model = loaded[:3]
+        torch.save(model.state_dict(), os.path.join(directory, WEIGHTS_FILE))
+
+    @staticmethod
+    def _mapped_bytes(loaded):
+        # Tied weights share storage, so count each storage once
+        storages = {tensor.untyped_storage().data_ptr(): tensor.untyped_storage().nbytes()
+                    for tensor in loaded[2].state_dict().values()}
+        return sum(storages.values())
+
+    def score(self, texts):
+        torch, tokenizer, model, valence, neutral = self._load()
+        texts = list(texts)
+        if not texts:
+            return []
+
+        input_ids = tokenizer(texts, truncation=True, max_length=self.max_tokens)['input_ids']
+        order = sorted(range(len(texts)), key=lambda index: len(input_ids[index]))
+        polarity = [0.0] * len(texts)
+        subjectivity = [0.0] * len(texts)
+        with torch.inference_mode():
+            for start in range(0, len(order), self.batch_size):
+                rows = order[start:start + self.batch_size]
+                batch = tokenizer.pad({'input_ids': [input_ids[row] for row in rows]}, return_tensors='pt')
+                probabilities = model(**batch).logits.softmax(dim=-1)
+                batch_polarity = (probabilities @ valence).tolist()
+                batch_subjectivity = (1 - probabilities[:, neutral].sum(dim=-1)).tolist()
+                for row, p, s in zip(rows, batch_polarity, batch_subjectivity):
+                    polarity[row] = p
+                    subjectivity[row] = s
+
+        if not neutral:
+            subjectivity = [s for _, s in TextBlobBackend().score(texts)]
+        return list(zip(polarity, subjectivity))
+
+BACKENDS = {
+    'textblob': TextBlobBackend,
+    'transformer': TransformerBackend,
+}
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+def get_backend(name=DEFAULT_BACKEND):
+    """Return the process-wide instance of a backend, creating it if needed"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown sentiment backend {name!r}; choose from {', '.join(BACKENDS)}")
+    with _backends_lock:
+        backend = _backends.get(name)
+        if backend is None:
+            backend = _backends[name] = BACKENDS[name]()
+        return backend
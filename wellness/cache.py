@@ -0,0 +1,108 @@
+"""In-memory LRU cache of scoring results"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_SIZE = int(os.environ.get('WELLNESS_CACHE_SIZE', 10000))
+
+def normalize_text(text):
+    """Collapse runs of whitespace so trivially different copies share an entry"""
+    return ' '.join(text.split())
+
+def cache_key(normalized_text, version):
+    """Content hash of a normalised message under a given scoring version"""
+    payload = f'{version}\0{normalized_text}'.encode('utf-8')
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+class ResultCache:
+    """Thread-safe LRU mapping of cache keys to result tuples
+
+    Streamlit serves each session from its own thread, so every access takes
+    the lock. ``maxsize=0`` disables caching. An optional backing ``store``
+    (see wellness.store) is consulted on misses and written through on puts.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAX_SIZE, store=None):
+        self.maxsize = maxsize
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def attach_store(self, store):
+        """Use ``store`` as the backing store from now on"""
+        self.store = store
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return the cached result for key, or None"""
+        return self.get_many([key])[0]
+
+    def get_many(self, keys):
+        """Return a list with the cached result or None for each key"""
+        results = []
+        with self._lock:
+            for key in keys:
+                result = self._entries.get(key)
+                if result is None:
+                    self.misses += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                results.append(result)
+
+        if self.store is not None:
+            missing = [index for index, result in enumerate(results) if result is None]
+            if missing:
+                stored = self.store.get_many([keys[index] for index in missing])
+                promoted = []
+                for index, result in zip(missing, stored):
+                    if result is not None:
+                        results[index] = result
+                        promoted.append((keys[index], result))
+                self._remember(promoted)
+        return results
+
+    def put(self, key, result):
+        self.put_many([(key, result)])
+
+    def put_many(self, items):
+        items = list(items)
+        self._remember(items)
+        if self.store is not None:
+            self.store.put_many(items)
+
+    def _remember(self, items):
+        if self.maxsize <= 0 or not items:
+            return
+        with self._lock:
+            for key, result in items:
+                self._entries[key] = result
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Return hit/miss counters and current size, plus the store's if any"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+            }
+        if self.store is not None:
+            stats['store'] = self.store.stats()
+        return stats
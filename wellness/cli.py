@@ -0,0 +1,139 @@
+"""Headless batch scoring: ``python -m wellness INPUT -o OUTPUT``
+
+Reads a file or stdin in batches, scores it with the same engine as the
+Streamlit app and streams the results out, printing a throughput summary
+to stderr when done.
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+from wellness import dedup, metrics, segments
+from wellness.export import EXPORT_FORMATS, ResultWriter
+from wellness.ingest import DEFAULT_BATCH_SIZE, SUPPORTED_EXTENSIONS, iter_messages
+from wellness.parallel import DEFAULT_CHUNK_SIZE, DEFAULT_WORKERS
+from wellness.pipeline import score_batches
+from wellness.scoring import RESULT_CACHE, scoring_version
+from wellness.summary import ResultSummary
+
+# Formats that can't be parsed from a pipe without buffering it first
+_RANDOM_ACCESS_FORMATS = ('xlsx', 'xls', 'parquet', 'feather', 'arrow')
+
+def _build_parser():
+    input_formats = [extension.lstrip('.') for extension in SUPPORTED_EXTENSIONS]
+    parser = argparse.ArgumentParser(
+        prog='python -m wellness',
+        description='Score messages for emotion and severity without the Streamlit UI.',
+    )
+    parser.add_argument('input', nargs='?', default='-',
+                        help="CSV, Excel, TXT, Parquet or Feather file, or '-' for stdin (default)")
+    parser.add_argument('-o', '--output', default='-',
+                        help="output file, or '-' for stdout (default)")
+    parser.add_argument('--input-format', choices=input_formats,
+                        help='input format if it can\'t be taken from the file name (stdin defaults to txt)')
+    parser.add_argument('--output-format', choices=list(EXPORT_FORMATS),
+                        help='output format (default: from the output file name, csv for stdout)')
+    parser.add_argument('-w', '--workers', type=int, default=DEFAULT_WORKERS,
+                        help='worker processes for scoring (default: %(default)s)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help='messages sent to a worker at a time (default: %(default)s)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help='messages read and written per batch (default: %(default)s)')
+    parser.add_argument('--dedup', choices=dedup.MODES, default=dedup.DEFAULT_MODE,
+                        help='score duplicate messages once: exact copies, or near-duplicates too (default: %(default)s)')
+    parser.add_argument('--dedup-threshold', type=float, default=dedup.DEFAULT_THRESHOLD,
+                        help='similarity at which --dedup near merges messages (default: %(default)s)')
+    parser.add_argument('--segment', action=argparse.BooleanOptionalAction, default=segments.DEFAULT_SEGMENT,
+                        help='score long messages sentence by sentence, keeping the most severe sentence '
+                             'and adding its spans (default: %(default)s)')
+    parser.add_argument('--store', metavar='PATH',
+                        help='reuse and persist results in this SQLite result store')
+    parser.add_argument('--trends', metavar='PATH',
+                        help='add results with timestamp and user_id columns to this per-user trend file')
+    parser.add_argument('--metrics', metavar='PATH',
+                        help="write per-stage timings and counters in Prometheus text format ('-' for stderr)")
+    parser.add_argument('-q', '--quiet', action='store_true', help="don't print the throughput summary")
+    return parser
+
+def _output_format(args):
+    if args.output_format:
+        return args.output_format
+    extension = os.path.splitext(args.output)[1].lower()
+    for fmt, (_, fmt_extension, _) in EXPORT_FORMATS.items():
+        if extension == fmt_extension:
+            return fmt
+    return 'csv'
+
+def main(argv=None):
+    parser = _build_parser()
+    args = parser.parse_args(argv)
+
+    if args.input == '-':
+        input_format = args.input_format or 'txt'
+        source = sys.stdin.buffer
+        if input_format in _RANDOM_ACCESS_FORMATS:
+            source = io.BytesIO(source.read())
+        name = f'stdin.{input_format}'
+    else:
+        # Fail before the output file is created, not part-way through writing it
+        try:
+            with open(args.input, 'rb'):
+                pass
+        except OSError as e:
+            parser.error(f"can't read {args.input}: {e.strerror}")
+        source = args.input
+        name = f'{args.input}.{args.input_format}' if args.input_format else args.input
+
+    output_format = _output_format(args)
+    if args.output == '-' and output_format != 'csv':
+        parser.error(f'{output_format} output needs a file; use -o PATH')
+    destination = sys.stdout.buffer if args.output == '-' else args.output
+
+    if args.store:
+        from wellness.store import ResultStore
+        RESULT_CACHE.attach_store(ResultStore(args.store, version=scoring_version))
+
+    if args.metrics:
+        metrics.enable()
+
+    trends = None
+    if args.trends:
+        from wellness.trends import TrendTracker
+        trends = TrendTracker.load(args.trends) if os.path.exists(args.trends) else TrendTracker()
+
+    try:
+        batches = iter_messages(source, name, batch_size=args.batch_size)
+    except ValueError as e:
+        parser.error(str(e))
+
+    summary = ResultSummary()
+    started = time.perf_counter()
+    with ResultWriter(destination, output_format) as writer:
+        for results in score_batches(batches, workers=args.workers, chunk_size=args.chunk_size,
+                                     dedup_mode=args.dedup, dedup_threshold=args.dedup_threshold,
+                                     segment=args.segment):
+            writer.write(results)
+            summary.update(results['emotion'], results['severity'])
+            if trends is not None and 'timestamp' in results and 'user_id' in results:
+                trends.update(results)
+    if args.output == '-':
+        sys.stdout.flush()
+    elapsed = time.perf_counter() - started
+    if trends is not None:
+        trends.save(args.trends)
+
+    if not args.quiet:
+        rate = writer.rows / elapsed if elapsed else 0.0
+        print(f"Scored {writer.rows:,} messages in {elapsed:.2f}s "
+              f"({rate:,.0f} messages/s, workers={args.workers})", file=sys.stderr)
+        print('  ' + '  '.join(f'{emotion}: {count:,}' for emotion, count in summary.emotion_counts().items()), file=sys.stderr)
+        if trends is not None:
+            print(f"  Trends: {len(trends.users):,} users in {args.trends}", file=sys.stderr)
+    if args.metrics == '-':
+        sys.stderr.write(metrics.render_prometheus())
+    elif args.metrics:
+        with open(args.metrics, 'w') as f:
+            f.write(metrics.render_prometheus())
+    return 0
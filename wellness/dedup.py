@@ -0,0 +1,158 @@
+"""Collapse duplicate messages before scoring
+
+Exports repeat a lot of text: retries, templated check-ins and pasted
+messages that differ only in spacing or case. collapse() groups a batch so
+each distinct message is scored once and its result is fanned back out to
+every member of its group:
+
+- ``exact`` groups messages that are identical once runs of whitespace are
+  collapsed. They always score identically, so results are unchanged.
+- ``near`` also ignores case and clusters messages whose character-shingle
+  Jaccard similarity reaches ``threshold``, estimated with MinHash and
+  found with LSH banding. Every member takes the result of its cluster's
+  first message, trading a little exactness for much less scoring.
+- ``off`` scores every message as given.
+"""
+import os
+
+from wellness.cache import normalize_text
+
+MODES = ('off', 'exact', 'near')
+DEFAULT_MODE = os.environ.get('WELLNESS_DEDUP', 'exact')
+# Estimated Jaccard similarity at which near-duplicates are merged
+DEFAULT_THRESHOLD = float(os.environ.get('WELLNESS_DEDUP_THRESHOLD', 0.9))
+
+SHINGLE_SIZE = 5     # bytes per shingle
+NUM_PERM = 64        # MinHash functions per signature
+_CHUNK_SHINGLES = 1 << 16
+_SEED = 0x5EED
+
+def _mix(values):
+    # splitmix64 finaliser, so similar shingles get unrelated hashes
+    import numpy as np
+
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xBF58476D1CE4E5B9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+def minhash_signatures(texts, num_perm=NUM_PERM, shingle_size=SHINGLE_SIZE):
+    """Return a (texts x num_perm) uint32 MinHash matrix over byte shingles of texts"""
+    import numpy as np
+
+    # One buffer for every text, each followed by enough NULs that no
+    # shingle starting inside a text reads the next one
+    encoded = [text.encode('utf-8') for text in texts]
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+    padding = b'\0' * (shingle_size - 1)
+    buffer = np.frombuffer(padding.join(encoded) + padding, dtype=np.uint8).astype(np.uint64)
+    starts = np.concatenate([[0], np.cumsum(lengths + shingle_size - 1)[:-1]]).astype(np.int64)
+
+    # Polynomial hash of every shingle_size-byte window, then mixed
+    windows = len(buffer) - shingle_size + 1
+    hashes = np.zeros(windows, dtype=np.uint64)
+    for offset in range(shingle_size):
+        hashes = hashes * np.uint64(257) + buffer[offset:offset + windows]
+    hashes = _mix(hashes)
+
+    # Shingles of text i start at starts[i] .. starts[i] + max(len - size, 0)
+    counts = np.maximum(lengths - shingle_size + 1, 1)
+    positions = np.repeat(starts, counts) + (np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts))
+    hashes = hashes[positions]
+
+    # Multiply-shift hash family: h_i(x) = (a_i * x + b_i) >> 32
+    rng = np.random.default_rng(_SEED)
+    a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint32)
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    first = 0
+    while first < len(texts):
+        # Whole texts per chunk, about _CHUNK_SHINGLES shingles at a time
+        last = max(first + 1, int(np.searchsorted(offsets, offsets[first] + _CHUNK_SHINGLES, side='right')) - 1)
+        last = min(last, len(texts))
+        chunk = hashes[offsets[first]:offsets[last]]
+        # (num_perm x shingles), so each min runs over contiguous memory
+        permuted = ((a[:, None] * chunk + b[:, None]) >> np.uint64(32)).astype(np.uint32)
+        signatures[first:last] = np.minimum.reduceat(permuted, offsets[first:last] - offsets[first], axis=1).T
+        first = last
+    return signatures
+
+def _band_rows(threshold, num_perm):
+    # Rows per LSH band whose S-curve midpoint (1/bands)^(1/rows) sits just
+    # below the threshold, so candidates err towards recall; they're verified
+    candidates = [rows for rows in range(1, num_perm + 1) if num_perm % rows == 0]
+    target = max(threshold - 0.1, 0.05)
+    return min(candidates, key=lambda rows: abs((rows / num_perm) ** (1 / rows) - target))
+
+def near_duplicate_labels(texts, threshold=DEFAULT_THRESHOLD, num_perm=NUM_PERM):
+    """Return, for each text, the index of the first text in its near-duplicate cluster
+
+    Clusters are connected components of pairs whose estimated Jaccard
+    similarity is at least ``threshold``.
+    """
+    import numpy as np
+
+    count = len(texts)
+    labels = np.arange(count)
+    if count < 2:
+        return labels
+    signatures = minhash_signatures(texts, num_perm)
+
+    # Each LSH band buckets texts by their slice of the signature; every
+    # bucket member becomes a candidate pair with the bucket's first text
+    rows = _band_rows(threshold, num_perm)
+    multipliers = np.random.default_rng(_SEED + 1).integers(1, 2 ** 63, size=rows, dtype=np.uint64) | np.uint64(1)
+    pairs = []
+    for start in range(0, num_perm, rows):
+        keys = _mix(signatures[:, start:start + rows].astype(np.uint64) @ multipliers)
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        new_bucket = np.concatenate([[True], sorted_keys[1:] != sorted_keys[:-1]])
+        heads = order[np.flatnonzero(new_bucket)][np.cumsum(new_bucket) - 1]
+        members = ~new_bucket
+        pairs.append(np.stack([order[members], heads[members]], axis=1))
+    pairs = np.unique(np.concatenate(pairs), axis=0) if pairs else np.empty((0, 2), dtype=np.int64)
+    if not len(pairs):
+        return labels
+
+    similarity = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+    left, right = pairs[similarity >= threshold].T
+
+    # Connected components by min-label propagation with pointer jumping
+    while True:
+        updated = labels.copy()
+        np.minimum.at(updated, left, labels[right])
+        np.minimum.at(updated, right, labels[left])
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+def collapse(texts, mode=DEFAULT_MODE, threshold=DEFAULT_THRESHOLD):
+    """Group a batch of messages for scoring
+
+    Returns ``(groups, representatives)``: ``groups[i]`` is the group of
+    message i, and ``representatives[g]`` the position of the message scored
+    for group g (its first member), so results fan back out with
+    ``scores.take(groups)``.
+    """
+    import numpy as np
+    import pandas as pd
+
+    if mode not in MODES:
+        raise ValueError(f"Unknown dedup mode {mode!r}; choose from {', '.join(MODES)}")
+    if mode == 'off':
+        positions = np.arange(len(texts))
+        return positions, positions
+
+    keys = [normalize_text(text) for text in texts]
+    if mode == 'near':
+        keys = [key.casefold() for key in keys]
+    groups, uniques = pd.factorize(pd.Series(keys, dtype=object))
+    if mode == 'near' and len(uniques) > 1:
+        groups, _ = pd.factorize(near_duplicate_labels(list(uniques), threshold)[groups])
+    # Groups are numbered in order of first appearance
+    _, representatives = np.unique(groups, return_index=True)
+    return groups, representatives
@@ -0,0 +1,92 @@
+"""Serialise scored results to CSV, Parquet or Feather
+
+Emotion and severity labels are stored as categoricals, which Parquet and
+Feather write as dictionary-encoded columns.
+"""
+import io
+
+from wellness.scoring import EMOTIONS, SEVERITIES
+
+# Format name -> (display label, file extension, MIME type)
+EXPORT_FORMATS = {
+    'csv': ('CSV', '.csv', 'text/csv'),
+    'parquet': ('Parquet', '.parquet', 'application/vnd.apache.parquet'),
+    'feather': ('Feather', '.feather', 'application/vnd.apache.arrow.file'),
+}
+
+# Fixed category sets keep the dictionaries identical across streamed batches
+CATEGORIES = {'emotion': EMOTIONS, 'severity': SEVERITIES}
+
+def with_categoricals(df):
+    """Return df with its emotion and severity columns as categoricals"""
+    import pandas as pd
+
+    columns = {}
+    for column in df.columns:
+        categories = CATEGORIES.get(str(column).lower())
+        if categories is not None:
+            columns[column] = pd.Categorical(df[column], categories=categories)
+    return df.assign(**columns) if columns else df
+
+def write_results(df, destination, fmt='csv'):
+    """Write results to a path or binary file object in the given format"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    df = with_categoricals(df).reset_index(drop=True)
+    if fmt == 'csv':
+        df.to_csv(destination, index=False)
+    elif fmt == 'parquet':
+        df.to_parquet(destination, index=False)
+    else:
+        df.to_feather(destination)
+
+def export_bytes(df, fmt='csv'):
+    """Return the serialised results, e.g. for a download button"""
+    buffer = io.BytesIO()
+    write_results(df, buffer, fmt)
+    return buffer.getvalue()
+
+class ResultWriter:
+    """Write result batches incrementally to a path or binary file object
+
+    CSV output is appended batch by batch, Parquet gets one row group per
+    batch and Feather one record batch per batch, so the full result set
+    never has to be held in memory.
+    """
+
+    def __init__(self, destination, fmt='csv'):
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {fmt}")
+        self.destination = destination
+        self.fmt = fmt
+        self.rows = 0
+        self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, df):
+        df = with_categoricals(df).reset_index(drop=True)
+        if self.fmt == 'csv':
+            df.to_csv(self.destination, index=False, header=self.rows == 0,
+                      mode='w' if self.rows == 0 else 'a')
+        else:
+            import pyarrow as pa
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                if self.fmt == 'parquet':
+                    import pyarrow.parquet as pq
+                    self._writer = pq.ParquetWriter(self.destination, table.schema)
+                else:
+                    self._writer = pa.ipc.new_file(self.destination, table.schema)
+            self._writer.write_table(table)
+        self.rows += len(df)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
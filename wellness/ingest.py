@@ -0,0 +1,230 @@
+"""Streaming readers that yield uploaded messages in batches
+
+Each reader pulls only the text column, plus the timestamp and user_id
+columns when the file has them (see CONTEXT_COLUMNS), and hands back one
+DataFrame per batch with a ``message`` column, so memory stays proportional
+to the batch size rather than the file size.
+"""
+import io
+import os
+
+from wellness import metrics
+
+DEFAULT_BATCH_SIZE = int(os.environ.get('WELLNESS_BATCH_SIZE', 20000))
+
+SUPPORTED_EXTENSIONS = ('.csv', '.xlsx', '.xls', '.txt', '.parquet', '.feather', '.arrow')
+
+# Columns carried through scoring alongside the text when a file has them,
+# by output name, with the header names accepted for each
+CONTEXT_COLUMNS = {
+    'timestamp': ('timestamp', 'time', 'date', 'datetime', 'created_at'),
+    'user_id': ('user_id', 'userid', 'user'),
+}
+
+def find_text_column(columns):
+    """Return the first column that looks like message text, else the first column"""
+    for column in columns:
+        name = str(column).lower()
+        if 'text' in name or 'message' in name or 'content' in name:
+            return column
+    return columns[0]
+
+def find_context_columns(columns, text_column=None):
+    """Return {output name: column} for the CONTEXT_COLUMNS present in columns"""
+    found = {}
+    for column in columns:
+        name = str(column).strip().lower()
+        for output, aliases in CONTEXT_COLUMNS.items():
+            if output not in found and name in aliases and column != text_column:
+                found[output] = column
+    return found
+
+def _as_text(values):
+    # Identifiers and timestamps stay text so every batch has the same schema
+    import pandas as pd
+
+    values = pd.Series(values, dtype=object)
+    return values.where(values.isna(), values.astype(str)).astype('string')
+
+def _batch_frame(messages, context=None):
+    """Return a batch as a DataFrame of non-null messages plus context columns"""
+    import pandas as pd
+
+    frame = pd.DataFrame({'message': pd.Series(messages, dtype=object).reset_index(drop=True)})
+    for name, values in (context or {}).items():
+        frame[name] = _as_text(values).reset_index(drop=True)
+    return frame[frame['message'].notna()].reset_index(drop=True)
+
+def _rewind(source):
+    if hasattr(source, 'seek'):
+        source.seek(0)
+
+def iter_csv(source, batch_size=DEFAULT_BATCH_SIZE):
+    """Yield batches from the text and context columns of a CSV file"""
+    import pandas as pd
+
+    if hasattr(source, 'seekable') and not source.seekable():
+        # Pipes can't be rewound after peeking at the header, so parse every
+        # column and pick the text column from the first chunk
+        chunks = pd.read_csv(source, chunksize=batch_size, dtype=str)
+        column = None
+    else:
+        columns = list(pd.read_csv(source, nrows=0).columns)
+        _rewind(source)
+        column = find_text_column(columns)
+        context = find_context_columns(columns, column)
+        chunks = pd.read_csv(source, usecols=[column, *context.values()], chunksize=batch_size,
+                             dtype={name: str for name in context.values()})
+    for chunk in chunks:
+        if column is None:
+            column = find_text_column(list(chunk.columns))
+            context = find_context_columns(list(chunk.columns), column)
+        batch = _batch_frame(chunk[column], {name: chunk[name_in_file] for name, name_in_file in context.items()})
+        if len(batch):
+            yield batch
+
+def iter_xlsx(source, batch_size=DEFAULT_BATCH_SIZE):
+    """Yield batches from the first sheet of an .xlsx workbook"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = list(header)
+        text_column = find_text_column(header)
+        indexes = {'message': header.index(text_column)}
+        for name, column in find_context_columns(header, text_column).items():
+            indexes[name] = header.index(column)
+        batch = {name: [] for name in indexes}
+        for row in rows:
+            if indexes['message'] >= len(row) or row[indexes['message']] is None:
+                continue
+            for name, index in indexes.items():
+                batch[name].append(row[index] if index < len(row) else None)
+            if len(batch['message']) >= batch_size:
+                yield _batch_frame(batch.pop('message'), batch)
+                batch = {name: [] for name in indexes}
+        if batch['message']:
+            yield _batch_frame(batch.pop('message'), batch)
+    finally:
+        workbook.close()
+
+def iter_xls(source, batch_size=DEFAULT_BATCH_SIZE):
+    """Yield batches from a legacy .xls workbook
+
+    The xls format can't be read row by row, so the sheet is loaded whole and
+    only the batching is streamed.
+    """
+    import pandas as pd
+
+    df = pd.read_excel(source)
+    column = find_text_column(list(df.columns))
+    context = find_context_columns(list(df.columns), column)
+    df = df[df[column].notna()]
+    for start in range(0, len(df), batch_size):
+        rows = df.iloc[start:start + batch_size]
+        yield _batch_frame(rows[column], {name: rows[name_in_file] for name, name_in_file in context.items()})
+
+def iter_txt(source, batch_size=DEFAULT_BATCH_SIZE):
+    """Yield batches of non-empty lines from a UTF-8 text file"""
+    if isinstance(source, (str, os.PathLike)):
+        stream = open(source, encoding='utf-8')
+    else:
+        stream = io.TextIOWrapper(source, encoding='utf-8')
+    try:
+        batch = []
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            batch.append(line)
+            if len(batch) >= batch_size:
+                yield _batch_frame(batch)
+                batch = []
+        if batch:
+            yield _batch_frame(batch)
+    finally:
+        if isinstance(stream, io.TextIOWrapper) and stream.buffer is source:
+            # Don't close the caller's file object along with the wrapper
+            stream.detach()
+        else:
+            stream.close()
+
+def iter_parquet(source, batch_size=DEFAULT_BATCH_SIZE):
+    """Yield batches from a Parquet file, reading only the text and context columns"""
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(source)
+    names = parquet_file.schema_arrow.names
+    column = find_text_column(names)
+    context = find_context_columns(names, column)
+    for record_batch in parquet_file.iter_batches(batch_size=batch_size, columns=[column, *context.values()]):
+        batch = _batch_frame(record_batch.column(column).to_pylist(),
+                             {name: record_batch.column(name_in_file).to_pylist()
+                              for name, name_in_file in context.items()})
+        if len(batch):
+            yield batch
+
+def iter_arrow(source, batch_size=DEFAULT_BATCH_SIZE):
+    """Yield batches from an Arrow IPC / Feather v2 file
+
+    Record batches are read one at a time and only the text and context
+    columns are converted to Python objects.
+    """
+    import pyarrow as pa
+
+    if isinstance(source, (str, os.PathLike)):
+        source = pa.memory_map(str(source))
+    reader = pa.ipc.open_file(source)
+    names = reader.schema.names
+    column = find_text_column(names)
+    context = find_context_columns(names, column)
+    for batch_index in range(reader.num_record_batches):
+        record_batch = reader.get_batch(batch_index)
+        for start in range(0, record_batch.num_rows, batch_size):
+            rows = record_batch.slice(start, batch_size)
+            batch = _batch_frame(rows.column(column).to_pylist(),
+                                 {name: rows.column(name_in_file).to_pylist()
+                                  for name, name_in_file in context.items()})
+            if len(batch):
+                yield batch
+
+READERS = {
+    '.csv': iter_csv,
+    '.xlsx': iter_xlsx,
+    '.xls': iter_xls,
+    '.txt': iter_txt,
+    '.parquet': iter_parquet,
+    '.feather': iter_arrow,
+    '.arrow': iter_arrow,
+}
+
+def iter_messages(source, name=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Yield batches of messages from a path or binary file object
+
+    The format is picked from the extension of ``name`` (or of ``source`` if
+    it is a path). Raises ValueError for unsupported formats.
+    """
+    name = name or getattr(source, 'name', None) or str(source)
+    extension = os.path.splitext(name)[1].lower()
+    reader = READERS.get(extension)
+    if reader is None:
+        raise ValueError("Unsupported file format. Please upload CSV, Excel, TXT, Parquet or Feather files.")
+    batches = reader(source, batch_size=batch_size)
+    return _instrumented(batches, source) if metrics.enabled() else batches
+
+def _instrumented(batches, source):
+    # Time each batch read and count the input size once the file is consumed
+    while True:
+        with metrics.timer('parse'):
+            batch = next(batches, None)
+        if batch is None:
+            break
+        yield batch
+    if isinstance(source, (str, os.PathLike)):
+        metrics.inc('bytes_parsed_total', os.path.getsize(source))
+    elif hasattr(source, 'getbuffer'):
+        metrics.inc('bytes_parsed_total', source.getbuffer().nbytes)
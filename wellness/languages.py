@@ -0,0 +1,185 @@
+"""Language routing for batches of messages
+
+detect_languages() labels every message of a batch with one of
+ENABLED_LANGUAGES, so scoring can send it to that language's keyword
+matcher and sentiment lexicon (see wellness.lexicons):
+
+- Hindi and Telugu have scripts of their own, so a message whose letters
+  are mostly Devanagari is Hindi and mostly Telugu script is Telugu.
+- Latin-script messages are told apart by a character-trigram naive Bayes
+  model. It is trained when first used, from the short samples below, and
+  a message counts as Spanish only when it has a common Spanish word or
+  letter (see _spanish_hint) and its trigrams favour Spanish by
+  SPANISH_MARGIN on average. Anything short or unclear stays English, which keeps English
+  results as they were.
+
+The whole batch is lower-cased, encoded into one UTF-8 buffer and scored
+with a handful of NumPy passes over its bytes, so detection costs a few
+microseconds per message. detect_language() answers ASCII messages without
+a Spanish word straight away, so scoring one English message at a
+time pays next to nothing for routing either.
+"""
+import hashlib
+import os
+
+from wellness import resources
+
+LANGUAGES = ('en', 'es', 'hi', 'te')
+DEFAULT_LANGUAGE = 'en'
+# Languages messages may be routed to; 'en' alone turns detection off
+ENABLED_LANGUAGES = tuple(
+    language for language in os.environ.get('WELLNESS_LANGUAGES', ','.join(LANGUAGES)).split(',')
+    if language in LANGUAGES
+) or (DEFAULT_LANGUAGE,)
+
+# Mean log-likelihood ratio per trigram needed to call a message Spanish
+SPANISH_MARGIN = 0.25
+# Messages with fewer letter trigrams than this stay English
+MIN_TRIGRAMS = 8
+
+# Common Spanish words that are rare in English, and Spanish letters and
+# marks; only messages with one of them can be Spanish
+_SPANISH_WORDS = frozenset('''
+    que el la los las del de en y muy estoy está esta es por con una pero para mis yo soy tengo
+    siento todo nada hoy hola gracias bien siempre nunca porque también
+'''.split())
+_SPANISH_MARKS = 'ñáéíóú¿¡'
+
+_BUCKET_BITS = 14
+_SMOOTHING = 0.5
+
+# Training samples for the Latin-script model: everyday and emotional
+# messages, like the ones being scored
+_SAMPLES = {
+    'en': """
+        I feel really stressed about my exams and the deadlines at work. The pressure is overwhelming
+        and I can't sleep. I'm so tired of everything and I feel lonely most of the time. Nothing seems
+        to matter anymore and I don't know what to do. Today was a good day, I went for a walk with my
+        friends and we had lunch together. I'm grateful for my family and the people who love me. My
+        boss keeps adding more tasks and I'm worried that I will not be able to finish them. I had a
+        wonderful weekend with my sister, we watched a movie and cooked dinner. The meeting ran a bit
+        long but it was fine. I am anxious about the interview tomorrow and my heart is racing. I think
+        I need a break from all of this. Everything is going great and I feel blessed. Why does this
+        always happen to me? I hate myself for what I said. She said that they would come back in the
+        evening. We should talk about it when you have time. It has been a long week and I just want
+        to rest. Thank you for listening to me, it really helps. I could not stop crying last night.
+        There is no point in trying anymore. I'm excited about the new job and happy with my progress.
+        What are you doing this weekend? I have been feeling empty and sad since he left.
+    """,
+    'es': """
+        Me siento muy estresado por los exámenes y las fechas de entrega en el trabajo. La presión es
+        demasiada y no puedo dormir. Estoy cansada de todo y me siento sola la mayor parte del tiempo.
+        Nada tiene sentido y no sé qué hacer. Hoy fue un buen día, salí a caminar con mis amigos y
+        comimos juntos. Estoy agradecido por mi familia y por las personas que me quieren. Mi jefe me
+        da cada vez más tareas y me preocupa no poder terminarlas. Tuve un fin de semana maravilloso
+        con mi hermana, vimos una película y cocinamos la cena. La reunión se alargó un poco pero
+        estuvo bien. Estoy ansioso por la entrevista de mañana y el corazón me late muy rápido. Creo
+        que necesito un descanso de todo esto. Todo va genial y me siento bendecida. ¿Por qué siempre
+        me pasa esto a mí? Me odio por lo que dije. Ella dijo que volverían por la tarde. Deberíamos
+        hablar de eso cuando tengas tiempo. Ha sido una semana larga y solo quiero descansar. Gracias
+        por escucharme, de verdad me ayuda. Anoche no podía dejar de llorar. Ya no tiene sentido
+        seguir intentándolo. Estoy emocionada con el nuevo trabajo y feliz con mi progreso. ¿Qué vas a
+        hacer este fin de semana? Me siento vacío y triste desde que se fue. Estoy deprimido y no
+        tengo ganas de nada. Tengo mucha ansiedad y estoy agobiada con la universidad.
+    """,
+}
+
+def _detector_version():
+    samples = '\0'.join(f'{language}\0{text}' for language, text in sorted(_SAMPLES.items()))
+    settings = f'{_BUCKET_BITS}:{_SMOOTHING}:{SPANISH_MARGIN}:{MIN_TRIGRAMS}:{sorted(_SPANISH_WORDS)}:{_SPANISH_MARKS}'
+    return hashlib.blake2b((settings + samples).encode('utf-8'), digest_size=8).hexdigest()
+
+# Changes whenever routing could, so cached results are keyed by it
+DETECTOR_VERSION = _detector_version()
+
+def _spanish_hint(text_lower):
+    if not _SPANISH_WORDS.isdisjoint(text_lower.split()):
+        return True
+    return not text_lower.isascii() and any(mark in text_lower for mark in _SPANISH_MARKS)
+
+def _encode(texts_lower):
+    # One buffer of every text padded with spaces, and each text's offset
+    import numpy as np
+
+    encoded = [f' {text} '.encode('utf-8') for text in texts_lower]
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64)
+    buffer = np.frombuffer(b''.join(encoded) + b'\0\0', dtype=np.uint8)
+    return buffer, starts, lengths
+
+def _buckets(buffer):
+    # Multiplicative hash of the trigram starting at every byte
+    import numpy as np
+
+    trigrams = (buffer[:-2].astype(np.uint32) << 16) | (buffer[1:-1].astype(np.uint32) << 8) | buffer[2:]
+    return (trigrams * np.uint32(0x9E3779B1)) >> np.uint32(32 - _BUCKET_BITS)
+
+def _per_text(values, starts, counts):
+    # Sum of values[start:start + count] for every text
+    import numpy as np
+
+    totals = np.concatenate([[0], np.cumsum(values, dtype=np.float64)])
+    return totals[starts + counts] - totals[starts]
+
+def _train():
+    # Spanish-over-English log-likelihood ratio of each trigram bucket
+    import numpy as np
+
+    ratios = np.zeros(1 << _BUCKET_BITS)
+    for language, sign in (('es', 1.0), ('en', -1.0)):
+        text = ' '.join(_SAMPLES[language].split()).lower()
+        buffer, _, _ = _encode([text])
+        counts = np.bincount(_buckets(buffer)[:len(buffer) - 4], minlength=1 << _BUCKET_BITS)
+        ratios += sign * np.log((counts + _SMOOTHING) / (counts.sum() + _SMOOTHING * len(counts)))
+    return ratios.astype(np.float32)
+
+def detect_languages(texts_lower):
+    """Return an array with the language code of each lower-cased message"""
+    import numpy as np
+
+    texts_lower = list(texts_lower)
+    languages = np.full(len(texts_lower), DEFAULT_LANGUAGE, dtype=object)
+    if len(ENABLED_LANGUAGES) == 1:
+        return languages
+    # ASCII messages without a Spanish word can only be English
+    routed = np.array([index for index, text in enumerate(texts_lower)
+                       if not text.isascii() or _spanish_hint(text)], dtype=np.int64)
+    if not len(routed):
+        return languages
+
+    buffer, starts, lengths = _encode(texts_lower[index] for index in routed)
+    # Devanagari is U+0900-097F (E0 A4/A5 xx in UTF-8), Telugu U+0C00-0C7F
+    # (E0 B0/B1 xx); Latin letters are a-z plus the accented Latin-1 ones
+    lead = buffer[:-2] == 0xE0
+    second = buffer[1:-1]
+    devanagari = _per_text(lead & ((second == 0xA4) | (second == 0xA5)), starts, lengths)
+    telugu = _per_text(lead & ((second == 0xB0) | (second == 0xB1)), starts, lengths)
+    letters = buffer[:-2]
+    latin = _per_text(((letters >= 0x61) & (letters <= 0x7A)) | (letters == 0xC3), starts, lengths)
+
+    if 'hi' in ENABLED_LANGUAGES:
+        languages[routed[(devanagari > latin) & (devanagari >= telugu)]] = 'hi'
+    if 'te' in ENABLED_LANGUAGES:
+        languages[routed[(telugu > latin) & (telugu > devanagari)]] = 'te'
+    if 'es' in ENABLED_LANGUAGES:
+        ratios = resources.shared('language-model', _train)
+        trigrams = np.maximum(lengths - 2, 0)
+        score = _per_text(ratios[_buckets(buffer)], starts, trigrams) / np.maximum(trigrams, 1)
+        candidates = routed[(latin >= devanagari) & (latin >= telugu)
+                            & (trigrams >= MIN_TRIGRAMS) & (score > SPANISH_MARGIN)]
+        languages[[index for index in candidates if _spanish_hint(texts_lower[index])]] = 'es'
+    return languages
+
+def detect_language(text):
+    """Language code of one message, as detect_languages() would give it"""
+    text_lower = text.lower()
+    if len(ENABLED_LANGUAGES) == 1 or (text_lower.isascii() and not _spanish_hint(text_lower)):
+        return DEFAULT_LANGUAGE
+    return detect_languages([text_lower])[0]
+
+def language_groups(languages):
+    """Return [(language, positions)] for the distinct languages of a batch, in LANGUAGES order"""
+    import numpy as np
+
+    return [(language, np.flatnonzero(languages == language))
+            for language in LANGUAGES if (languages == language).any()]
@@ -0,0 +1,197 @@
+"""Built-in keyword lists, and sentiment lexicons for languages other than English
+
+- ``KEYWORDS``: depression, stress and positive keywords per language. They
+  are matched as substrings of the lower-cased, NFC-normalised text, so
+  stems ("deprimid", "సంతోష") cover inflections. A rules file can replace
+  any of the lists (see wellness.rules).
+- ``SENTIMENT``: for languages other than English, which are scored with
+  TextBlob's pattern lexicon, a word lexicon of stem -> (polarity, subjectivity) on
+  TextBlob's scales, plus negations and intensifiers, scored by
+  WordLexiconSentiment.
+
+Polarity and subjectivity only have to land on the right side of the
+decision ladder's thresholds, so the values are coarse on purpose.
+"""
+import re
+import unicodedata
+
+LANGUAGE_NAMES = {'en': 'English', 'es': 'Spanish', 'hi': 'Hindi', 'te': 'Telugu'}
+
+KEYWORDS = {
+    'en': {
+        'depression': ['depressed', 'sad', 'lonely', 'hopeless', 'worthless', 'empty', 'tired', 'suicide', 'die',
+                       'harm', 'hate myself', 'give up', 'no point'],
+        'stress': ['stress', 'pressure', 'overwhelm', 'anxious', 'anxiety', 'worried', 'tense', 'panic', 'burden',
+                   'exhausted'],
+        'positive': ['happy', 'joy', 'excited', 'grateful', 'blessed', 'love', 'great', 'wonderful', 'amazing',
+                     'fantastic', 'good'],
+    },
+    'es': {
+        'depression': ['deprimid', 'depresión', 'triste', 'me siento sol', 'soledad', 'sin esperanza',
+                       'desesperanza', 'inútil', 'no valgo nada', 'vacío', 'vacía', 'cansad', 'suicid',
+                       'morir', 'hacerme daño', 'me odio', 'rendirme', 'me rindo', 'no tiene sentido',
+                       'sin sentido', 'infeliz', 'desesperad', 'no quiero vivir', 'ganas de vivir',
+                       'no puedo más', 'llorar'],
+        'stress': ['estrés', 'estresad', 'presión', 'agobi', 'abrumad', 'ansios', 'ansiedad', 'preocupad',
+                   'tenso', 'tensa', 'pánico', 'una carga', 'agotad', 'nervios', 'no estoy bien',
+                   'no me siento bien'],
+        # No 'bien': it is as often negated ("no estoy bien") as not
+        'positive': ['feliz', 'alegr', 'emocionad', 'agradecid', 'bendecid', 'amor', 'genial', 'maravillos',
+                     'increíble', 'fantástic', 'contento', 'contenta'],
+    },
+    'hi': {
+        'depression': ['उदास', 'दुख', 'दुःख', 'अकेला', 'अकेली', 'अकेलापन', 'निराश', 'हताश', 'नाउम्मीद',
+                       'उम्मीद नहीं', 'बेकार', 'खालीपन', 'थक गया', 'थक गई', 'थका हुआ', 'आत्महत्या', 'मरना',
+                       'मर जा', 'मरने', 'जीना नहीं', 'जीने का मन नहीं', 'खुद को नुकसान', 'खुद से नफरत',
+                       'हार मान', 'कोई मतलब नहीं', 'रोना आ', 'डिप्रेशन', 'अवसाद'],
+        'stress': ['तनाव', 'दबाव', 'चिंता', 'परेशान', 'घबरा', 'बेचैन', 'डर लग', 'बोझ', 'थकान', 'टेंशन',
+                   'स्ट्रेस', 'अच्छा नहीं', 'अच्छी नहीं'],
+        # No 'अच्छा': it is as often negated ("अच्छा नहीं लग रहा") as not
+        'positive': ['खुश', 'आनंद', 'उत्साहित', 'आभारी', 'धन्य', 'प्यार', 'शानदार', 'अद्भुत', 'बढ़िया'],
+    },
+    'te': {
+        'depression': ['బాధ', 'దుఃఖ', 'విచారం', 'దిగులు', 'ఒంటరి', 'నిరాశ', 'ఆశ లేదు', 'పనికిరాని', 'శూన్యం',
+                       'అలసి', 'ఆత్మహత్య', 'చనిపో', 'చావాల', 'బ్రతకాలని లేదు', 'బతకాలని లేదు',
+                       'నన్ను నేను ద్వేషి', 'వదిలేయాల', 'అర్థం లేదు', 'ఏడుపు', 'డిప్రెషన్'],
+        'stress': ['ఒత్తిడి', 'ఆందోళన', 'భయం', 'భయంగా', 'టెన్షన్', 'చింత', 'కంగారు', 'భారం', 'అలసట'],
+        'positive': ['సంతోష', 'ఆనంద', 'ఉత్సాహ', 'కృతజ్ఞ', 'ప్రేమ', 'అద్భుత', 'బాగుంది', 'గొప్ప'],
+    },
+}
+
+# ``negation_follows``: negations come after the word they negate (Hindi
+# and Telugu are verb-final: "खुश नहीं", "సంతోషంగా లేను")
+SENTIMENT = {
+    'es': {
+        'words': {
+            'feliz': (0.8, 1.0), 'felices': (0.8, 1.0), 'alegr': (0.7, 0.9), 'content': (0.6, 0.8),
+            'genial': (0.8, 0.9), 'maravillos': (0.9, 1.0), 'increíble': (0.8, 0.9), 'fantástic': (0.8, 0.9),
+            'bien': (0.5, 0.6), 'buen': (0.6, 0.6), 'mejor': (0.5, 0.5), 'tranquil': (0.4, 0.6),
+            'agradecid': (0.6, 0.8), 'amor': (0.6, 0.8), 'encant': (0.7, 0.9), 'emocionad': (0.6, 0.9),
+            'triste': (-0.6, 1.0), 'tristeza': (-0.6, 1.0), 'mal': (-0.6, 0.7), 'peor': (-0.7, 0.7),
+            'horrible': (-0.9, 1.0), 'terrible': (-0.9, 1.0), 'fatal': (-0.8, 0.9), 'deprimid': (-0.7, 1.0),
+            'solo': (-0.1, 0.4), 'sola': (-0.1, 0.4), 'vacío': (-0.4, 0.7), 'vacía': (-0.4, 0.7),
+            'cansad': (-0.3, 0.7), 'agotad': (-0.4, 0.7), 'estresad': (-0.4, 0.8), 'ansios': (-0.4, 0.8),
+            'preocupad': (-0.3, 0.8), 'miedo': (-0.5, 0.8), 'odio': (-0.8, 0.9), 'inútil': (-0.6, 0.8),
+            'infeliz': (-0.7, 1.0), 'desesperad': (-0.7, 1.0), 'difícil': (-0.3, 0.6), 'llor': (-0.5, 0.8), 'dolor': (-0.5, 0.8), 'asustad': (-0.5, 0.8),
+        },
+        'negations': ['no', 'nunca', 'jamás', 'tampoco', 'ni'],
+        'intensifiers': {'muy': 1.3, 'tan': 1.3, 'demasiado': 1.5, 'súper': 1.5, 'bastante': 1.2,
+                         'realmente': 1.3},
+        'negation_follows': False,
+    },
+    'hi': {
+        'words': {
+            'खुश': (0.8, 1.0), 'आनंद': (0.8, 1.0), 'अच्छा': (0.6, 0.6), 'अच्छी': (0.6, 0.6), 'अच्छे': (0.6, 0.6),
+            'बढ़िया': (0.7, 0.8), 'शानदार': (0.8, 0.9), 'अद्भुत': (0.8, 0.9), 'प्यार': (0.6, 0.8),
+            'आभारी': (0.6, 0.8), 'शांत': (0.4, 0.6), 'उत्साहित': (0.6, 0.9), 'मज़ा': (0.6, 0.8), 'मजा': (0.6, 0.8),
+            'उदास': (-0.6, 1.0), 'दुखी': (-0.6, 1.0), 'दुख': (-0.6, 0.9), 'बुरा': (-0.6, 0.7), 'बुरी': (-0.6, 0.7),
+            'खराब': (-0.6, 0.7), 'भयानक': (-0.9, 1.0), 'निराश': (-0.7, 1.0), 'अकेला': (-0.4, 0.8),
+            'अकेली': (-0.4, 0.8), 'हताश': (-0.7, 1.0), 'थका': (-0.3, 0.7), 'थकी': (-0.3, 0.7), 'परेशान': (-0.4, 0.8),
+            'चिंतित': (-0.4, 0.8), 'डर': (-0.5, 0.8), 'नफरत': (-0.8, 0.9), 'बेकार': (-0.6, 0.8),
+            'मुश्किल': (-0.3, 0.6), 'रोना': (-0.5, 0.8), 'रो': (-0.4, 0.7), 'दर्द': (-0.5, 0.8),
+        },
+        'negations': ['नहीं', 'न', 'ना', 'मत'],
+        'intensifiers': {'बहुत': 1.3, 'बेहद': 1.5, 'काफी': 1.2, 'बिल्कुल': 1.3, 'ज़्यादा': 1.3, 'ज्यादा': 1.3},
+        'negation_follows': True,
+    },
+    'te': {
+        'words': {
+            'సంతోష': (0.8, 1.0), 'ఆనంద': (0.8, 1.0), 'బాగుంది': (0.6, 0.6), 'మంచి': (0.6, 0.6),
+            'అద్భుత': (0.8, 0.9), 'గొప్ప': (0.7, 0.8), 'ప్రేమ': (0.6, 0.8), 'ఉత్సాహ': (0.6, 0.9),
+            'ప్రశాంత': (0.4, 0.6), 'కృతజ్ఞ': (0.6, 0.8),
+            'బాధ': (-0.6, 1.0), 'దిగులు': (-0.6, 1.0), 'దుఃఖ': (-0.6, 1.0), 'విచారం': (-0.6, 1.0), 'చెడ్డ': (-0.6, 0.7),
+            'దారుణ': (-0.9, 1.0), 'నిరాశ': (-0.7, 1.0), 'ఒంటరి': (-0.4, 0.8), 'అలసి': (-0.3, 0.7),
+            'అలసట': (-0.3, 0.7), 'ఆందోళన': (-0.4, 0.8), 'భయం': (-0.5, 0.8), 'ద్వేష': (-0.8, 0.9),
+            'పనికిరాని': (-0.6, 0.8), 'కష్ట': (-0.3, 0.6), 'ఏడుపు': (-0.5, 0.8), 'ఏడుస్త': (-0.5, 0.8),
+            'నొప్పి': (-0.5, 0.8), 'ఒత్తిడి': (-0.4, 0.8),
+        },
+        'negations': ['లేదు', 'లేను', 'లేము', 'కాదు', 'వద్దు'],
+        'intensifiers': {'చాలా': 1.3, 'ఎంతో': 1.3, 'మరీ': 1.5, 'బాగా': 1.2},
+        'negation_follows': True,
+    },
+}
+
+# Words are runs of anything but whitespace, digits and punctuation, so
+# Devanagari and Telugu vowel signs stay inside their words
+_WORD = re.compile(r"[^\s\d.,;:!?¡¿\"'()\[\]{}।॥…-]+")
+# Shortest stem tried when a word isn't in the lexicon as is
+_MIN_STEM = 3
+
+def normalize(text):
+    """NFC-normalise text or a keyword
+
+    Devanagari nukta letters are NFC composition exclusions, so text and
+    lexicon must both be normalised before they're compared.
+    """
+    return unicodedata.normalize('NFC', text)
+
+class WordLexiconSentiment:
+    """Polarity and subjectivity from a stem lexicon, with negation and intensifiers
+
+    Each word is looked up whole, then by its longest prefix in the
+    lexicon. As in pattern, a negated word counts -0.5 times its polarity,
+    an intensifier scales the next word, and the scores are averaged over
+    the words found.
+    """
+
+    def __init__(self, words, negations, intensifiers, negation_follows=False):
+        self.words = {normalize(stem): scores for stem, scores in words.items()}
+        self.negations = frozenset(map(normalize, negations))
+        self.intensifiers = {normalize(word): factor for word, factor in intensifiers.items()}
+        self.negation_follows = negation_follows
+        self._longest = max(map(len, self.words), default=0)
+
+    def _lookup(self, word):
+        scores = self.words.get(word)
+        end = min(len(word) - 1, self._longest)
+        while scores is None and end >= _MIN_STEM:
+            scores = self.words.get(word[:end])
+            end -= 1
+        return scores
+
+    def score(self, text):
+        """Return (polarity, subjectivity) for one NFC-normalised, lower-cased text"""
+        assessments = []     # [polarity, subjectivity] per sentiment word
+        positions = []       # word index of each assessment
+        negated_at = []
+        intensity = 1.0
+        words = _WORD.findall(text)
+        for index, word in enumerate(words):
+            if word in self.negations:
+                negated_at.append(index)
+                continue
+            factor = self.intensifiers.get(word)
+            if factor is not None:
+                intensity = factor
+                continue
+            scores = self._lookup(word)
+            if scores is None:
+                continue
+            polarity, subjectivity = scores
+            assessments.append([max(-1.0, min(polarity * intensity, 1.0)), min(subjectivity * intensity, 1.0)])
+            positions.append(index)
+            intensity = 1.0
+
+        # A negation flips the nearest sentiment word on its side, at most two words away
+        for negation in negated_at:
+            if self.negation_follows:
+                candidates = [offset for offset, position in enumerate(positions) if 0 < negation - position <= 2]
+                nearest = candidates[-1:]
+            else:
+                candidates = [offset for offset, position in enumerate(positions) if 0 < position - negation <= 2]
+                nearest = candidates[:1]
+            for offset in nearest:
+                assessments[offset][0] *= -0.5
+
+        if not assessments:
+            return 0.0, 0.0
+        count = float(len(assessments))
+        return sum(p for p, _ in assessments) / count, sum(s for _, s in assessments) / count
+
+def keywords(language):
+    """Return the NFC-normalised keyword lists of a language in KEYWORDS"""
+    return {category: [normalize(keyword) for keyword in words] for category, words in KEYWORDS[language].items()}
+
+def sentiment_scorer(language):
+    """Return the WordLexiconSentiment for a language in SENTIMENT"""
+    return WordLexiconSentiment(**SENTIMENT[language])
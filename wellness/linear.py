@@ -0,0 +1,128 @@
+"""Linear emotion model trained from labelled exports
+
+A HashingVectorizer feeds a logistic regression over the joint
+emotion/severity labels, plus two ridge regressions that learn polarity and
+subjectivity, so predictions follow the same result contract as
+detect_emotion. The vectoriser is stateless, so a saved model is only its
+settings (``model.json``) and one weight matrix (``weights.npy``), which is
+memory-mapped rather than read when the model is loaded.
+
+    python -m wellness.train labelled.csv -o models/emotion
+    WELLNESS_EMOTION_MODEL=models/emotion python -m wellness messages.csv -o scored.csv
+
+Needs scikit-learn from requirements-ml.txt.
+"""
+import hashlib
+import json
+import os
+import threading
+
+from wellness import resources
+
+DEFAULT_FEATURE_BITS = 18
+DEFAULT_NGRAMS = 2
+
+META_FILE = 'model.json'
+WEIGHTS_FILE = 'weights.npy'
+
+def _vectorizer(n_features, ngrams):
+    try:
+        from sklearn.feature_extraction.text import HashingVectorizer
+    except ImportError as e:
+        raise ImportError("Linear emotion models need scikit-learn: pip install -r requirements-ml.txt") from e
+    # Non-negative hashed counts, l2-normalised per message
+    return HashingVectorizer(n_features=n_features, ngram_range=(1, ngrams), alternate_sign=False)
+
+class LinearEmotionModel:
+    """A model saved by save_model(), scored a whole batch at a time"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, META_FILE)) as f:
+            self.meta = json.load(f)
+        self.labels = [tuple(label) for label in self.meta['labels']]
+        self.version = self.meta['fingerprint']
+        self._lock = threading.Lock()
+        self._loaded = None
+
+    def _load(self):
+        with self._lock:
+            if self._loaded is None:
+                # The weights file is its own shared snapshot: every process
+                # maps the same read-only pages
+                self._loaded = resources.shared(f'emotion-model-{self.version}', self._build,
+                                                mapped=lambda loaded: loaded[1].nbytes)
+            return self._loaded
+
+    def _build(self):
+        import numpy as np
+
+        vectorizer = _vectorizer(self.meta['n_features'], self.meta['ngrams'])
+        weights = np.load(os.path.join(self.path, WEIGHTS_FILE), mmap_mode='r')
+        intercepts = np.asarray(self.meta['intercepts'], dtype=weights.dtype)
+        return vectorizer, weights, intercepts
+
+    def score_frame(self, texts):
+        """Return emotion, severity, polarity and subjectivity columns for texts"""
+        import numpy as np
+        import pandas as pd
+
+        vectorizer, weights, intercepts = self._load()
+        # One sparse (messages x features) @ dense (features x outputs) product
+        outputs = vectorizer.transform(list(texts)) @ weights + intercepts
+        classes = len(self.labels)
+        labels = np.array(self.labels, dtype=object).reshape(-1, 2)[outputs[:, :classes].argmax(axis=1)]
+        return pd.DataFrame({
+            'emotion': labels[:, 0],
+            'severity': labels[:, 1],
+            'polarity': np.clip(outputs[:, classes], -1.0, 1.0).astype(np.float64),
+            'subjectivity': np.clip(outputs[:, classes + 1], 0.0, 1.0).astype(np.float64),
+        })
+
+def train_model(texts, emotions, severities, polarity, subjectivity,
+                feature_bits=DEFAULT_FEATURE_BITS, ngrams=DEFAULT_NGRAMS, c=10.0):
+    """Fit the classifier and regressors, returning (weights, meta) for save_model"""
+    import numpy as np
+    from sklearn.linear_model import LogisticRegression, Ridge
+
+    from wellness.scoring import EMOTIONS, SEVERITIES
+
+    unknown = sorted({e for e in emotions if e not in EMOTIONS} | {s for s in severities if s not in SEVERITIES})
+    if unknown:
+        raise ValueError(f"Unknown emotion or severity labels: {', '.join(map(str, unknown))}")
+    joint = [f'{emotion}/{severity}' for emotion, severity in zip(emotions, severities)]
+    if len(set(joint)) < 2:
+        raise ValueError("Training data needs at least two different emotion/severity labels")
+
+    n_features = 2 ** feature_bits
+    features = _vectorizer(n_features, ngrams).transform(list(texts))
+
+    classifier = LogisticRegression(C=c, solver='saga', max_iter=1000).fit(features, joint)
+    coef, intercept = classifier.coef_, classifier.intercept_
+    if len(classifier.classes_) == 2:
+        # Binary models keep one row for the second class; expand to one per class
+        coef, intercept = np.vstack([-coef, coef]) / 2, np.concatenate([-intercept, intercept]) / 2
+    regressors = [Ridge(alpha=1.0).fit(features, target) for target in (polarity, subjectivity)]
+
+    weights = np.vstack([coef] + [regressor.coef_.reshape(1, -1) for regressor in regressors])
+    # Stored features-major so each non-zero feature reads one contiguous row
+    weights = np.ascontiguousarray(weights.T, dtype=np.float32)
+    meta = {
+        'labels': [label.split('/') for label in classifier.classes_],
+        'intercepts': [float(value) for value in intercept] + [float(r.intercept_) for r in regressors],
+        'n_features': n_features,
+        'ngrams': ngrams,
+    }
+    return weights, meta
+
+def save_model(path, weights, meta):
+    """Write a trained model to the directory ``path`` and return it loaded"""
+    import numpy as np
+
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, WEIGHTS_FILE), weights)
+    fingerprint = hashlib.blake2b(weights.tobytes(), digest_size=8)
+    fingerprint.update(json.dumps(meta, sort_keys=True).encode('utf-8'))
+    with open(os.path.join(path, META_FILE), 'w') as f:
+        json.dump(dict(meta, fingerprint=fingerprint.hexdigest()), f)
+    return LinearEmotionModel(path)
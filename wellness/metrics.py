@@ -0,0 +1,180 @@
+"""Lightweight pipeline instrumentation
+
+Per-stage timers, counters and histograms, rendered in the Prometheus text
+format. Collection is off unless WELLNESS_METRICS is set or enable() is
+called. While off, ``timer()`` returns a shared no-op context manager and
+``inc()``/``observe()`` return after one flag check.
+
+    with metrics.timer('sentiment'):
+        ...
+    metrics.inc('messages_scored_total', len(texts))
+"""
+import os
+import threading
+import time
+
+# Upper bounds (seconds) of the stage timing histogram buckets
+TIME_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, float('inf'))
+
+# name -> (type, help); every metric is exported with a ``wellness_`` prefix
+METRICS = {
+    'stage_seconds': ('histogram', 'Time spent in each pipeline stage'),
+    'messages_scored_total': ('counter', 'Messages scored'),
+    'duplicates_collapsed_total': ('counter', "Duplicate messages that reused another message's score"),
+    'bytes_parsed_total': ('counter', 'Bytes of uploaded or input files parsed'),
+    'batches_scored_total': ('counter', 'Message batches scored'),
+    'cache_hits_total': ('counter', 'In-memory result cache hits'),
+    'cache_misses_total': ('counter', 'In-memory result cache misses'),
+    'store_hits_total': ('counter', 'On-disk result store hits'),
+    'store_misses_total': ('counter', 'On-disk result store misses'),
+    'stream_skipped_total': ('counter', 'Malformed streamed lines skipped'),
+    'alerts_total': ('counter', 'Alerts raised while streaming'),
+    'alerts_over_budget_total': ('counter', 'Alerts sent later than the alert latency budget'),
+    'alert_hook_errors_total': ('counter', 'Alert hook calls that failed'),
+    'alerts_dropped_total': ('counter', 'Alerts dropped because the alert hooks fell behind'),
+    'alert_latency_seconds': ('histogram', 'Time from a streamed message arriving to its alert being sent'),
+}
+
+_enabled = os.environ.get('WELLNESS_METRICS', '').lower() not in ('', '0', 'false', 'no')
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_collectors = []
+
+def enabled():
+    return _enabled
+
+def enable(on=True):
+    """Turn collection on or off for this process"""
+    global _enabled
+    _enabled = on
+
+def inc(name, amount=1):
+    """Add ``amount`` to a counter"""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+def observe(name, value, stage=None):
+    """Record ``value`` in a histogram, optionally labelled with a stage"""
+    if not _enabled:
+        return
+    key = (name, stage)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = [[0] * len(TIME_BUCKETS), 0.0, 0]
+        buckets, _, _ = histogram
+        for index, bound in enumerate(TIME_BUCKETS):
+            if value <= bound:
+                buckets[index] += 1
+                break
+        histogram[1] += value
+        histogram[2] += 1
+
+class _Timer:
+    __slots__ = ('stage', 'started')
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        observe('stage_seconds', time.perf_counter() - self.started, self.stage)
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+_NULL_TIMER = _NullTimer()
+
+def timer(stage):
+    """Context manager recording the wall time of a stage"""
+    return _Timer(stage) if _enabled else _NULL_TIMER
+
+def add_collector(collector):
+    """Register a callable returning {counter name: value}, read at export time
+
+    Used for values that are already counted elsewhere, such as the result
+    cache's hit counters, so the hot path doesn't count them twice.
+    """
+    if collector not in _collectors:
+        _collectors.append(collector)
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+def export_state():
+    """Return a picklable copy of the raw counters and histograms"""
+    with _lock:
+        return (dict(_counters),
+                {key: [list(buckets), total, count] for key, (buckets, total, count) in _histograms.items()})
+
+def merge_state(state):
+    """Add counters and histograms exported by another process"""
+    counters, histograms = state
+    with _lock:
+        for name, value in counters.items():
+            _counters[name] = _counters.get(name, 0) + value
+        for key, (buckets, total, count) in histograms.items():
+            histogram = _histograms.get(key)
+            if histogram is None:
+                _histograms[key] = [list(buckets), total, count]
+            else:
+                histogram[0] = [a + b for a, b in zip(histogram[0], buckets)]
+                histogram[1] += total
+                histogram[2] += count
+
+def snapshot():
+    """Return {'counters': {...}, 'stages': {stage: {'count', 'seconds'}}}"""
+    counters, histograms = export_state()
+    for collector in _collectors:
+        counters.update(collector())
+    stages = {stage: {'count': count, 'seconds': total}
+              for (name, stage), (_, total, count) in sorted(histograms.items(), key=lambda item: str(item[0]))
+              if name == 'stage_seconds'}
+    return {'counters': counters, 'stages': stages}
+
+def render_prometheus():
+    """Return all metrics in the Prometheus text exposition format"""
+    counters, histograms = export_state()
+    for collector in _collectors:
+        counters.update(collector())
+
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        full_name = f'wellness_{name}'
+        if kind == 'counter':
+            if name not in counters:
+                continue
+            lines += [f'# HELP {full_name} {help_text}', f'# TYPE {full_name} counter',
+                      f'{full_name} {counters[name]}']
+            continue
+
+        series = sorted(((stage, data) for (metric, stage), data in histograms.items() if metric == name),
+                        key=lambda item: str(item[0]))
+        if not series:
+            continue
+        lines += [f'# HELP {full_name} {help_text}', f'# TYPE {full_name} histogram']
+        for stage, (buckets, total, count) in series:
+            labels = f'stage="{stage}",' if stage is not None else ''
+            cumulative = 0
+            for bound, bucket in zip(TIME_BUCKETS, buckets):
+                cumulative += bucket
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{full_name}_bucket{{{labels}le="{le}"}} {cumulative}')
+            plain_labels = f'{{{labels.rstrip(",")}}}' if labels else ''
+            lines.append(f'{full_name}_sum{plain_labels} {total}')
+            lines.append(f'{full_name}_count{plain_labels} {count}')
+    return '\n'.join(lines) + '\n'
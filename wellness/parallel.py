@@ -0,0 +1,134 @@
+"""Multiprocess batch scoring
+
+Sentiment analysis is pure-Python and CPU-bound, so large batches are split
+into chunks and scored across a pool of worker processes.
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from wellness import metrics, rules, scoring
+
+def _available_cpus():
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+# Defaults can be overridden per call or through the environment
+DEFAULT_WORKERS = int(os.environ.get('WELLNESS_WORKERS', _available_cpus()))
+DEFAULT_CHUNK_SIZE = int(os.environ.get('WELLNESS_CHUNK_SIZE', 2000))
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def _init_worker(threads):
+    # Load the sentiment lexicon or model once per worker rather than inside the first chunk
+    scoring.warm_up(threads)
+
+def _score_chunk(texts):
+    # The parent process has already consulted the result cache
+    return scoring.score_batch(texts, cache=None)
+
+def _score_chunk_in_worker(texts, collect_metrics, ruleset):
+    # Worker metrics are sent back with the result and merged by the parent;
+    # chunks are scored under the parent's rules, whatever the worker has loaded
+    metrics.enable(collect_metrics)
+    with rules.pinned(ruleset):
+        if not collect_metrics:
+            return _score_chunk(texts), None
+        metrics.reset()
+        return _score_chunk(texts), metrics.export_state()
+
+def _unpack(result):
+    frame, state = result
+    if state is not None:
+        metrics.merge_state(state)
+    return frame
+
+def get_pool(workers):
+    """Return a process pool with the given worker count, shared by all callers"""
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            # Load shared resources here first: forked workers inherit them,
+            # and others load the snapshots this writes instead of building their own
+            scoring.warm_up()
+            # Split the CPUs between workers so model inference doesn't oversubscribe them
+            threads = max(1, _available_cpus() // workers)
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(threads,))
+            _pools[workers] = pool
+        return pool
+
+def shutdown_pools():
+    """Stop every shared pool, e.g. when a server shuts down"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+def score_on_pool(texts, workers):
+    """Score one chunk on the shared pool, blocking until it's done"""
+    future = get_pool(workers).submit(_score_chunk_in_worker, texts, metrics.enabled(), rules.current())
+    return _unpack(future.result())
+
+def _discard_pool(workers):
+    with _pools_lock:
+        pool = _pools.pop(workers, None)
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def score_parallel(texts, workers=None, chunk_size=None, on_progress=None,
+                   cache=scoring.RESULT_CACHE):
+    """Score messages across worker processes
+
+    Same result as scoring.score_batch, in input order. Cached results are
+    resolved in this process and only distinct unseen messages are sent to
+    the workers. ``on_progress`` is called as ``on_progress(done, total)``
+    over those messages each time a chunk completes. Small batches, or
+    ``workers=1``, are scored in-process.
+    """
+    workers = workers or DEFAULT_WORKERS
+    chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+
+    def score_pending(pending):
+        return _score_chunks(pending, workers, chunk_size, on_progress)
+
+    return scoring.score_batch(texts, cache=cache, scorer=score_pending)
+
+def _score_chunks(texts, workers, chunk_size, on_progress):
+    chunks = [texts[start:start + chunk_size] for start in range(0, len(texts), chunk_size)]
+
+    results = [None] * len(chunks)
+    done = 0
+    if workers <= 1 or len(chunks) <= 1:
+        for index, chunk in enumerate(chunks):
+            results[index] = _score_chunk(chunk)
+            done += len(chunk)
+            if on_progress:
+                on_progress(done, len(texts))
+    else:
+        pool = get_pool(workers)
+        try:
+            collect_metrics = metrics.enabled()
+            ruleset = rules.current()
+            futures = {pool.submit(_score_chunk_in_worker, chunk, collect_metrics, ruleset): index
+                       for index, chunk in enumerate(chunks)}
+            for future in as_completed(futures):
+                index = futures[future]
+                results[index] = _unpack(future.result())
+                done += len(chunks[index])
+                if on_progress:
+                    on_progress(done, len(texts))
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool on the next call
+            _discard_pool(workers)
+            raise
+
+    if not results:
+        return scoring.score_batch([], cache=None)
+
+    import pandas as pd
+
+    return pd.concat(results, ignore_index=True)
@@ -0,0 +1,66 @@
+"""Batch scoring pipeline shared by the Streamlit app and the CLI"""
+from wellness import dedup, metrics, segments
+from wellness.parallel import score_parallel
+
+# Messages this short or shorter are skipped as too little to analyse
+MIN_MESSAGE_LENGTH = 5
+
+def clean_batch(batch):
+    """Return the analysable rows of a batch as a DataFrame with a string ``message`` column
+
+    ``batch`` is a reader batch (a DataFrame with a ``message`` column and
+    any context columns) or a plain list of messages.
+    """
+    import pandas as pd
+
+    if not isinstance(batch, pd.DataFrame):
+        batch = pd.DataFrame({'message': pd.Series(batch, dtype=object)})
+    batch = batch[batch['message'].notna()]
+    texts = batch['message'].astype(str)
+    keep = texts.str.strip().str.len() > MIN_MESSAGE_LENGTH
+    return batch[keep].assign(message=texts[keep]).reset_index(drop=True)
+
+def score_batches(batches, workers=None, chunk_size=None, on_progress=None,
+                  dedup_mode=dedup.DEFAULT_MODE, dedup_threshold=dedup.DEFAULT_THRESHOLD,
+                  segment=segments.DEFAULT_SEGMENT):
+    """Score an iterable of message batches, yielding one result frame per batch
+
+    Each frame has a ``message`` column, then any context columns the batch
+    carried (``timestamp``, ``user_id``), then the score_batch columns and,
+    unless ``dedup_mode`` is 'off', ``duplicates``: how many messages in the
+    batch share the row's result. Only one message per duplicate group is
+    scored (see wellness.dedup). With ``segment``, long messages are scored
+    sentence by sentence and ``spans`` and ``segments`` columns are added
+    (see wellness.segments); spans are offsets into the scored text, so
+    then only identical messages share a result, whatever ``dedup_mode``
+    allows. Batches with nothing to analyse are skipped.
+    ``on_progress`` is passed through to score_parallel for every batch.
+    """
+    import numpy as np
+    import pandas as pd
+
+    for batch in batches:
+        rows = clean_batch(batch)
+        if rows.empty:
+            continue
+        with metrics.timer('dedup'):
+            if segment and dedup_mode != 'off':
+                groups, _ = pd.factorize(rows['message'])
+                _, representatives = np.unique(groups, return_index=True)
+            else:
+                groups, representatives = dedup.collapse(rows['message'], dedup_mode, dedup_threshold)
+        texts = rows['message'].take(representatives).reset_index(drop=True)
+
+        def score(texts):
+            return score_parallel(texts, workers=workers, chunk_size=chunk_size, on_progress=on_progress)
+
+        with metrics.timer('score'):
+            scores = segments.score_segmented(texts, scorer=score) if segment else score(texts)
+        if len(representatives) < len(rows):
+            scores = scores.take(groups).reset_index(drop=True)
+        if dedup_mode != 'off':
+            scores['duplicates'] = np.bincount(groups)[groups]
+        metrics.inc('messages_scored_total', len(rows))
+        metrics.inc('duplicates_collapsed_total', len(rows) - len(representatives))
+        metrics.inc('batches_scored_total')
+        yield pd.concat([rows, scores], axis=1)
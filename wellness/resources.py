@@ -0,0 +1,140 @@
+"""Read-only scoring resources, built once and shared
+
+Scoring reads a few large, never-modified resources: the sentiment
+lexicon, the keyword automaton and, when configured, model weights. Left
+alone, every process loads its own copy, and loading the lexicon through
+TextBlob also imports NLTK and SciPy, which costs each process far more
+than the lexicon itself.
+
+- Within a process, shared() builds each resource once and hands the same
+  object to every caller. The Streamlit app also keeps them in
+  st.cache_resource, so they're loaded once per server rather than in
+  the first session that scores something.
+- Across processes, the first process to build a resource can write a
+  snapshot of it under RESOURCE_DIR, keyed by its version. Later
+  processes, such as pool workers, load that snapshot instead: the
+  lexicon without importing TextBlob, and weights as read-only memory maps
+  whose pages the OS keeps once for every process mapping the file.
+
+report() lists the resources loaded in this process with the memory each
+took to load and the file bytes each maps, which are shared;
+``python benchmarks/worker_memory.py`` shows how memory grows with workers.
+"""
+import os
+import threading
+import time
+
+RESOURCE_DIR = os.environ.get(
+    'WELLNESS_RESOURCE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'mental-wellness-detector', 'resources'),
+)
+
+_resources = {}
+# Re-entrant, since a resource's builder may load other resources
+_lock = threading.RLock()
+
+def _rss(pid='self'):
+    # Resident bytes of a process, or None where /proc isn't available
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+def process_memory(pid='self'):
+    """Return {'rss', 'pss', 'shared'} bytes of a process, as far as the OS reports them
+
+    ``pss`` counts each shared page divided by the number of processes
+    mapping it, so summing it across processes gives the real total.
+    """
+    memory = {'rss': _rss(pid), 'pss': None, 'shared': None}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            fields = dict(line.split(':', 1) for line in f if ':' in line)
+    except OSError:
+        return memory
+    kilobytes = {name: int(value.split()[0]) * 1024 for name, value in fields.items() if value.strip()[:1].isdigit()}
+    memory['pss'] = kilobytes.get('Pss')
+    memory['shared'] = kilobytes.get('Shared_Clean', 0) + kilobytes.get('Shared_Dirty', 0)
+    return memory
+
+def snapshot_path(name, version):
+    """Directory holding the snapshot of a resource version"""
+    return os.path.join(RESOURCE_DIR, f'{name}-{version}')
+
+def _write_snapshot(value, path, save):
+    # Written to a temporary directory and renamed into place, so readers
+    # never see a partial snapshot; if another process got there first its
+    # snapshot is kept
+    import shutil
+    import tempfile
+
+    parent = os.path.dirname(path)
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix='.staging-', dir=parent)
+    try:
+        save(value, staging)
+        os.rename(staging, path)
+    except OSError:
+        if not os.path.isdir(path):
+            raise
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+def shared(name, build, version='', save=None, load=None, mapped=None):
+    """Return resource ``name``, building it on first use in this process
+
+    With ``save`` and ``load``, ``save(value, directory)`` writes a snapshot
+    the first time the resource is built and ``load(directory)`` reads it
+    back, in this or any other process, instead of calling ``build()``.
+    Snapshots are keyed by ``version``, which must change whenever the
+    built value would. ``mapped(value)`` returns the bytes the value maps
+    from files, reported apart from the memory loading it took.
+    """
+    resource = _resources.get(name)
+    if resource is not None:
+        return resource['value']
+    with _lock:
+        resource = _resources.get(name)
+        if resource is not None:
+            return resource['value']
+
+        started, resident = time.perf_counter(), _rss()
+        path = snapshot_path(name, version) if save and load else None
+        value, source = None, 'built'
+        if path and os.path.isdir(path):
+            try:
+                value, source = load(path), 'snapshot'
+            except (OSError, ValueError) as e:
+                # Damaged or unreadable; build the resource without a snapshot
+                path, source = None, f'built, snapshot unreadable: {e}'
+        if value is None:
+            value = build()
+            if path:
+                try:
+                    _write_snapshot(value, path, save)
+                    value, source = load(path), 'built, snapshot saved'
+                except (OSError, ValueError) as e:
+                    source = f'built, snapshot not saved: {e}'
+        loaded = _rss()
+        _resources[name] = {
+            'value': value,
+            'source': source,
+            'seconds': time.perf_counter() - started,
+            'loaded_bytes': loaded - resident if loaded is not None and resident is not None else None,
+            'mapped_bytes': mapped(value) if mapped else 0,
+        }
+        return value
+
+def report():
+    """Return one row per resource loaded in this process
+
+    ``loaded_bytes`` is how much this process's resident memory grew while
+    loading it, including any modules it imported; ``mapped_bytes`` are
+    file pages it maps read-only, shared with every process mapping them.
+    """
+    with _lock:
+        return [
+            {'resource': name, **{key: value for key, value in resource.items() if key != 'value'}}
+            for name, resource in _resources.items()
+        ]
@@ -0,0 +1,144 @@
+"""Compact in-memory store for large batch results
+
+ResultTable holds a growing run of result rows in typed arrays rather than
+per-row Python objects:
+
+- label columns (emotion, severity) as int8 codes into the fixed EMOTIONS and
+  SEVERITIES tables
+- other repetitive text columns (e.g. user ids) as int32 codes into a table
+  of their distinct values
+- floats as float32 and integers as int32
+- free text as UTF-8 in one contiguous buffer per batch, addressed by
+  offsets (Arrow string arrays), so a million messages are a few buffers,
+  not a million str objects
+
+to_frame() views a row range as a DataFrame: codes become pandas
+categoricals without being copied, and only the text of the requested rows
+is turned into pandas strings, so paging through a large run stays cheap.
+"""
+from wellness.export import CATEGORIES
+
+class ResultTable:
+    """Append-only, column-typed result rows
+
+    Column types are fixed by the first frame appended. ``coded`` names text
+    columns to store as codes into a table of their distinct values.
+    """
+
+    def __init__(self, coded=()):
+        self.coded = tuple(coded)
+        self.columns = None
+        self._kinds = {}
+        self._chunks = {}
+        self._lookups = {}     # coded column -> {value: code}
+        self._values = {}      # coded column -> [value per code]
+        self._size = 0
+        self._capacity = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def nbytes(self):
+        """Bytes held by the stored rows"""
+        total = 0
+        for column, kind in self._kinds.items():
+            if kind == 'text':
+                total += sum(chunk.nbytes for chunk in self._chunks[column])
+            else:
+                total += self._chunks[column][:self._size].nbytes
+        return total
+
+    def _kind(self, column, values):
+        import pandas as pd
+
+        if str(column).lower() in CATEGORIES:
+            return 'label'
+        if column in self.coded:
+            return 'coded'
+        if pd.api.types.is_bool_dtype(values) or pd.api.types.is_integer_dtype(values):
+            return 'int'
+        if pd.api.types.is_float_dtype(values):
+            return 'float'
+        return 'text'
+
+    def _grow(self, rows):
+        import numpy as np
+
+        if rows <= self._capacity:
+            return
+        self._capacity = max(rows, 2 * self._capacity, 1024)
+        for column, kind in self._kinds.items():
+            if kind != 'text':
+                self._chunks[column] = np.resize(self._chunks[column], self._capacity)
+
+    def append(self, frame):
+        """Add the rows of a DataFrame with the same columns as the first one"""
+        import numpy as np
+        import pandas as pd
+        import pyarrow as pa
+
+        if self.columns is None:
+            self.columns = list(frame.columns)
+            dtypes = {'label': np.int8, 'coded': np.int32, 'int': np.int32, 'float': np.float32}
+            for column in self.columns:
+                kind = self._kinds[column] = self._kind(column, frame[column])
+                self._chunks[column] = [] if kind == 'text' else np.empty(0, dtype=dtypes[kind])
+                if kind == 'coded':
+                    self._lookups[column], self._values[column] = {}, []
+        elif list(frame.columns) != self.columns:
+            raise ValueError(f"Expected columns {self.columns}, got {list(frame.columns)}")
+
+        start, stop = self._size, self._size + len(frame)
+        self._grow(stop)
+        for column in self.columns:
+            kind = self._kinds[column]
+            values = frame[column]
+            if kind == 'text':
+                self._chunks[column].append(pa.array(values.astype(object), type=pa.string(), from_pandas=True))
+            elif kind == 'label':
+                codes = pd.Categorical(values, categories=CATEGORIES[str(column).lower()]).codes
+                self._chunks[column][start:stop] = codes
+            elif kind == 'coded':
+                local, uniques = pd.factorize(values)
+                lookup, table = self._lookups[column], self._values[column]
+                mapping = np.empty(len(uniques) + 1, dtype=np.int32)
+                mapping[-1] = -1  # missing values keep code -1
+                for index, value in enumerate(uniques):
+                    code = lookup.get(value)
+                    if code is None:
+                        code = lookup[value] = len(table)
+                        table.append(value)
+                    mapping[index] = code
+                self._chunks[column][start:stop] = mapping[local]
+            else:
+                self._chunks[column][start:stop] = values.to_numpy()
+        self._size = stop
+
+    def to_frame(self, start=0, stop=None):
+        """Return rows start:stop as a DataFrame with categorical label and coded columns"""
+        import pandas as pd
+        import pyarrow as pa
+
+        stop = self._size if stop is None else min(stop, self._size)
+        start = min(start, stop)
+        columns = {}
+        for column in self.columns or ():
+            kind = self._kinds[column]
+            if kind == 'text':
+                text = pa.chunked_array(self._chunks[column], type=pa.string()).slice(start, stop - start)
+                columns[column] = text.to_pandas().array
+            elif kind == 'label':
+                columns[column] = pd.Categorical.from_codes(self._chunks[column][start:stop],
+                                                            categories=CATEGORIES[str(column).lower()])
+            elif kind == 'coded':
+                columns[column] = pd.Categorical.from_codes(self._chunks[column][start:stop],
+                                                            categories=self._values[column])
+            else:
+                columns[column] = self._chunks[column][start:stop]
+        return pd.DataFrame(columns, index=pd.RangeIndex(start, stop))
+
+    def iter_frames(self, rows=65536):
+        """Yield the table as DataFrames of up to ``rows`` rows, e.g. to export it"""
+        for start in range(0, self._size, rows):
+            yield self.to_frame(start, start + rows)
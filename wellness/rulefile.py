@@ -0,0 +1,39 @@
+"""Write and check emotion rules files (see wellness.rules)
+
+    python -m wellness.rulefile dump -o rules.json   # the built-in rules, as a starting point
+    python -m wellness.rulefile check rules.json     # validate an edited file before deploying it
+"""
+import argparse
+import json
+import sys
+
+from wellness import rules
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m wellness.rulefile', description='Write or check emotion rules files.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    dump = commands.add_parser('dump', help='write the built-in rules as JSON')
+    dump.add_argument('-o', '--output', default='-', help='file to write (default: stdout)')
+    check = commands.add_parser('check', help='validate a rules file')
+    check.add_argument('path')
+    args = parser.parse_args(argv)
+
+    if args.command == 'dump':
+        text = json.dumps(rules.DEFAULT_RULES, indent=2, ensure_ascii=False) + '\n'
+        if args.output == '-':
+            sys.stdout.write(text)
+        else:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(text)
+        return 0
+
+    try:
+        ruleset = rules.load(args.path)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(f"{args.path}: version {ruleset.version}, {len(ruleset.table)} rules, fingerprint {ruleset.fingerprint}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,306 @@
+"""Emotion and severity rules, loaded from a config file
+
+The decision ladder that turns keyword counts and sentiment into an emotion
+and severity is data: DEFAULT_RULES below, or the JSON file named by
+WELLNESS_RULES, which has the same shape:
+
+    {
+      "version": "2026-10-18.1",
+      "keywords": {"en": {"stress": ["stress", "pressure", ...]}},
+      "rules": [
+        {"emotion": "depression", "severity": "critical",
+         "when": [{"depression": ">= 2"}, {"depression": ">= 1", "polarity": "< -0.3"}]},
+        ...
+      ],
+      "otherwise": {"emotion": "stress", "severity": "low"}
+    }
+
+Rules are tried in order and the first that holds sets the labels. ``when``
+lists alternatives, each a set of conditions that must all hold. A condition
+compares one of FEATURES (keyword counts per category, polarity,
+subjectivity) with a number, or is a list of such comparisons
+(``"polarity": ["< 0", "> -0.3"]``). ``keywords`` replaces the keyword lists
+of the categories it names, per language (see wellness.lexicons for the
+built-in ones). Labels must come from EMOTIONS and SEVERITIES, which are
+fixed so exports, summaries and trends stay comparable across rule changes.
+
+Loading compiles the rules into a decision table of (feature, operator,
+threshold) comparisons. The same table is evaluated over NumPy arrays for a
+whole batch, one comparison per array, and over plain numbers for a single
+message.
+
+The file is checked for changes at most every RELOAD_SECONDS and reloaded
+in place. A file that fails to load keeps the previous rules in force and
+the error is reported on stderr and in status(). Every result carries the
+version of the rules that produced it, and the version and content of the
+rules are part of the cache key (see wellness.scoring).
+
+``python -m wellness.rulefile`` writes the built-in rules as a starting
+point and checks edited files.
+"""
+import contextlib
+import contextvars
+import hashlib
+import json
+import operator
+import os
+import re
+import sys
+import threading
+import time
+
+from wellness import lexicons
+
+# JSON rules file; unset uses DEFAULT_RULES
+RULES_PATH = os.environ.get('WELLNESS_RULES') or None
+# How often the rules file is checked for changes; 0 checks on every use
+RELOAD_SECONDS = float(os.environ.get('WELLNESS_RULES_RELOAD_SECONDS', 2))
+
+# Label sets results are coded against; rules can only choose among these
+EMOTIONS = ['depression', 'stress', 'positive', 'neutral']
+SEVERITIES = ['critical', 'high', 'moderate', 'low', 'good', 'normal']
+
+# Keyword categories are counted per message and double as features
+CATEGORIES = ('depression', 'stress', 'positive')
+FEATURES = CATEGORIES + ('polarity', 'subjectivity')
+
+OPERATORS = {
+    '<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+    '==': operator.eq, '!=': operator.ne,
+}
+_CONDITION = re.compile(r'\s*(<=|>=|==|!=|<|>)\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*$')
+
+DEFAULT_RULES = {
+    'version': '1',
+    'keywords': {},
+    'rules': [
+        {'emotion': 'depression', 'severity': 'critical',
+         'when': [{'depression': '>= 2'}, {'depression': '>= 1', 'polarity': '< -0.3'}]},
+        {'emotion': 'depression', 'severity': 'high',
+         'when': [{'depression': '>= 1'}, {'stress': '>= 2', 'polarity': '< -0.1'}]},
+        {'emotion': 'stress', 'severity': 'moderate',
+         'when': [{'stress': '>= 2'}, {'polarity': '< -0.2', 'subjectivity': '> 0.5'}]},
+        {'emotion': 'stress', 'severity': 'low',
+         'when': [{'stress': '>= 1'}, {'polarity': ['< 0', '> -0.3']}]},
+        {'emotion': 'positive', 'severity': 'good',
+         'when': [{'positive': '>= 2'}, {'polarity': '> 0.3'}]},
+        {'emotion': 'neutral', 'severity': 'normal',
+         'when': [{'polarity': '>= 0'}]},
+    ],
+    'otherwise': {'emotion': 'stress', 'severity': 'low'},
+}
+
+class RuleSet:
+    """Rules compiled into a decision table
+
+    ``table`` holds one entry per rule, in order: the rule's alternatives,
+    each a tuple of (feature, operator, threshold) comparisons, and the
+    rule's index into ``labels``. The last label is the fall-through case.
+    """
+
+    def __init__(self, config):
+        if not isinstance(config, dict):
+            raise ValueError("Rules must be a JSON object")
+        unknown = sorted(set(config) - {'version', 'description', 'keywords', 'rules', 'otherwise'})
+        if unknown:
+            raise ValueError(f"Unknown rules settings: {', '.join(unknown)}")
+        version = config.get('version')
+        if not isinstance(version, (str, int)) or isinstance(version, bool) or not str(version).strip():
+            raise ValueError("Rules need a 'version'")
+        rules = config.get('rules')
+        if not isinstance(rules, list) or not rules:
+            raise ValueError("Rules need a non-empty 'rules' list")
+
+        self.version = str(version).strip()
+        self.keyword_overrides = _keywords(config.get('keywords') or {})
+        self.labels = []
+        self.table = []
+        for index, rule in enumerate(rules):
+            where = f"rule {index + 1}"
+            if not isinstance(rule, dict) or set(rule) - {'emotion', 'severity', 'when', 'note'}:
+                raise ValueError(f"{where}: expected emotion, severity and when (and an optional note)")
+            alternatives = rule.get('when')
+            if isinstance(alternatives, dict):
+                alternatives = [alternatives]
+            if not isinstance(alternatives, list) or not alternatives:
+                raise ValueError(f"{where}: 'when' must list at least one set of conditions")
+            self.labels.append(_labels(rule, where))
+            self.table.append((tuple(_clause(clause, where) for clause in alternatives), index))
+        self.labels.append(_labels(config.get('otherwise') or {}, 'otherwise'))
+
+        # Canonical form of the rules, so equivalent files share cache keys
+        self.config = {
+            'version': self.version,
+            'keywords': self.keyword_overrides,
+            'rules': [{'emotion': emotion, 'severity': severity,
+                       'when': [{feature: [f'{op} {threshold!r}' for f, op, threshold in clause if f == feature]
+                                 for feature in dict.fromkeys(f for f, _, _ in clause)}
+                                for clause in clauses]}
+                      for (clauses, _), (emotion, severity) in zip(self.table, self.labels)],
+            'otherwise': dict(zip(('emotion', 'severity'), self.labels[-1])),
+        }
+        canonical = json.dumps(self.config, sort_keys=True, ensure_ascii=False)
+        self.fingerprint = hashlib.blake2b(canonical.encode('utf-8'), digest_size=8).hexdigest()
+        # Comparisons run on operator functions, which take numbers and NumPy arrays alike
+        self._table = [(tuple(tuple((FEATURES.index(feature), OPERATORS[op], threshold)
+                                    for feature, op, threshold in clause) for clause in clauses), index)
+                       for clauses, index in self.table]
+
+    def __repr__(self):
+        return f'RuleSet(version={self.version!r}, rules={len(self.table)}, fingerprint={self.fingerprint!r})'
+
+    def __reduce__(self):
+        # Worker processes get the rules a batch was pinned to, not their own copy
+        return RuleSet, (self.config,)
+
+    def keywords(self, language):
+        """Return {category: keywords} for a language, with this rule set's overrides applied"""
+        categories = lexicons.keywords(language) if language in lexicons.KEYWORDS else {}
+        categories.update(self.keyword_overrides.get(language, {}))
+        return {category: categories.get(category, []) for category in CATEGORIES}
+
+    def decide(self, features):
+        """Return the labels index of the first rule holding for one message
+
+        ``features`` has one number per entry of FEATURES, in that order.
+        """
+        for clauses, index in self._table:
+            for clause in clauses:
+                for feature, compare, threshold in clause:
+                    if not compare(features[feature], threshold):
+                        break
+                else:
+                    return index
+        return len(self.table)
+
+    def decide_batch(self, features):
+        """Return an int array with the labels index of the first rule holding for each message
+
+        ``features`` has one NumPy array per entry of FEATURES, in that order.
+        """
+        import numpy as np
+
+        conditions = []
+        for clauses, _ in self._table:
+            holds = None
+            for clause in clauses:
+                clause_holds = None
+                for feature, compare, threshold in clause:
+                    term = compare(features[feature], threshold)
+                    clause_holds = term if clause_holds is None else clause_holds & term
+                holds = clause_holds if holds is None else holds | clause_holds
+            conditions.append(holds)
+        return np.select(conditions, np.arange(len(conditions)), default=len(conditions))
+
+def _labels(rule, where):
+    emotion, severity = rule.get('emotion'), rule.get('severity')
+    if emotion not in EMOTIONS:
+        raise ValueError(f"{where}: emotion must be one of {', '.join(EMOTIONS)}, not {emotion!r}")
+    if severity not in SEVERITIES:
+        raise ValueError(f"{where}: severity must be one of {', '.join(SEVERITIES)}, not {severity!r}")
+    return emotion, severity
+
+def _clause(clause, where):
+    if not isinstance(clause, dict) or not clause:
+        raise ValueError(f"{where}: each entry of 'when' must map features to conditions")
+    comparisons = []
+    for feature, conditions in clause.items():
+        if feature not in FEATURES:
+            raise ValueError(f"{where}: unknown feature {feature!r}; use {', '.join(FEATURES)}")
+        for condition in conditions if isinstance(conditions, list) else [conditions]:
+            match = _CONDITION.match(condition) if isinstance(condition, str) else None
+            if match is None:
+                raise ValueError(f"{where}: {feature} condition {condition!r} should look like '>= 2' or '< -0.3'")
+            comparisons.append((feature, match.group(1), float(match.group(2))))
+    return tuple(comparisons)
+
+def _keywords(keywords):
+    if not isinstance(keywords, dict):
+        raise ValueError("'keywords' must map languages to keyword lists")
+    overrides = {}
+    for language, categories in keywords.items():
+        if language not in lexicons.LANGUAGE_NAMES:
+            raise ValueError(f"keywords: unknown language {language!r}; use {', '.join(lexicons.LANGUAGE_NAMES)}")
+        if not isinstance(categories, dict) or set(categories) - set(CATEGORIES):
+            raise ValueError(f"keywords.{language}: expected lists for {', '.join(CATEGORIES)}")
+        for category, words in categories.items():
+            if not isinstance(words, list) or not words or not all(isinstance(word, str) and word.strip() for word in words):
+                raise ValueError(f"keywords.{language}.{category}: expected a non-empty list of non-empty strings")
+        overrides[language] = {category: [lexicons.normalize(word.strip().lower()) for word in words]
+                               for category, words in categories.items()}
+    return overrides
+
+def load(path):
+    """Read and compile a rules file, raising OSError or ValueError if it can't be used"""
+    with open(path, encoding='utf-8') as f:
+        try:
+            config = json.load(f)
+        except ValueError as e:
+            raise ValueError(f"{path} is not valid JSON: {e}") from e
+    try:
+        return RuleSet(config)
+    except ValueError as e:
+        raise ValueError(f"{path}: {e}") from e
+
+DEFAULT = RuleSet(DEFAULT_RULES)
+
+_lock = threading.Lock()
+_active = load(RULES_PATH) if RULES_PATH else DEFAULT
+_state = {'loaded_at': time.time(), 'signature': None, 'next_check': 0.0, 'error': None, 'reloads': 0}
+_pinned = contextvars.ContextVar('wellness_rules', default=None)
+
+def _signature(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+if RULES_PATH:
+    _state['signature'] = _signature(RULES_PATH)
+
+def _reload():
+    global _active
+
+    try:
+        signature = _signature(RULES_PATH)
+        if signature == _state['signature']:
+            return
+        ruleset = load(RULES_PATH)
+    except (OSError, ValueError) as e:
+        if str(e) != _state['error']:
+            print(f"Keeping rules {_active.version}; {e}", file=sys.stderr)
+        _state['error'] = str(e)
+        return
+    _active = ruleset
+    _state.update(signature=signature, loaded_at=time.time(), error=None, reloads=_state['reloads'] + 1)
+
+def current():
+    """Return the rules in force, reloading the rules file if it has changed"""
+    pinned = _pinned.get()
+    if pinned is not None:
+        return pinned
+    if RULES_PATH and time.monotonic() >= _state['next_check']:
+        with _lock:
+            if time.monotonic() >= _state['next_check']:
+                _reload()
+                _state['next_check'] = time.monotonic() + RELOAD_SECONDS
+    return _active
+
+@contextlib.contextmanager
+def pinned(ruleset):
+    """Make current() return ``ruleset`` in this context, e.g. for the length of one batch"""
+    token = _pinned.set(ruleset)
+    try:
+        yield ruleset
+    finally:
+        _pinned.reset(token)
+
+def status():
+    """Return the version, source and reload state of the rules in force"""
+    ruleset = current()
+    return {
+        'version': ruleset.version,
+        'fingerprint': ruleset.fingerprint,
+        'path': RULES_PATH,
+        'loaded_at': _state['loaded_at'],
+        'reloads': _state['reloads'],
+        'error': _state['error'],
+    }
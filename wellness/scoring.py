@@ -0,0 +1,383 @@
+"""Emotion and severity scoring shared by the Streamlit app and batch jobs
+
+NumPy, pandas and TextBlob are imported inside the functions that use them,
+so importing this module stays cheap (see benchmarks/startup.py).
+"""
+import hashlib
+import json
+import os
+import re
+
+from wellness import backends, lexicons, linear, metrics, resources, rules
+from wellness.cache import ResultCache, cache_key, normalize_text
+from wellness.languages import DETECTOR_VERSION, ENABLED_LANGUAGES, detect_language, detect_languages, language_groups
+from wellness.rules import EMOTIONS, SEVERITIES
+from wellness.sentiment import lexicon_sentiment
+
+# Built-in keywords for each emotion category; a rules file can replace them
+STRESS_KEYWORDS = lexicons.KEYWORDS['en']['stress']
+DEPRESSION_KEYWORDS = lexicons.KEYWORDS['en']['depression']
+POSITIVE_KEYWORDS = lexicons.KEYWORDS['en']['positive']
+
+class KeywordMatcher:
+    """Count keyword hits for several categories in one pass over the text
+
+    The keywords are compiled into a single trie-shaped regex wrapped in a
+    lookahead, so every start position is tried once and overlapping hits are
+    still found. A category's count is the number of its distinct keywords
+    that occur in the text, same as a per-keyword ``keyword in text`` scan.
+    """
+
+    def __init__(self, categories):
+        self.categories = tuple(categories)
+        self._keyword_categories = {}
+        for category, keywords in categories.items():
+            for keyword in keywords:
+                self._keyword_categories.setdefault(keyword, set()).add(category)
+
+        # The regex reports the longest keyword at each position; any shorter
+        # keyword starting there is necessarily a prefix of it
+        keywords = list(self._keyword_categories)
+        self._implied = {
+            keyword: tuple(other for other in keywords if keyword.startswith(other))
+            for keyword in keywords
+        }
+        self.pattern = re.compile('(?=(' + self._trie_regex(keywords) + '))')
+
+        # Fingerprint of the keyword lists, part of every cache key
+        fingerprint = json.dumps({category: sorted(words) for category, words in categories.items()},
+                                 sort_keys=True)
+        self.version = hashlib.blake2b(fingerprint.encode('utf-8'), digest_size=8).hexdigest()
+
+    @classmethod
+    def _trie_regex(cls, keywords):
+        trie = {}
+        for keyword in keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[''] = {}
+        return cls._node_regex(trie)
+
+    @classmethod
+    def _node_regex(cls, node):
+        terminal = '' in node
+        branches = [re.escape(char) + cls._node_regex(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # Greedy optional group so the longest keyword wins at each position
+        if terminal:
+            return '(?:' + body + ')?'
+        return body
+
+    def found(self, text_lower):
+        """Return the set of keywords that occur in already-lowercased text"""
+        found = set()
+        for match in self.pattern.findall(text_lower):
+            found.update(self._implied[match])
+        return found
+
+    def count(self, text_lower):
+        """Return {category: number of distinct keywords found}"""
+        counts = dict.fromkeys(self.categories, 0)
+        for keyword in self.found(text_lower):
+            for category in self._keyword_categories[keyword]:
+                counts[category] += 1
+        return counts
+
+    def count_batch(self, texts_lower):
+        """Return {category: int array of counts} for a Series of lowercased texts"""
+        import numpy as np
+        import pandas as pd
+
+        texts_lower = texts_lower.reset_index(drop=True)
+        counts = {category: np.zeros(len(texts_lower), dtype=np.int64) for category in self.categories}
+
+        hits = texts_lower.str.findall(self.pattern).explode().dropna()
+        if hits.empty:
+            return counts
+
+        # One row per (message, distinct keyword), then one per category it belongs to
+        keywords = hits.map(self._implied).explode()
+        pairs = pd.DataFrame({'row': keywords.index, 'keyword': keywords.values}).drop_duplicates()
+        pairs['category'] = pairs['keyword'].map(self._keyword_categories).map(tuple)
+        pairs = pairs.explode('category')
+        for category, rows in pairs.groupby('category')['row']:
+            counts[category] = np.bincount(rows.to_numpy(dtype=np.int64), minlength=len(texts_lower))
+        return counts
+
+KEYWORD_MATCHER = resources.shared('keyword-matcher', lambda: KeywordMatcher({
+    'depression': DEPRESSION_KEYWORDS,
+    'stress': STRESS_KEYWORDS,
+    'positive': POSITIVE_KEYWORDS,
+}))
+
+def _keyword_matcher(ruleset, language):
+    # Matchers for the built-in lists are shared by every rule set
+    if language not in ruleset.keyword_overrides:
+        if language == 'en':
+            return KEYWORD_MATCHER
+        return resources.shared(f'keyword-matcher-{language}', lambda: KeywordMatcher(lexicons.keywords(language)))
+    return resources.shared(f'keyword-matcher-{language}-{ruleset.fingerprint}',
+                            lambda: KeywordMatcher(ruleset.keywords(language)))
+
+# Bumped when the way routed messages are scored changes (2: English
+# keywords and sentiment also count), so cached results are not reused
+ROUTING_VERSION = 2
+
+def _language_sentiment(language):
+    # Sentiment lexicon of a language other than English
+    return resources.shared(f'sentiment-{language}', lambda: lexicons.sentiment_scorer(language))
+
+# Polarity and subjectivity come from the configured backend (TextBlob by
+# default); other backends get their own cache keys
+SENTIMENT_BACKEND = backends.get_backend()
+
+# A model trained with ``python -m wellness.train`` replaces the keyword
+# rules and sentiment backend entirely when configured
+EMOTION_MODEL_PATH = os.environ.get('WELLNESS_EMOTION_MODEL')
+EMOTION_MODEL = linear.LinearEmotionModel(EMOTION_MODEL_PATH) if EMOTION_MODEL_PATH else None
+
+def _scoring_version(ruleset):
+    version = f'{ruleset.version}.{_keyword_matcher(ruleset, "en").version}'
+    if ruleset.fingerprint != rules.DEFAULT.fingerprint:
+        # The built-in rules keep the keys results were cached under before
+        # rules were configurable; any other rules are keyed by their content
+        version += '.' + ruleset.fingerprint
+    if SENTIMENT_BACKEND.version:
+        version += '.' + hashlib.blake2b(SENTIMENT_BACKEND.version.encode(), digest_size=4).hexdigest()
+    if len(ENABLED_LANGUAGES) > 1:
+        # Routing and the other languages' lexicons change results too
+        routed = json.dumps([DETECTOR_VERSION, ROUTING_VERSION, ENABLED_LANGUAGES, lexicons.KEYWORDS, lexicons.SENTIMENT],
+                            sort_keys=True, ensure_ascii=False)
+        version += '.' + hashlib.blake2b(routed.encode(), digest_size=4).hexdigest()
+    return version
+
+_scoring_versions = {}
+
+def scoring_version(ruleset=None):
+    """Version results are cached under, for the given rules or the ones in force
+
+    Covers the trained model if one is configured, otherwise the rules,
+    keyword lists, language routing and sentiment backend.
+    """
+    if EMOTION_MODEL is not None:
+        return f'linear.{EMOTION_MODEL.version}'
+    ruleset = ruleset or rules.current()
+    version = _scoring_versions.get(ruleset.fingerprint)
+    if version is None:
+        version = _scoring_versions[ruleset.fingerprint] = _scoring_version(ruleset)
+    return version
+
+def rules_version(ruleset=None):
+    """Version recorded with each result: the rules' own, or the trained model's"""
+    if EMOTION_MODEL is not None:
+        return f'linear.{EMOTION_MODEL.version}'
+    return (ruleset or rules.current()).version
+
+# Result tuples kept in the cache and store; score_batch adds rules_version
+SCORE_COLUMNS = ['emotion', 'severity', 'polarity', 'subjectivity']
+RESULT_COLUMNS = SCORE_COLUMNS + ['rules_version']
+
+# Results keyed by normalised text and scoring_version(), shared by all sessions
+RESULT_CACHE = ResultCache()
+
+def _cache_counters():
+    counters = {'cache_hits_total': RESULT_CACHE.hits, 'cache_misses_total': RESULT_CACHE.misses}
+    if RESULT_CACHE.store is not None:
+        counters['store_hits_total'] = RESULT_CACHE.store.hits
+        counters['store_misses_total'] = RESULT_CACHE.store.misses
+    return counters
+
+metrics.add_collector(_cache_counters)
+
+def analyze_sentiment(text):
+    """Analyze sentiment with TextBlob's pattern lexicon (see wellness.sentiment)"""
+    return lexicon_sentiment(text)
+
+def warm_up(threads=None):
+    """Load the configured model or sentiment lexicon ahead of the first message"""
+    if EMOTION_MODEL is not None:
+        EMOTION_MODEL.score_frame(["warm up"])
+        return
+    SENTIMENT_BACKEND.warm_up(threads)
+    detect_languages(["warm up"])
+    ruleset = rules.current()
+    scoring_version(ruleset)
+    for language in ENABLED_LANGUAGES:
+        _keyword_matcher(ruleset, language)
+        if language != 'en':
+            _language_sentiment(language)
+
+def detect_emotion(text):
+    """Detect emotions based on keywords and sentiment
+
+    Runs of whitespace are collapsed before scoring, so keyword phrases match
+    across line breaks and repeated spaces ("give\\nup" counts as "give up"),
+    and copies that differ only in spacing share one cache entry.
+    """
+    text = normalize_text(text)
+    ruleset = rules.current()
+    key = cache_key(text, scoring_version(ruleset))
+    result = RESULT_CACHE.get(key)
+    if result is None:
+        result = _detect_emotion(text, ruleset)
+        RESULT_CACHE.put(key, result)
+    return result
+
+def _detect_emotion(text, ruleset):
+    if EMOTION_MODEL is not None:
+        [result] = EMOTION_MODEL.score_frame([text]).itertuples(index=False, name=None)
+        return result
+    
+    text_lower = text.lower()
+    if detect_language(text) != 'en':
+        with rules.pinned(ruleset):
+            [result] = _score_frame([text]).itertuples(index=False, name=None)
+        return result
+    
+    # Keyword-based detection
+    with metrics.timer('keywords'):
+        keyword_counts = _keyword_matcher(ruleset, 'en').count(text_lower)
+    critical_score = keyword_counts['depression']
+    stress_score = keyword_counts['stress']
+    positive_score = keyword_counts['positive']
+    
+    with metrics.timer('sentiment'):
+        [(polarity, subjectivity)] = SENTIMENT_BACKEND.score([text])
+    
+    # Decision logic (see wellness.rules)
+    emotion, severity = ruleset.labels[ruleset.decide((critical_score, stress_score, positive_score,
+                                                       polarity, subjectivity))]
+    
+    return emotion, severity, polarity, subjectivity
+
+def score_batch(texts, cache=RESULT_CACHE, scorer=None):
+    """Score a list or Series of messages at once
+
+    Returns a DataFrame with ``emotion``, ``severity``, ``polarity``,
+    ``subjectivity`` and ``rules_version`` columns, one row per input in
+    input order. Messages are scored with their whitespace collapsed, as in
+    detect_emotion. They are looked up in ``cache`` first (pass None to
+    bypass it), and each distinct unseen message is handed once to
+    ``scorer``, which defaults to scoring in-process. The rules in force when
+    the call starts are used for the whole batch, even if they are reloaded
+    meanwhile.
+    """
+    texts = [normalize_text(str(text)) for text in texts]
+    scorer = scorer or _score_frame
+    ruleset = rules.current()
+    with rules.pinned(ruleset):
+        if cache is None:
+            frame = scorer(texts)
+        else:
+            frame = _score_cached(texts, cache, scorer, scoring_version(ruleset))
+    frame['rules_version'] = rules_version(ruleset)
+    return frame
+
+def _score_cached(texts, cache, scorer, version):
+    import pandas as pd
+
+    keys = [cache_key(text, version) for text in texts]
+    rows = cache.get_many(keys)
+    pending = {}
+    for key, text, row in zip(keys, texts, rows):
+        if row is None:
+            pending.setdefault(key, text)
+
+    if pending:
+        scored = scorer(list(pending.values()))[SCORE_COLUMNS]
+        fresh = dict(zip(pending, scored.itertuples(index=False, name=None)))
+        cache.put_many(fresh.items())
+        rows = [fresh[key] if row is None else row for key, row in zip(keys, rows)]
+
+    if not rows:
+        return _score_frame([])
+    return pd.DataFrame(rows, columns=SCORE_COLUMNS)
+
+def _score_frame(texts):
+    # Vectorised decision ladder over already-normalised texts
+    import numpy as np
+    import pandas as pd
+
+    if EMOTION_MODEL is not None:
+        with metrics.timer('model'):
+            return EMOTION_MODEL.score_frame(texts)
+
+    ruleset = rules.current()
+    texts = pd.Series(texts, dtype=object).astype(str)
+    texts_lower = texts.str.lower()
+
+    with metrics.timer('language'):
+        languages = detect_languages(texts_lower)
+        texts_lower = _normalize_routed(texts_lower, languages)
+
+    with metrics.timer('keywords'):
+        keyword_counts = count_keywords(texts_lower, languages, ruleset)
+    critical_score = keyword_counts['depression']
+    stress_score = keyword_counts['stress']
+    positive_score = keyword_counts['positive']
+
+    with metrics.timer('sentiment'):
+        polarity = np.zeros(len(texts))
+        subjectivity = np.zeros(len(texts))
+        for language, rows in language_groups(languages):
+            sentiments = SENTIMENT_BACKEND.score(texts.iloc[rows].tolist())
+            if language != 'en':
+                # Keep the English reading where it is the stronger one, as for keywords
+                scorer = _language_sentiment(language)
+                sentiments = [max(scorer.score(text), english, key=lambda sentiment: abs(sentiment[0]))
+                              for english, text in zip(sentiments, texts_lower.iloc[rows])]
+            polarity[rows] = [p for p, _ in sentiments]
+            subjectivity[rows] = [s for _, s in sentiments]
+
+    # Same rules as detect_emotion, evaluated over the whole batch
+    branch = ruleset.decide_batch((critical_score, stress_score, positive_score, polarity, subjectivity))
+    labels = np.array(ruleset.labels, dtype=object)
+
+    return pd.DataFrame({
+        'emotion': labels[branch, 0],
+        'severity': labels[branch, 1],
+        'polarity': polarity,
+        'subjectivity': subjectivity,
+    })
+
+def _normalize_routed(texts_lower, languages):
+    # The other languages' lexicons are NFC-normalised, so their messages must be too
+    texts_lower = texts_lower.reset_index(drop=True)
+    routed = languages != 'en'
+    if routed.any():
+        texts_lower = texts_lower.astype(object)
+        texts_lower[routed] = texts_lower[routed].str.normalize('NFC')
+    return texts_lower
+
+def count_keywords(texts_lower, languages=None, ruleset=None):
+    """Return {category: int array of keyword counts} for a Series of lowercased texts
+
+    Each message is matched against the English keywords and those of its
+    language, detected unless ``languages`` is given, and each count is the
+    larger of the two, so code-switched messages ("I want to die, no tengo
+    ganas de nada") keep their English hits. Keywords are those of
+    ``ruleset`` or the rules in force.
+    """
+    import numpy as np
+
+    ruleset = ruleset or rules.current()
+    texts_lower = texts_lower.reset_index(drop=True)
+    if languages is None:
+        languages = detect_languages(texts_lower)
+        texts_lower = _normalize_routed(texts_lower, languages)
+    groups = language_groups(languages)
+    if all(language == 'en' for language, _ in groups):
+        return _keyword_matcher(ruleset, 'en').count_batch(texts_lower)
+
+    # Messages mixing English with another language keep their English hits
+    counts = _keyword_matcher(ruleset, 'en').count_batch(texts_lower)
+    for language, rows in groups:
+        if language == 'en':
+            continue
+        for category, values in _keyword_matcher(ruleset, language).count_batch(texts_lower.iloc[rows]).items():
+            counts[category][rows] = np.maximum(counts[category][rows], values)
+    return counts
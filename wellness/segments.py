@@ -0,0 +1,161 @@
+"""Sentence-level scoring for long messages
+
+Scoring a journal entry or chat transcript as one blob lets a single
+critical sentence drown in the overall polarity, and TextBlob's cost grows
+with the length. score_segmented() splits long messages into sentences
+(very long sentences into windows at word boundaries), scores every segment
+of a batch in one score_batch call, and reports per message:
+
+- the emotion and severity of its most severe segment (the first of equals),
+  as the result contract's emotion/severity
+- polarity and subjectivity averaged over the scored segments, weighted by
+  their length
+- ``spans``: (start, end) character offsets of the segments that set the
+  verdict, so a UI can point at them
+- ``segments``: how many segments were scored
+
+At most ``max_segments`` segments are scored per message, which bounds the
+cost of any single message. When a message has more, segments containing
+depression keywords go first, then stress keywords, then the rest in order;
+the decision ladder can't reach depression without a depression keyword, so
+the cap rarely changes a verdict. Messages shorter than ``min_chars`` are
+scored whole, exactly as without segmenting.
+"""
+import os
+import re
+
+# Segment long messages in batch scoring by default
+DEFAULT_SEGMENT = os.environ.get('WELLNESS_SEGMENT', '').lower() not in ('', '0', 'false', 'no')
+# Messages at least this long are split; shorter ones are scored whole
+SEGMENT_MIN_CHARS = int(os.environ.get('WELLNESS_SEGMENT_MIN_CHARS', 280))
+# Longest segment; longer sentences are split into windows at word boundaries
+SEGMENT_MAX_CHARS = int(os.environ.get('WELLNESS_SEGMENT_MAX_CHARS', 500))
+# Segments scored per message at most
+MAX_SEGMENTS = int(os.environ.get('WELLNESS_MAX_SEGMENTS', 64))
+# Fragments shorter than this ("Ok.", "Dr.") are joined to the next sentence
+_MIN_SENTENCE_CHARS = 12
+
+# Hindi ends sentences with a danda (।)
+_SENTENCE_BREAK = re.compile(r'(?<=[.!?।])\s+|\s*\n\s*')
+
+def split_segments(text, max_chars=SEGMENT_MAX_CHARS):
+    """Return (start, end) offsets of the sentences or windows of text"""
+    spans = []
+    start = 0
+    for match in _SENTENCE_BREAK.finditer(text):
+        spans.append((start, match.start()))
+        start = match.end()
+    spans.append((start, len(text)))
+
+    segments = []
+    pending = None
+    for start, end in spans:
+        # Trim the span, skipping empty ones
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start == end:
+            continue
+        if pending is not None:
+            if end - pending <= max_chars:
+                start = pending
+            else:
+                segments.append((pending, pending_end))
+            pending = None
+        if end - start < _MIN_SENTENCE_CHARS:
+            pending, pending_end = start, end
+            continue
+        # Split overlong sentences at the last space inside each window
+        while end - start > max_chars:
+            cut = text.rfind(' ', start + 1, start + max_chars + 1)
+            if cut <= start:
+                cut = start + max_chars
+            segments.append((start, cut))
+            start = cut
+            while start < end and text[start].isspace():
+                start += 1
+        segments.append((start, end))
+    if pending is not None:
+        segments.append((pending, pending_end))
+    return segments
+
+def _prioritise(texts, max_segments):
+    # Keep the segments most able to raise the verdict, then restore text order
+    import numpy as np
+    import pandas as pd
+
+    from wellness.scoring import count_keywords
+
+    counts = count_keywords(pd.Series(texts, dtype=object).str.lower())
+    priority = np.where(counts['depression'] > 0, 0, np.where(counts['stress'] > 0, 1, 2))
+    keep = np.argsort(priority, kind='stable')[:max_segments]
+    return np.sort(keep)
+
+def score_segmented(texts, min_chars=SEGMENT_MIN_CHARS, max_chars=SEGMENT_MAX_CHARS,
+                    max_segments=MAX_SEGMENTS, scorer=None):
+    """Score messages sentence by sentence, one row per message
+
+    Returns the score_batch columns plus ``spans`` and ``segments`` (see the
+    module docstring). ``scorer`` scores a list of segment texts and returns
+    a score_batch frame; it defaults to scoring.score_batch.
+    """
+    import numpy as np
+    import pandas as pd
+
+    from wellness import scoring
+
+    scorer = scorer or scoring.score_batch
+    segment_texts = []
+    owners = []
+    offsets = []
+    for index, text in enumerate(texts):
+        text = str(text)
+        spans = (split_segments(text, max_chars) if len(text) >= min_chars else None) or [(0, len(text))]
+        if len(spans) > max_segments:
+            spans = [spans[position] for position in _prioritise([text[s:e] for s, e in spans], max_segments)]
+        segment_texts.extend(text[start:end] for start, end in spans)
+        owners.extend([index] * len(spans))
+        offsets.extend(spans)
+
+    columns = scoring.RESULT_COLUMNS + ['spans', 'segments']
+    if not segment_texts:
+        return pd.DataFrame(columns=columns)
+    scores = scorer(segment_texts)
+    owners = np.asarray(owners)
+    offsets = np.asarray(offsets, dtype=np.int64).reshape(-1, 2)
+    lengths = (offsets[:, 1] - offsets[:, 0]).clip(min=1).astype(np.float64)
+
+    # Most severe segment per message, earliest first among equals
+    rank = pd.Categorical(scores['severity'], categories=scoring.SEVERITIES).codes
+    order = np.lexsort((np.arange(len(owners)), rank, owners))
+    messages, first = np.unique(owners[order], return_index=True)
+    worst = order[first]
+
+    count = len(messages)
+    weight = np.bincount(owners, weights=lengths, minlength=count)
+    polarity = np.bincount(owners, weights=scores['polarity'].to_numpy() * lengths, minlength=count) / weight
+    subjectivity = np.bincount(owners, weights=scores['subjectivity'].to_numpy() * lengths, minlength=count) / weight
+
+    # Spans of every segment with the same labels as the verdict
+    emotion = scores['emotion'].to_numpy()
+    severity = scores['severity'].to_numpy()
+    matches = (emotion == emotion[worst][owners]) & (severity == severity[worst][owners])
+    spans = [[] for _ in range(count)]
+    for owner, start, end in zip(owners[matches].tolist(), *offsets[matches].T.tolist()):
+        spans[owner].append((start, end))
+
+    return pd.DataFrame({
+        'emotion': emotion[worst],
+        'severity': severity[worst],
+        'polarity': polarity,
+        'subjectivity': subjectivity,
+        'rules_version': scores['rules_version'].to_numpy()[worst],
+        'spans': spans,
+        'segments': np.bincount(owners, minlength=count),
+    }, columns=columns)
+
+def detect_emotion_segmented(text, **options):
+    """Segmented counterpart of scoring.detect_emotion, returning (emotion, severity, polarity, subjectivity, spans)"""
+    row = score_segmented([text], **options).iloc[0]
+    return row['emotion'], row['severity'], float(row['polarity']), float(row['subjectivity']), row['spans']
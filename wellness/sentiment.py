@@ -0,0 +1,244 @@
+"""TextBlob-compatible sentiment without building a TextBlob per message
+
+TextBlob(text).sentiment tokenises the text into sentence and word objects
+and then runs pattern's lexicon scorer over them. This module runs the same
+algorithm directly on strings:
+
+- the pattern lexicon is loaded once and flattened into one dict of
+  word -> (polarity, subjectivity, intensity, is_modifier), so scoring a
+  token is a single lookup; the flattened tables are snapshotted through
+  wellness.resources, so other processes load them without importing
+  TextBlob
+- tokenisation mirrors pattern's ``find_tokens``, but plain alphanumeric
+  tokens (almost all of them) skip the punctuation-splitting loop, and the
+  sentence splitting is skipped unless the text contains an emoticon or
+  sarcasm mark that pattern would rewrite per sentence; those few texts
+  are tokenised by pattern itself
+- negation, intensifiers ("very", "-ly" adverbs), "!" boosts, "(!)" and
+  emoticons follow pattern's ``Sentiment.assessments`` step for step,
+  including its floating-point operation order
+
+Scores therefore equal TextBlob's exactly (PARITY_TOLERANCE is the bound
+enforced by tests/test_sentiment_parity.py and checked on larger corpora by
+``python benchmarks/sentiment_parity.py``).
+"""
+import json
+import os
+import re
+import threading
+
+from wellness import resources
+
+# Largest allowed difference from TextBlob's polarity and subjectivity
+PARITY_TOLERANCE = 1e-12
+
+_NEGATIONS = frozenset(('no', 'not', "n't", 'never'))
+_UNICODE_QUOTES = ('“', '”', '‘', '’', "'", '"')
+
+# Bump when the snapshot layout below changes
+_TABLES_FORMAT = 1
+_TABLES_FILE = 'lexicon.json'
+
+class LexiconSentiment:
+    """Pattern-lexicon polarity and subjectivity for plain strings"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def _load(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            tables = resources.shared('sentiment-lexicon', _build_tables, version=_tables_version(),
+                                      save=_save_tables, load=_load_tables)
+            self._lexicon = tables['lexicon']
+            self._replacements = tables['replacements']
+            self._punctuation = tuple(tables['punctuation'].replace('.', ''))
+            self._trailing = self._punctuation + ('.',)
+            self._punctuation_string = tables['punctuation']
+            self._abbreviations = tables['abbreviations']
+            self._abbreviation_patterns = tables['abbreviation_patterns']
+            self._eos = tables['eos']
+            self._sarcasm = tables['sarcasm']
+            self._emoticon_pattern = tables['emoticon_pattern']
+            self._emoticons = tables['emoticons']
+            self._loaded = True
+
+    def _pattern_tokenize(self, text):
+        # Only the rare texts with emoticons or "(!)" need pattern itself, so
+        # TextBlob is imported when the first one turns up
+        from textblob.en import sentiment as pattern_sentiment
+
+        return pattern_sentiment.tokenizer(text)
+
+    def _split_token(self, token, words):
+        # pattern's leading/trailing punctuation, ellipsis and abbreviation rules
+        replace = self._replacements
+        tail = []
+        while token.startswith(self._punctuation) and token not in replace:
+            words.append(token[0])
+            token = token[1:]
+        while token.endswith(self._trailing) and token not in replace:
+            if token.endswith(self._punctuation):
+                tail.append(token[-1])
+                token = token[:-1]
+            if token.endswith('...'):
+                tail.append('...')
+                token = token[:-3].rstrip('.')
+            if token.endswith('.'):
+                if token in self._abbreviations or any(p.match(token) for p in self._abbreviation_patterns):
+                    break
+                tail.append(token[-1])
+                token = token[:-1]
+        if token != '':
+            words.append(token)
+        words.extend(reversed(tail))
+
+    def tokenize(self, text):
+        """Return the lower-cased tokens pattern's scorer would see for text"""
+        self._load()
+        original = text
+        # pattern applies these as regexes, but they are all literal strings
+        for old, new in self._replacements.items():
+            text = text.replace(old, new)
+        for quote in _UNICODE_QUOTES:
+            text = text.replace(quote, f' {quote} ')
+
+        words = []
+        for token in text.split():
+            if token.isalnum():
+                words.append(token)
+            else:
+                self._split_token(token, words)
+        # pattern drops its end-of-sentence marker along with the sentence breaks
+        if self._eos in text:
+            words = [word for word in words if word != self._eos]
+
+        # Emoticons and "(!)" are rewritten per sentence; leave those rare
+        # texts to pattern so sentence boundaries are handled identically
+        joined = ' '.join(words)
+        if self._sarcasm.search(joined) or self._emoticon_pattern.search(joined):
+            joined = ' '.join(self._pattern_tokenize(original))
+        return joined.lower().split()
+
+    def score(self, text):
+        """Return (polarity, subjectivity), equal to TextBlob(text).sentiment"""
+        self._load()
+        lexicon = self._lexicon
+
+        # [polarity, subjectivity, intensity, negated] per assessed word
+        assessments = []
+        modifier = None
+        negation = None
+        for word in self.tokenize(text):
+            entry = lexicon.get(word)
+            if entry is not None:
+                p, s, i, is_modifier = entry
+                if modifier is None:
+                    assessments.append([p, s, i, False])
+                else:
+                    last = assessments[-1]
+                    last[0] = max(-1.0, min(p * last[2], +1.0))
+                    last[1] = max(-1.0, min(s * last[2], +1.0))
+                    last[2] = i
+                if negation is not None:
+                    last = assessments[-1]
+                    last[2] = 1.0 / last[2]
+                    last[3] = True
+                modifier = word if is_modifier else None
+                negation = word if word in _NEGATIONS else None
+            else:
+                if word in _NEGATIONS:
+                    negation = word
+                elif negation and len(word.strip("'")) > 1:
+                    negation = None
+                if negation is not None and modifier is not None and modifier.endswith('ly'):
+                    assessments[-1][3] = True
+                    negation = None
+                elif modifier and len(word) > 2:
+                    modifier = None
+                if word == '!' and assessments:
+                    last = assessments[-1]
+                    last[0] = max(-1.0, min(last[0] * 1.25, +1.0))
+                if word == '(!)':
+                    assessments.append([0.0, 1.0, 1.0, False])
+                if not word.isalpha() and len(word) <= 5 and word not in self._punctuation_string:
+                    polarity = self._emoticons.get(word)
+                    if polarity is not None:
+                        assessments.append([polarity, 1.0, 1.0, False])
+
+        polarity_sum, subjectivity_sum = 0, 0
+        for p, s, _, negated in assessments:
+            # "not good" = slightly bad, "not bad" = slightly good
+            polarity_sum += p * -0.5 if negated else p
+            subjectivity_sum += s
+        count = float(len(assessments) or 1)
+        return polarity_sum / count, subjectivity_sum / count
+
+def _tables_version():
+    # Snapshots are rebuilt whenever TextBlob, and so its lexicon, changes
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        return f"{_TABLES_FORMAT}-textblob{version('textblob')}"
+    except PackageNotFoundError:
+        return f"{_TABLES_FORMAT}-textblob"
+
+def _build_tables():
+    # Everything the scorer needs from pattern, loaded through TextBlob
+    from textblob import _text
+    from textblob.en import sentiment as pattern_sentiment
+
+    pattern_sentiment.load()
+    # First matching emoticon set wins, as in pattern's loop
+    emoticons = {}
+    for (_, polarity), faces in _text.EMOTICONS.items():
+        for face in faces:
+            emoticons.setdefault(face.lower(), polarity)
+    return {
+        'lexicon': {word: (*tags[None], 'RB' in tags) for word, tags in dict.items(pattern_sentiment)},
+        'replacements': dict(_text.replacements),
+        'punctuation': _text.PUNCTUATION,
+        'abbreviations': frozenset(_text.ABBREVIATIONS),
+        'abbreviation_patterns': (_text.RE_ABBR1, _text.RE_ABBR2, _text.RE_ABBR3),
+        'eos': _text.EOS,
+        'sarcasm': _text.RE_SARCASM,
+        'emoticon_pattern': _text.RE_EMOTICONS,
+        'emoticons': emoticons,
+    }
+
+def _save_tables(tables, directory):
+    # Sets and compiled patterns become lists and [pattern, flags] pairs
+    def pattern(compiled):
+        return [compiled.pattern, compiled.flags]
+
+    with open(os.path.join(directory, _TABLES_FILE), 'w', encoding='utf-8') as f:
+        json.dump({
+            **tables,
+            'abbreviations': sorted(tables['abbreviations']),
+            'abbreviation_patterns': [pattern(p) for p in tables['abbreviation_patterns']],
+            'sarcasm': pattern(tables['sarcasm']),
+            'emoticon_pattern': pattern(tables['emoticon_pattern']),
+        }, f)
+
+def _load_tables(directory):
+    # JSON floats round-trip exactly, so scores match the built tables
+    with open(os.path.join(directory, _TABLES_FILE), encoding='utf-8') as f:
+        tables = json.load(f)
+    return {
+        **tables,
+        'lexicon': {word: tuple(entry) for word, entry in tables['lexicon'].items()},
+        'abbreviations': frozenset(tables['abbreviations']),
+        'abbreviation_patterns': tuple(re.compile(*pattern) for pattern in tables['abbreviation_patterns']),
+        'sarcasm': re.compile(*tables['sarcasm']),
+        'emoticon_pattern': re.compile(*tables['emoticon_pattern']),
+    }
+
+_ENGINE = LexiconSentiment()
+
+def lexicon_sentiment(text):
+    """Return TextBlob-equivalent (polarity, subjectivity) for text"""
+    return _ENGINE.score(text)
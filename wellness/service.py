@@ -0,0 +1,291 @@
+"""Async HTTP scoring service
+
+A dependency-free ASGI app exposing the same scoring engine as the
+Streamlit UI:
+
+    POST /score        {"text": "..."}          -> one result
+    POST /score/batch  {"texts": ["...", ...]}  -> {"results": [...]}
+    GET  /health                                -> version, rules, workers, memory per loaded resource
+    GET  /metrics                               -> Prometheus text format
+
+Either POST also accepts ``"segment": true`` to score long messages
+sentence by sentence, adding ``spans`` and ``segments`` to each result.
+
+Concurrent /score requests are coalesced into micro-batches, and all
+scoring runs off the event loop on the worker process pool. Run it with
+``python -m wellness.service`` (needs uvicorn from requirements-service.txt).
+"""
+import argparse
+import asyncio
+import functools
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from wellness import metrics, parallel, resources, rules, scoring, segments
+
+MAX_MICRO_BATCH = int(os.environ.get('WELLNESS_MAX_MICRO_BATCH', 64))
+BATCH_WINDOW_MS = float(os.environ.get('WELLNESS_BATCH_WINDOW_MS', 5))
+MAX_BULK_MESSAGES = int(os.environ.get('WELLNESS_MAX_BULK_MESSAGES', 10000))
+MAX_BODY_BYTES = 10 * 1024 * 1024
+
+class MicroBatcher:
+    """Coalesce concurrent single-message requests into batches
+
+    Requests arriving within ``max_wait`` seconds of the first one in a batch
+    (up to ``max_batch_size``) are scored together by ``score``, a blocking
+    callable taking a list of texts and returning a score_batch frame. At most
+    ``max_in_flight`` batches are scored at once; further requests queue up.
+    """
+
+    def __init__(self, score, executor, max_batch_size=MAX_MICRO_BATCH,
+                 max_wait=BATCH_WINDOW_MS / 1000, max_in_flight=4):
+        self.score = score
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._queue = asyncio.Queue()
+        self._tasks = set()
+        self._collector = asyncio.get_running_loop().create_task(self._collect())
+
+    async def submit(self, text):
+        """Score one text, returning its (emotion, severity, polarity, subjectivity)"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def close(self):
+        self._collector.cancel()
+        for task in list(self._tasks):
+            task.cancel()
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Wait for a free slot before collecting more, so a backlog queues
+            # here instead of piling up in the executor
+            await self._slots.acquire()
+            task = loop.create_task(self._dispatch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch):
+        try:
+            texts = [text for text, _ in batch]
+            results = await asyncio.get_running_loop().run_in_executor(self.executor, self.score, texts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for (_, future), result in zip(batch, results.itertuples(index=False, name=None)):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self._slots.release()
+
+class HTTPError(Exception):
+    def __init__(self, status, message, **details):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.details = details
+
+def _result_json(result):
+    emotion, severity, polarity, subjectivity, rules_version = result
+    return {
+        'emotion': emotion,
+        'severity': severity,
+        'polarity': float(polarity),
+        'subjectivity': float(subjectivity),
+        'rules_version': rules_version,
+    }
+
+def _segmented_json(result):
+    *scores, spans, segment_count = result
+    return {**_result_json(scores), 'spans': [[int(start), int(end)] for start, end in spans],
+            'segments': int(segment_count)}
+
+class ScoringService:
+    """ASGI application serving the scoring endpoints"""
+
+    def __init__(self, workers=None, max_batch_size=MAX_MICRO_BATCH, batch_window_ms=BATCH_WINDOW_MS):
+        self.workers = workers or parallel.DEFAULT_WORKERS
+        self.max_batch_size = max_batch_size
+        self.batch_window_ms = batch_window_ms
+        # Threads only wait on the process pool (or score in-process when
+        # workers == 1), keeping CPU-bound work off the event loop
+        self._executor = ThreadPoolExecutor(max_workers=max(2, self.workers * 2),
+                                            thread_name_prefix='wellness-score')
+        self._batcher = None
+        self._routes = {
+            ('POST', '/score'): self._score_one,
+            ('POST', '/score/batch'): self._score_many,
+            ('GET', '/health'): self._health,
+            ('GET', '/metrics'): self._metrics,
+        }
+
+    def _score_micro_batch(self, texts):
+        metrics.inc('messages_scored_total', len(texts))
+        metrics.inc('batches_scored_total')
+        return self._score_texts(texts)
+
+    def _score_texts(self, texts):
+        with metrics.timer('micro_batch'):
+            if self.workers <= 1:
+                return scoring.score_batch(texts)
+            return scoring.score_batch(texts, scorer=lambda pending: parallel.score_on_pool(pending, self.workers))
+
+    def _batcher_for_loop(self):
+        if self._batcher is None:
+            self._batcher = MicroBatcher(
+                self._score_micro_batch, self._executor,
+                max_batch_size=self.max_batch_size,
+                max_wait=self.batch_window_ms / 1000,
+                max_in_flight=self.workers * 2,
+            )
+        return self._batcher
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        try:
+            handler = self._routes.get((scope['method'], scope['path']))
+            if handler is None:
+                if any(path == scope['path'] for _, path in self._routes):
+                    raise HTTPError(405, 'Method not allowed')
+                raise HTTPError(404, 'Not found')
+            status, payload = 200, await handler(await self._read_json(scope, receive))
+        except HTTPError as e:
+            status, payload = e.status, {'error': e.message, **e.details}
+
+        if isinstance(payload, str):
+            body, content_type = payload.encode('utf-8'), b'text/plain; version=0.0.4'
+        else:
+            body, content_type = json.dumps(payload).encode('utf-8'), b'application/json'
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', content_type), (b'content-length', str(len(body)).encode())],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self._batcher is not None:
+                    await self._batcher.close()
+                self._executor.shutdown(wait=False)
+                parallel.shutdown_pools()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _read_json(self, scope, receive):
+        if scope['method'] == 'GET':
+            return None
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > MAX_BODY_BYTES:
+                raise HTTPError(413, 'Request body too large')
+            chunks.append(chunk)
+            if not message.get('more_body'):
+                break
+        try:
+            return json.loads(b''.join(chunks) or b'null')
+        except ValueError:
+            raise HTTPError(400, 'Request body must be JSON')
+
+    async def _score_one(self, body):
+        text = body.get('text') if isinstance(body, dict) else None
+        if not isinstance(text, str) or not text.strip():
+            raise HTTPError(400, 'Expected {"text": "<message>"}')
+        if body.get('segment'):
+            # Counted as one message, however many segments it has
+            metrics.inc('messages_scored_total')
+            metrics.inc('batches_scored_total')
+            results = await asyncio.get_running_loop().run_in_executor(
+                self._executor, lambda: segments.score_segmented([text], scorer=self._score_texts)
+            )
+            return {**_segmented_json(next(results.itertuples(index=False, name=None))),
+                    'version': scoring.scoring_version()}
+        result = await self._batcher_for_loop().submit(text)
+        return {**_result_json(result), 'version': scoring.scoring_version()}
+
+    async def _score_many(self, body):
+        texts = body.get('texts') if isinstance(body, dict) else None
+        if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+            raise HTTPError(400, 'Expected {"texts": ["<message>", ...]}')
+        if len(texts) > MAX_BULK_MESSAGES:
+            raise HTTPError(422, f'At most {MAX_BULK_MESSAGES} texts per request', limit=MAX_BULK_MESSAGES)
+        metrics.inc('messages_scored_total', len(texts))
+        metrics.inc('batches_scored_total')
+        loop = asyncio.get_running_loop()
+        segment = bool(body.get('segment'))
+
+        def score():
+            score_texts = functools.partial(parallel.score_parallel, workers=self.workers)
+            return segments.score_segmented(texts, scorer=score_texts) if segment else score_texts(texts)
+
+        with metrics.timer('bulk'):
+            results = await loop.run_in_executor(self._executor, score)
+        to_json = _segmented_json if segment else _result_json
+        return {
+            'results': [to_json(result) for result in results.itertuples(index=False, name=None)],
+            'version': scoring.scoring_version(),
+        }
+
+    async def _health(self, body):
+        return {'status': 'ok', 'version': scoring.scoring_version(), 'workers': self.workers,
+                'rules': rules.status(), 'resources': resources.report(), 'memory': resources.process_memory()}
+
+    async def _metrics(self, body):
+        return metrics.render_prometheus()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m wellness.service', description='Serve the scoring API over HTTP.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('-w', '--workers', type=int, default=parallel.DEFAULT_WORKERS,
+                        help='scoring worker processes (default: %(default)s)')
+    parser.add_argument('--max-batch', type=int, default=MAX_MICRO_BATCH,
+                        help='largest micro-batch of single requests (default: %(default)s)')
+    parser.add_argument('--batch-window-ms', type=float, default=BATCH_WINDOW_MS,
+                        help='how long to wait for more requests to join a micro-batch (default: %(default)s)')
+    parser.add_argument('--metrics', action='store_true',
+                        help='collect per-stage timings for GET /metrics (also enabled by WELLNESS_METRICS=1)')
+    args = parser.parse_args(argv)
+    if args.metrics:
+        metrics.enable()
+
+    try:
+        import uvicorn
+    except ImportError:
+        parser.exit(1, 'The scoring service needs uvicorn: pip install -r requirements-service.txt\n')
+
+    app = ScoringService(workers=args.workers, max_batch_size=args.max_batch, batch_window_ms=args.batch_window_ms)
+    uvicorn.run(app, host=args.host, port=args.port, lifespan='on')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+"""Persistent SQLite store of scoring results
+
+Sits behind the in-memory ResultCache so results survive restarts and are
+shared by every process pointed at the same file. Run
+``python -m wellness.store --help`` to inspect or purge a store.
+"""
+import argparse
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_STORE_PATH = os.environ.get(
+    'WELLNESS_STORE_PATH',
+    os.path.join(os.path.expanduser('~'), '.cache', 'mental-wellness-detector', 'results.sqlite3'),
+)
+DEFAULT_MAX_MB = float(os.environ.get('WELLNESS_STORE_MAX_MB', 512))
+
+# SQLite caps the number of bound parameters per statement
+_BATCH = 500
+
+# Eviction trims the store to this fraction of its size limit
+_EVICT_TARGET = 0.9
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key BLOB PRIMARY KEY,
+    version TEXT NOT NULL,
+    emotion TEXT NOT NULL,
+    severity TEXT NOT NULL,
+    polarity REAL NOT NULL,
+    subjectivity REAL NOT NULL,
+    last_used REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used);
+CREATE INDEX IF NOT EXISTS results_version ON results (version);
+"""
+
+class ResultStore:
+    """Key/value store of result tuples backed by a SQLite file
+
+    Uses the same keys and ``(emotion, severity, polarity, subjectivity)``
+    tuples as ResultCache. Rows written are tagged with ``version``, or
+    what it returns if it is callable, so results from older scoring
+    versions can be purged. Once the database
+    grows past ``max_mb`` the least recently used rows are evicted.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH, version='', max_mb=DEFAULT_MAX_MB):
+        self.path = path
+        self.version = version
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def get_many(self, keys):
+        """Return a list with the stored result or None for each key"""
+        found = {}
+        now = time.time()
+        with self._lock:
+            for start in range(0, len(keys), _BATCH):
+                batch = keys[start:start + _BATCH]
+                marks = ','.join('?' * len(batch))
+                rows = self._conn.execute(
+                    f'SELECT key, emotion, severity, polarity, subjectivity FROM results WHERE key IN ({marks})',
+                    batch,
+                ).fetchall()
+                for key, *result in rows:
+                    found[key] = tuple(result)
+                if rows:
+                    hit_keys = [row[0] for row in rows]
+                    self._conn.execute(
+                        f'UPDATE results SET last_used = ? WHERE key IN ({",".join("?" * len(hit_keys))})',
+                        [now, *hit_keys],
+                    )
+            results = [found.get(key) for key in keys]
+            hits = sum(result is not None for result in results)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return results
+
+    def put_many(self, items):
+        now = time.time()
+        version = self.version() if callable(self.version) else self.version
+        rows = [(key, version, *result, now) for key, result in items]
+        if not rows:
+            return
+        with self._lock:
+            with self._conn:
+                self._conn.execute('BEGIN')
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)', rows
+                )
+            self._evict_if_needed()
+
+    def _used_bytes(self):
+        page_size, = self._conn.execute('PRAGMA page_size').fetchone()
+        page_count, = self._conn.execute('PRAGMA page_count').fetchone()
+        free_pages, = self._conn.execute('PRAGMA freelist_count').fetchone()
+        return (page_count - free_pages) * page_size
+
+    def _evict_if_needed(self):
+        used = self._used_bytes()
+        if used <= self.max_bytes:
+            return
+        count, = self._conn.execute('SELECT COUNT(*) FROM results').fetchone()
+        excess = int(count * (1 - _EVICT_TARGET * self.max_bytes / used)) + 1
+        self._conn.execute(
+            'DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY last_used LIMIT ?)',
+            (excess,),
+        )
+
+    def purge(self, keep_version=None):
+        """Delete every row, or only rows not tagged with ``keep_version``
+
+        Returns the number of rows removed.
+        """
+        with self._lock:
+            if keep_version is None:
+                cursor = self._conn.execute('DELETE FROM results')
+            else:
+                cursor = self._conn.execute('DELETE FROM results WHERE version != ?', (keep_version,))
+            self._conn.execute('VACUUM')
+            return cursor.rowcount
+
+    def stats(self):
+        """Return size, per-version row counts and hit/miss counters"""
+        with self._lock:
+            versions = dict(self._conn.execute(
+                'SELECT version, COUNT(*) FROM results GROUP BY version ORDER BY version'
+            ).fetchall())
+            oldest, newest = self._conn.execute('SELECT MIN(last_used), MAX(last_used) FROM results').fetchone()
+            lookups = self.hits + self.misses
+            return {
+                'path': self.path,
+                'entries': sum(versions.values()),
+                'versions': versions,
+                'used_bytes': self._used_bytes(),
+                'max_bytes': self.max_bytes,
+                'oldest_use': oldest,
+                'newest_use': newest,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m wellness.store',
+                                     description='Inspect or purge the persistent result store.')
+    parser.add_argument('--path', default=DEFAULT_STORE_PATH, help='store file (default: %(default)s)')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('stats', help='show entry counts and size')
+    purge = commands.add_parser('purge', help='delete stored results')
+    purge.add_argument('--stale', action='store_true',
+                       help='only delete results from scoring versions other than the current one')
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.path):
+        parser.exit(1, f'No result store at {args.path}\n')
+    store = ResultStore(args.path)
+
+    if args.command == 'stats':
+        stats = store.stats()
+        print(f"Path:     {stats['path']}")
+        print(f"Entries:  {stats['entries']}")
+        print(f"Size:     {stats['used_bytes'] / 1024 / 1024:.1f} MB of {stats['max_bytes'] / 1024 / 1024:.0f} MB")
+        for version, count in stats['versions'].items():
+            print(f"Version {version}: {count}")
+        if stats['entries']:
+            print(f"Last used: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(stats['newest_use']))}")
+    else:
+        keep = None
+        if args.stale:
+            from wellness.scoring import scoring_version
+            keep = scoring_version()
+        removed = store.purge(keep_version=keep)
+        print(f"Removed {removed} results from {args.path}")
+    store.close()
+
+if __name__ == '__main__':
+    main()
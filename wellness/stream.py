@@ -0,0 +1,575 @@
+"""Streaming ingestion with critical alerts
+
+Scores messages as they are appended to a source instead of after an upload:
+
+    python -m wellness.stream messages.jsonl             # follow a growing JSONL, CSV or TXT file
+    tail -F chat.log | python -m wellness.stream - --format txt
+    python -m wellness.stream unix:/run/wellness.sock    # accept newline-delimited writers
+
+Each source is read on its own thread into a bounded queue. When scoring
+falls behind, the queue fills and the readers block: a followed file is
+simply read later, and socket writers block on a full buffer. Memory
+therefore stays bounded however fast messages arrive. Queued messages are
+scored in micro-batches, each dispatched no later than ``max_delay`` seconds
+after its first message arrived (sooner when ``max_batch`` messages are
+waiting).
+
+Alerts are raised for every depression/critical message, and for a user
+whose severity points (SEVERITY_POINTS) within the sliding window reach the
+threshold; a user alert is raised again only after their points have dropped
+back below it. Alerts are handed to hooks on a separate thread so a slow
+webhook never holds up scoring: when hooks fall ALERT_QUEUE_SIZE alerts
+behind, further alerts are dropped, counted and reported rather than waited
+for. Every alert is logged to stderr before it is queued, and logged again
+marked ``dropped`` if it is, so none goes unrecorded. Any alert later than ALERT_BUDGET seconds after its message arrived is
+reported too.
+"""
+import argparse
+import csv
+import json
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from wellness import metrics, parallel, scoring
+from wellness.ingest import find_context_columns, find_text_column
+from wellness.pipeline import MIN_MESSAGE_LENGTH
+
+# Messages scored together at most, and the longest a message waits for others
+MAX_STREAM_BATCH = int(os.environ.get('WELLNESS_STREAM_MAX_BATCH', 256))
+MAX_DELAY = float(os.environ.get('WELLNESS_STREAM_MAX_DELAY', 0.25))
+# Parsed messages waiting to be scored before readers block
+QUEUE_SIZE = int(os.environ.get('WELLNESS_STREAM_QUEUE_SIZE', 10000))
+# Seconds between checks of a followed file for new lines
+POLL_INTERVAL = 0.1
+
+# Sliding-window alerting per user
+ALERT_WINDOW = float(os.environ.get('WELLNESS_ALERT_WINDOW', 3600))
+ALERT_THRESHOLD = float(os.environ.get('WELLNESS_ALERT_THRESHOLD', 6))
+# Seconds from a message arriving to its alert reaching the hooks
+ALERT_BUDGET = float(os.environ.get('WELLNESS_ALERT_BUDGET', 1.0))
+ALERT_HOOK_TIMEOUT = 10
+# Alerts waiting for the hooks before new ones are dropped
+ALERT_QUEUE_SIZE = int(os.environ.get('WELLNESS_ALERT_QUEUE_SIZE', 1000))
+LATE_REPORT_INTERVAL = 10
+SEVERITY_POINTS = {'critical': 3, 'high': 2, 'moderate': 1}
+
+FORMATS = ('jsonl', 'csv', 'txt')
+_FORMAT_EXTENSIONS = {'.jsonl': 'jsonl', '.ndjson': 'jsonl', '.json': 'jsonl', '.csv': 'csv'}
+
+_DONE = object()  # queued by a source when it has no more messages
+
+class LineParser:
+    """Turn raw lines of one source into (text, timestamp, user_id, arrived) records
+
+    JSONL lines may be objects (text, timestamp and user columns are found
+    like file headers) or bare strings. CSV takes its header from the first
+    line, so each file or connection needs its own parser; quoted fields
+    spanning several lines are not supported.
+    """
+
+    def __init__(self, fmt):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported stream format: {fmt}")
+        self.fmt = fmt
+        self.header = None
+
+    def reset(self):
+        self.header = None
+
+    def parse(self, line):
+        """Return a record, or None for blank, header, malformed or too-short lines"""
+        arrived = time.monotonic()
+        line = line.rstrip('\r\n')
+        if not line.strip():
+            return None
+        timestamp = user_id = None
+        if self.fmt == 'txt':
+            text = line
+        elif self.fmt == 'csv':
+            row = next(csv.reader([line]))
+            if self.header is None:
+                self.header = (row, self._columns(row))
+                return None
+            fields = dict(zip(self.header[0], row))
+            text, timestamp, user_id = (fields.get(column) for column in self.header[1])
+        else:
+            try:
+                value = json.loads(line)
+            except ValueError:
+                metrics.inc('stream_skipped_total')
+                return None
+            if isinstance(value, dict) and value:
+                text_column, timestamp_column, user_column = self._columns(list(value))
+                text, timestamp, user_id = value.get(text_column), value.get(timestamp_column), value.get(user_column)
+            elif isinstance(value, str):
+                text = value
+            else:
+                metrics.inc('stream_skipped_total')
+                return None
+        if text is None or len(str(text).strip()) <= MIN_MESSAGE_LENGTH:
+            return None
+        return (str(text), None if timestamp is None else str(timestamp),
+                None if user_id is None else str(user_id), arrived)
+
+    @staticmethod
+    def _columns(columns):
+        text_column = find_text_column(columns)
+        context = find_context_columns(columns, text_column)
+        return text_column, context.get('timestamp'), context.get('user_id')
+
+def source_format(source):
+    """Return the stream format implied by a source: jsonl for sockets, else from the file extension, else txt"""
+    if source.startswith('unix:'):
+        return 'jsonl'
+    return _FORMAT_EXTENSIONS.get(os.path.splitext(source)[1].lower(), 'txt')
+
+def follow_file(path, from_start=False, follow=True, keep_header=False, stop=None, poll_interval=POLL_INTERVAL):
+    """Yield complete lines appended to a file, like ``tail -F``
+
+    Starts at the end of the file unless ``from_start``; ``keep_header``
+    still yields its first line. Yields None whenever the file is (re)opened,
+    so callers can reset per-file state, and reopens it from the start when
+    it is truncated or replaced. Without ``follow``, stops at the end of the
+    file.
+    """
+    stop = stop or threading.Event()
+    reopened = False
+    while not stop.is_set():
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            if not follow:
+                return
+            stop.wait(poll_interval)
+            continue
+        with f:
+            yield None
+            if not (from_start or reopened):
+                if keep_header:
+                    header = f.readline()
+                    if header.endswith(b'\n'):
+                        yield header.decode('utf-8', errors='replace')
+                f.seek(0, os.SEEK_END)
+            pending = b''
+            while not stop.is_set():
+                line = f.readline()
+                if line:
+                    pending += line
+                    if pending.endswith(b'\n'):
+                        yield pending.decode('utf-8', errors='replace')
+                        pending = b''
+                    continue
+                if not follow:
+                    if pending:
+                        yield pending.decode('utf-8', errors='replace')
+                    return
+                try:
+                    current = os.stat(path)
+                except FileNotFoundError:
+                    current = None
+                if current is not None and (current.st_ino != os.fstat(f.fileno()).st_ino
+                                            or current.st_size < f.tell()):
+                    break
+                stop.wait(poll_interval)
+        reopened = True
+
+def _put(messages, item, stop):
+    # Block while the queue is full (backpressure), but give up on shutdown
+    while not stop.is_set():
+        try:
+            messages.put(item, timeout=POLL_INTERVAL)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def _feed(lines, parser, messages, stop):
+    for line in lines:
+        if line is None:
+            parser.reset()
+            continue
+        record = parser.parse(line)
+        if record is not None and not _put(messages, record, stop):
+            return
+
+class AlertMonitor:
+    """Decide which scored messages raise alerts"""
+
+    def __init__(self, window=ALERT_WINDOW, threshold=ALERT_THRESHOLD):
+        self.window = window
+        self.threshold = threshold
+        self._events = {}       # user id -> deque of (event time, points)
+        self._points = {}       # user id -> points within the window
+        self._alerted = set()   # users at or over the threshold
+        self._checks = 0
+
+    def check(self, result, event_time):
+        """Return the alerts raised by one scored message (a dict of result fields)"""
+        alerts = []
+        if result['emotion'] == 'depression' and result['severity'] == 'critical':
+            alerts.append(dict(result, alert='critical_message'))
+
+        user_id = result.get('user_id')
+        points = SEVERITY_POINTS.get(result['severity'], 0)
+        if user_id is None or (points == 0 and user_id not in self._events):
+            return alerts
+        events = self._events.setdefault(user_id, deque())
+        total = self._points.get(user_id, 0)
+        if points:
+            events.append((event_time, points))
+            total += points
+        newest = max(event_time, events[-1][0]) if events else event_time
+        while events and events[0][0] <= newest - self.window:
+            total -= events.popleft()[1]
+        self._points[user_id] = total
+
+        if total >= self.threshold and user_id not in self._alerted:
+            self._alerted.add(user_id)
+            alerts.append(dict(result, alert='user_window', window_points=total, window_seconds=self.window))
+        elif total < self.threshold:
+            self._alerted.discard(user_id)
+            if not events:
+                del self._events[user_id], self._points[user_id]
+
+        self._checks += 1
+        if self._checks % 10000 == 0:
+            self._forget_idle(event_time)
+        return alerts
+
+    def _forget_idle(self, now):
+        # Drop users with nothing left in their window so memory tracks active users
+        for user_id in [user for user, events in self._events.items() if events[-1][0] <= now - self.window]:
+            del self._events[user_id], self._points[user_id]
+            self._alerted.discard(user_id)
+
+def log_hook(alert):
+    """Write the alert to stderr as one JSON line"""
+    print(json.dumps(alert), file=sys.stderr, flush=True)
+
+def command_hook(command):
+    """Return a hook that runs a shell command with the alert JSON on stdin"""
+    import subprocess
+
+    def hook(alert):
+        subprocess.run(command, shell=True, input=json.dumps(alert).encode('utf-8'),
+                       timeout=ALERT_HOOK_TIMEOUT, check=True)
+    return hook
+
+def webhook_hook(url):
+    """Return a hook that POSTs the alert JSON to url"""
+    import urllib.request
+
+    def hook(alert):
+        request = urllib.request.Request(url, data=json.dumps(alert).encode('utf-8'),
+                                         headers={'Content-Type': 'application/json'}, method='POST')
+        with urllib.request.urlopen(request, timeout=ALERT_HOOK_TIMEOUT):
+            pass
+    return hook
+
+class AlertDispatcher:
+    """Call alert hooks on a background thread, in the order alerts were raised
+
+    ``log`` is called with every alert before it is queued, on the caller's
+    thread, so an alert dropped because the hooks are behind is still logged
+    (marked ``dropped``).
+    """
+
+    def __init__(self, hooks, budget=ALERT_BUDGET, queue_size=ALERT_QUEUE_SIZE, log=log_hook):
+        self.hooks = list(hooks)
+        self.log = log
+        self.budget = budget
+        self.sent = 0
+        self.late = 0
+        self.dropped = 0
+        self._last_late_report = float('-inf')
+        self._last_drop_report = float('-inf')
+        self._queue = queue.Queue(queue_size)
+        self._thread = threading.Thread(target=self._run, name='wellness-alerts', daemon=True)
+        self._thread.start()
+
+    def send(self, alert, arrived):
+        # Log first so no alert goes unrecorded, then never block the scoring loop on slow hooks
+        if self.log is not None:
+            self.log(dict(alert, latency_seconds=round(time.monotonic() - arrived, 4)))
+        try:
+            self._queue.put_nowait((dict(alert), arrived))
+        except queue.Full:
+            metrics.inc('alerts_dropped_total')
+            self.dropped += 1
+            if self.log is not None:
+                self.log(dict(alert, dropped=True))
+            if time.monotonic() - self._last_drop_report >= LATE_REPORT_INTERVAL:
+                print(f"{self.dropped:,} alerts dropped so far: alert hooks are "
+                      f"{self._queue.maxsize:,} alerts behind", file=sys.stderr)
+                self._last_drop_report = time.monotonic()
+
+    def close(self):
+        self._queue.put(_DONE)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _DONE:
+                return
+            alert, arrived = item
+            latency = time.monotonic() - arrived
+            alert['latency_seconds'] = round(latency, 4)
+            metrics.inc('alerts_total')
+            metrics.observe('alert_latency_seconds', latency)
+            if latency > self.budget:
+                metrics.inc('alerts_over_budget_total')
+                self.late += 1
+                # A backlog makes every alert late; report it every few seconds, not per alert
+                if time.monotonic() - self._last_late_report >= LATE_REPORT_INTERVAL:
+                    print(f"{self.late:,} alerts over the {self.budget:g}s budget so far "
+                          f"(latest took {latency:.2f}s)", file=sys.stderr)
+                    self._last_late_report = time.monotonic()
+            for hook in self.hooks:
+                try:
+                    hook(alert)
+                except Exception as e:
+                    metrics.inc('alert_hook_errors_total')
+                    print(f"Alert hook failed: {e}", file=sys.stderr)
+            self.sent += 1
+
+def _event_time(timestamp):
+    # Windows follow message timestamps when they parse, else arrival time
+    if timestamp:
+        try:
+            return datetime.fromisoformat(timestamp).timestamp()
+        except ValueError:
+            try:
+                return float(timestamp)
+            except ValueError:
+                pass
+    return time.time()
+
+class StreamScorer:
+    """Score messages from one or more streaming sources as they arrive
+
+    ``emit`` is called with a dict per scored message (message, timestamp,
+    user_id and the score_batch columns), and alerts are sent through
+    ``alerts``, an AlertDispatcher.
+    """
+
+    def __init__(self, emit=None, alerts=None, monitor=None, workers=1, max_batch=MAX_STREAM_BATCH,
+                 max_delay=MAX_DELAY, queue_size=QUEUE_SIZE):
+        self.emit = emit
+        self.alerts = alerts
+        self.monitor = monitor or AlertMonitor()
+        self.workers = workers
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.scored = 0
+        self.stop = threading.Event()
+        self._messages = queue.Queue(queue_size)
+        self._sources = []
+        self._servers = []
+
+    def add_source(self, source, fmt=None, from_start=False, follow=True):
+        """Start reading a file path, '-' for stdin or ``unix:PATH`` for a listening socket"""
+        fmt = fmt or source_format(source)
+        parser = LineParser(fmt)  # validate the format before starting threads
+        if source == '-':
+            target, args = self._read_lines, (sys.stdin, parser)
+        elif source.startswith('unix:'):
+            target, args = self._serve_unix, (source[len('unix:'):], fmt)
+        else:
+            if not follow and not os.path.exists(source):
+                raise FileNotFoundError(f"No such file: {source}")
+            lines = follow_file(source, from_start=from_start, follow=follow,
+                                keep_header=fmt == 'csv', stop=self.stop)
+            target, args = self._read_lines, (lines, parser)
+        thread = threading.Thread(target=self._run_source, args=(target, args),
+                                  name=f'wellness-stream-{len(self._sources)}', daemon=True)
+        self._sources.append(thread)
+        thread.start()
+
+    def _run_source(self, target, args):
+        try:
+            target(*args)
+        except Exception as e:
+            print(f"Stream source failed: {e}", file=sys.stderr)
+        finally:
+            _put(self._messages, _DONE, self.stop)
+
+    def _read_lines(self, lines, parser):
+        _feed(lines, parser, self._messages, self.stop)
+
+    def _serve_unix(self, path, fmt):
+        import socketserver
+
+        messages, stop = self._messages, self.stop
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                lines = (line.decode('utf-8', errors='replace') for line in self.rfile)
+                _feed(lines, LineParser(fmt), messages, stop)
+
+        if os.path.exists(path):
+            os.unlink(path)
+        server = socketserver.ThreadingUnixStreamServer(path, Handler)
+        server.daemon_threads = True
+        self._servers.append(server)
+        try:
+            server.serve_forever(poll_interval=POLL_INTERVAL)
+        finally:
+            server.server_close()
+            os.unlink(path)
+
+    def close(self):
+        """Stop reading; run() scores what is already queued and returns"""
+        self.stop.set()
+        for server in self._servers:
+            server.shutdown()
+
+    def run(self):
+        """Score messages until every source has ended or close() is called"""
+        active = len(self._sources)
+        while active:
+            try:
+                first = self._messages.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                if self.stop.is_set():
+                    break
+                continue
+            if first is _DONE:
+                active -= 1
+                continue
+            batch = [first]
+            deadline = first[3] + self.max_delay
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                try:
+                    item = self._messages.get(timeout=timeout) if timeout > 0 else self._messages.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _DONE:
+                    active -= 1
+                    continue
+                batch.append(item)
+            self._score(batch)
+        # Score whatever the readers queued before stopping
+        leftover = []
+        while True:
+            try:
+                item = self._messages.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _DONE:
+                leftover.append(item)
+        for start in range(0, len(leftover), self.max_batch):
+            self._score(leftover[start:start + self.max_batch])
+
+    def _score(self, batch):
+        texts = [record[0] for record in batch]
+        with metrics.timer('stream'):
+            if self.workers <= 1:
+                results = scoring.score_batch(texts)
+            else:
+                results = scoring.score_batch(texts, scorer=lambda pending: parallel.score_on_pool(pending, self.workers))
+        metrics.inc('messages_scored_total', len(batch))
+        metrics.inc('batches_scored_total')
+        for (text, timestamp, user_id, arrived), (emotion, severity, polarity, subjectivity, rules_version) in zip(
+                batch, results.itertuples(index=False, name=None)):
+            result = {
+                'message': text,
+                'timestamp': timestamp,
+                'user_id': user_id,
+                'emotion': emotion,
+                'severity': severity,
+                'polarity': float(polarity),
+                'subjectivity': float(subjectivity),
+                'rules_version': rules_version,
+            }
+            if self.alerts is not None and (severity in SEVERITY_POINTS or user_id is not None):
+                for alert in self.monitor.check(result, _event_time(timestamp)):
+                    self.alerts.send(alert, arrived)
+            if self.emit is not None:
+                self.emit(result)
+        self.scored += len(batch)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m wellness.stream',
+                                     description='Score messages as they arrive and raise critical alerts.')
+    parser.add_argument('sources', nargs='+', metavar='SOURCE',
+                        help="file to follow, '-' for stdin, or unix:PATH to listen on a Unix socket")
+    parser.add_argument('--format', choices=FORMATS,
+                        help='message format (default: jsonl for sockets, else from the file extension, else txt)')
+    parser.add_argument('--from-start', action='store_true', help='read files from the start instead of the end')
+    parser.add_argument('--no-follow', action='store_true', help='stop at the end of each file')
+    parser.add_argument('-o', '--output', default='-',
+                        help="write scored messages as JSON lines to this file ('-' for stdout, default)")
+    parser.add_argument('--alerts-only', action='store_true', help="don't write scored messages")
+    parser.add_argument('--alert-command', metavar='CMD', help='run CMD with each alert as JSON on stdin')
+    parser.add_argument('--alert-webhook', metavar='URL', help='POST each alert as JSON to URL')
+    parser.add_argument('--window', type=float, default=ALERT_WINDOW,
+                        help='seconds in the per-user alert window (default: %(default)s)')
+    parser.add_argument('--threshold', type=float, default=ALERT_THRESHOLD,
+                        help='severity points within the window that raise a user alert (default: %(default)s)')
+    parser.add_argument('--max-delay', type=float, default=MAX_DELAY,
+                        help='longest a message waits to be batched, in seconds (default: %(default)s)')
+    parser.add_argument('--max-batch', type=int, default=MAX_STREAM_BATCH,
+                        help='messages scored together at most (default: %(default)s)')
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help='worker processes for scoring (default: %(default)s, score in-process)')
+    parser.add_argument('--metrics', metavar='PATH',
+                        help="write timings, counters and alert latency in Prometheus text format on exit ('-' for stderr)")
+    args = parser.parse_args(argv)
+
+    if args.metrics:
+        metrics.enable()
+    hooks = []
+    if args.alert_command:
+        hooks.append(command_hook(args.alert_command))
+    if args.alert_webhook:
+        hooks.append(webhook_hook(args.alert_webhook))
+
+    output = None
+    if not args.alerts_only:
+        output = sys.stdout if args.output == '-' else open(args.output, 'a', encoding='utf-8')
+
+    def emit(result):
+        output.write(json.dumps(result) + '\n')
+        output.flush()
+
+    alerts = AlertDispatcher(hooks)
+    scorer = StreamScorer(emit=emit if output else None, alerts=alerts,
+                          monitor=AlertMonitor(args.window, args.threshold), workers=args.workers,
+                          max_batch=args.max_batch, max_delay=args.max_delay)
+    signal.signal(signal.SIGTERM, lambda *_: scorer.close())
+    # Load the lexicons now so the first alert isn't held up by them
+    scoring.warm_up()
+    try:
+        for source in args.sources:
+            scorer.add_source(source, fmt=args.format, from_start=args.from_start, follow=not args.no_follow)
+    except (ValueError, OSError) as e:
+        parser.error(str(e))
+    try:
+        scorer.run()
+    except KeyboardInterrupt:
+        scorer.close()
+        scorer.run()
+    finally:
+        alerts.close()
+        if output is not None and output is not sys.stdout:
+            output.close()
+
+    print(f"Scored {scorer.scored:,} messages, {alerts.sent:,} alerts ({alerts.late:,} over budget, "
+          f"{alerts.dropped:,} dropped)", file=sys.stderr)
+    if args.metrics == '-':
+        sys.stderr.write(metrics.render_prometheus())
+    elif args.metrics:
+        with open(args.metrics, 'w') as f:
+            f.write(metrics.render_prometheus())
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,47 @@
+"""Running emotion and severity counts over streamed result batches
+
+Each batch is folded into a small emotion x severity count matrix in one
+pass, so totals and chart data are available at any point without keeping or
+re-scanning the per-message rows.
+"""
+from wellness.scoring import EMOTIONS, SEVERITIES
+
+class ResultSummary:
+    """Emotion x severity counts, updated one result batch at a time"""
+
+    def __init__(self, counts=None):
+        import numpy as np
+
+        if counts is None:
+            counts = np.zeros((len(EMOTIONS), len(SEVERITIES)), dtype=np.int64)
+        self.counts = counts
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+    def update(self, emotions, severities):
+        """Add a batch of emotion and severity labels"""
+        import numpy as np
+        import pandas as pd
+
+        emotion_codes = pd.Index(EMOTIONS).get_indexer(np.asarray(emotions, dtype=object)).astype(np.int64)
+        severity_codes = pd.Index(SEVERITIES).get_indexer(np.asarray(severities, dtype=object)).astype(np.int64)
+        # Labels outside the fixed sets have code -1 and are not counted
+        known = (emotion_codes >= 0) & (severity_codes >= 0)
+        cells = emotion_codes[known] * len(SEVERITIES) + severity_codes[known]
+        self.counts += np.bincount(cells, minlength=self.counts.size).reshape(self.counts.shape)
+
+    def emotion_counts(self):
+        """Return {emotion: count} for every emotion, in EMOTIONS order"""
+        return dict(zip(EMOTIONS, self.counts.sum(axis=1).tolist()))
+
+    def severity_table(self):
+        """Return a long (Severity, Emotion, Count) frame of the non-zero cells"""
+        import pandas as pd
+
+        rows = [(severity, emotion, int(self.counts[i, j]))
+                for i, emotion in enumerate(EMOTIONS)
+                for j, severity in enumerate(SEVERITIES)
+                if self.counts[i, j]]
+        return pd.DataFrame(rows, columns=['Severity', 'Emotion', 'Count'])
@@ -0,0 +1,108 @@
+"""Train a linear emotion model from labelled messages
+
+    python -m wellness.train labelled.csv -o models/emotion
+
+See wellness.linear for the model itself.
+"""
+import argparse
+import os
+import sys
+
+from wellness.cache import normalize_text
+from wellness.ingest import find_text_column
+from wellness.linear import DEFAULT_FEATURE_BITS, DEFAULT_NGRAMS, save_model, train_model
+
+def _read_labelled(path):
+    import pandas as pd
+
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        return pd.read_csv(path)
+    if extension in ('.xlsx', '.xls'):
+        return pd.read_excel(path)
+    if extension == '.parquet':
+        return pd.read_parquet(path)
+    if extension in ('.feather', '.arrow'):
+        return pd.read_feather(path)
+    raise ValueError("Unsupported file format. Use a CSV, Excel, Parquet or Feather export.")
+
+def _find_column(frame, name):
+    for column in frame.columns:
+        if str(column).lower() == name:
+            return column
+    return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m wellness.train',
+                                     description='Train a linear emotion model from labelled messages.')
+    parser.add_argument('input', help='CSV, Excel, Parquet or Feather file with message, emotion and severity '
+                                      'columns (polarity and subjectivity are used when present)')
+    parser.add_argument('-o', '--output', required=True, help='directory to write the model to')
+    parser.add_argument('--text-column', help='message column (default: detected like uploads)')
+    parser.add_argument('--feature-bits', type=int, default=DEFAULT_FEATURE_BITS,
+                        help='hash 2**N features (default: %(default)s)')
+    parser.add_argument('--ngrams', type=int, default=DEFAULT_NGRAMS,
+                        help='longest word n-gram (default: %(default)s)')
+    parser.add_argument('-C', type=float, default=10.0, dest='c',
+                        help='inverse regularisation strength (default: %(default)s)')
+    parser.add_argument('--test-size', type=float, default=0.1,
+                        help='fraction held out to report accuracy (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    try:
+        frame = _read_labelled(args.input)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.text_column:
+        text_column = args.text_column
+        if text_column not in frame.columns:
+            text_column = _find_column(frame, text_column.lower())
+        if text_column is None:
+            parser.error(f"no column {args.text_column!r} in the input; it has {', '.join(map(str, frame.columns))}")
+    else:
+        text_column = find_text_column(list(frame.columns))
+    emotion_column, severity_column = _find_column(frame, 'emotion'), _find_column(frame, 'severity')
+    if emotion_column is None or severity_column is None:
+        parser.error('input needs emotion and severity columns')
+    frame = frame.dropna(subset=[text_column, emotion_column, severity_column])
+    texts = [normalize_text(text) for text in frame[text_column].astype(str)]
+
+    polarity_column, subjectivity_column = _find_column(frame, 'polarity'), _find_column(frame, 'subjectivity')
+    if polarity_column is not None and subjectivity_column is not None:
+        polarity = frame[polarity_column].fillna(0.0).to_numpy(dtype=float)
+        subjectivity = frame[subjectivity_column].fillna(0.0).to_numpy(dtype=float)
+    else:
+        from wellness.scoring import SENTIMENT_BACKEND
+        print('No polarity/subjectivity columns; learning them from the sentiment backend', file=sys.stderr)
+        polarity, subjectivity = map(list, zip(*SENTIMENT_BACKEND.score(texts)))
+
+    columns = [texts, frame[emotion_column].astype(str).tolist(), frame[severity_column].astype(str).tolist(),
+               polarity, subjectivity]
+    if args.test_size:
+        from sklearn.model_selection import train_test_split
+        split = train_test_split(*columns, test_size=args.test_size, random_state=0)
+        train_columns, test_columns = split[0::2], split[1::2]
+    else:
+        train_columns, test_columns = columns, None
+
+    try:
+        weights, meta = train_model(*train_columns, feature_bits=args.feature_bits, ngrams=args.ngrams, c=args.c)
+    except ValueError as e:
+        parser.error(str(e))
+    model = save_model(args.output, weights, meta)
+    print(f"Trained on {len(train_columns[0]):,} messages; saved {model.version} to {args.output}", file=sys.stderr)
+
+    if test_columns:
+        import numpy as np
+
+        test_texts, test_emotions, test_severities, test_polarity, _ = test_columns
+        predicted = model.score_frame(test_texts)
+        emotion_accuracy = np.mean(predicted['emotion'].to_numpy() == np.asarray(test_emotions))
+        severity_accuracy = np.mean(predicted['severity'].to_numpy() == np.asarray(test_severities))
+        polarity_error = np.mean(np.abs(predicted['polarity'].to_numpy() - np.asarray(test_polarity)))
+        print(f"Held out {len(test_texts):,}: emotion accuracy {emotion_accuracy:.3f}, "
+              f"severity accuracy {severity_accuracy:.3f}, polarity MAE {polarity_error:.3f}", file=sys.stderr)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,269 @@
+"""Per-user emotion trends in fixed time buckets
+
+TrendTracker keeps one row of running totals per (user, time bucket):
+message count, polarity sum and counts per emotion and severity. Each scored
+batch is grouped and added to those rows, so an update costs time
+proportional to the batch, never to the history already tracked. The
+latest critical message and latest message per user are kept alongside.
+
+Trend views (rolling means per user, recent-window summaries across users)
+are read from the bucket rows with vectorised NumPy, and the whole state
+can be saved to and loaded from a single .npz file so long-running
+monitoring can resume where the last batch job stopped:
+
+    python -m wellness messages.csv -o scored.parquet --trends trends.npz
+    python -m wellness.trends trends.npz --window 7
+    python -m wellness.trends trends.npz --user user042
+"""
+import argparse
+import os
+import sys
+
+from wellness.scoring import EMOTIONS, SEVERITIES
+
+DEFAULT_BUCKET = os.environ.get('WELLNESS_TREND_BUCKET', '1D')
+
+# Bucket totals, one column each
+COLUMNS = (['messages', 'polarity_sum']
+           + [f'emotion_{emotion}' for emotion in EMOTIONS]
+           + [f'severity_{severity}' for severity in SEVERITIES])
+
+_NO_TIME = -2 ** 63  # NaT as int64 nanoseconds
+
+class TrendTracker:
+    """Per-user totals in fixed time buckets, updated one scored batch at a time"""
+
+    def __init__(self, bucket=DEFAULT_BUCKET):
+        import numpy as np
+        import pandas as pd
+
+        self.bucket = pd.Timedelta(bucket)
+        self.users = []                 # user index -> user id
+        self._user_index = {}           # user id -> user index
+        self._rows = {}                 # (user index, bucket start ns) -> row
+        self._size = 0
+        self._totals = np.zeros((1024, len(COLUMNS)))
+        self._row_user = np.zeros(1024, dtype=np.int64)
+        self._row_bucket = np.zeros(1024, dtype=np.int64)
+        self._last_critical = np.full(0, _NO_TIME, dtype=np.int64)
+        self._last_seen = np.full(0, _NO_TIME, dtype=np.int64)
+
+    def __len__(self):
+        return self._size
+
+    def _grow(self, rows, users):
+        import numpy as np
+
+        if rows > len(self._totals):
+            capacity = max(rows, 2 * len(self._totals))
+            self._totals = np.resize(self._totals, (capacity, len(COLUMNS)))
+            self._totals[self._size:] = 0
+            self._row_user = np.resize(self._row_user, capacity)
+            self._row_bucket = np.resize(self._row_bucket, capacity)
+        if users > len(self._last_seen):
+            extra = users - len(self._last_seen)
+            self._last_critical = np.concatenate([self._last_critical, np.full(extra, _NO_TIME, dtype=np.int64)])
+            self._last_seen = np.concatenate([self._last_seen, np.full(extra, _NO_TIME, dtype=np.int64)])
+
+    def update(self, results):
+        """Add a scored batch with ``user_id``, ``timestamp``, ``emotion``, ``severity`` and ``polarity``
+
+        Timestamps with a UTC offset are converted to UTC, and naive ones are
+        taken to be UTC already. Rows without a user or a parseable timestamp
+        are skipped. Returns the number of rows added.
+        """
+        import numpy as np
+        import pandas as pd
+
+        # Offsets are converted to UTC and naive times taken as UTC
+        times = pd.to_datetime(results['timestamp'], errors='coerce', format='mixed', utc=True).dt.tz_localize(None)
+        valid = times.notna() & results['user_id'].notna()
+        if not valid.any():
+            return 0
+        results = results[valid]
+        times = times[valid].astype('datetime64[ns]').astype(np.int64).to_numpy()
+        user_ids = results['user_id'].astype(str).to_numpy()
+
+        # One value row per message: [1, polarity, emotion one-hot, severity one-hot]
+        values = np.zeros((len(results), len(COLUMNS)))
+        values[:, 0] = 1
+        values[:, 1] = results['polarity'].to_numpy(dtype=float)
+        positions = np.arange(len(results))
+        emotion_codes = pd.Index(EMOTIONS).get_indexer(results['emotion'].astype(object))
+        severity_codes = pd.Index(SEVERITIES).get_indexer(results['severity'].astype(object))
+        values[positions[emotion_codes >= 0], 2 + emotion_codes[emotion_codes >= 0]] = 1
+        values[positions[severity_codes >= 0], 2 + len(EMOTIONS) + severity_codes[severity_codes >= 0]] = 1
+
+        # Map users to indexes, registering new ones
+        for user_id in pd.unique(user_ids):
+            if user_id not in self._user_index:
+                self._user_index[user_id] = len(self.users)
+                self.users.append(user_id)
+        user_codes = np.fromiter((self._user_index[user_id] for user_id in user_ids), dtype=np.int64,
+                                 count=len(user_ids))
+        buckets = times - times % self.bucket.value
+
+        # Sum the batch per (user, bucket), then add each group to its row
+        keys, inverse = np.unique(np.stack([user_codes, buckets], axis=1), axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        group_totals = np.zeros((len(keys), len(COLUMNS)))
+        np.add.at(group_totals, inverse, values)
+        self._grow(self._size + len(keys), len(self.users))
+        rows = np.empty(len(keys), dtype=np.int64)
+        for index, (user, bucket) in enumerate(keys.tolist()):
+            row = self._rows.get((user, bucket))
+            if row is None:
+                row = self._rows[(user, bucket)] = self._size
+                self._row_user[row] = user
+                self._row_bucket[row] = bucket
+                self._size += 1
+            rows[index] = row
+        self._totals[rows] += group_totals
+
+        np.maximum.at(self._last_seen, user_codes, times)
+        critical = severity_codes == SEVERITIES.index('critical')
+        np.maximum.at(self._last_critical, user_codes[critical], times[critical])
+        return len(results)
+
+    def latest(self):
+        """Return the time of the newest tracked message, or None"""
+        import pandas as pd
+
+        if not len(self._last_seen):
+            return None
+        return pd.Timestamp(int(self._last_seen.max()))
+
+    def user_trend(self, user_id, window=7):
+        """Return one row per bucket for a user, oldest first
+
+        Columns are the bucket totals plus ``mean_polarity`` and
+        ``rolling_polarity``, the mean over the trailing ``window`` buckets.
+        """
+        import numpy as np
+        import pandas as pd
+
+        user = self._user_index.get(str(user_id))
+        if user is None:
+            return pd.DataFrame(columns=COLUMNS + ['mean_polarity', 'rolling_polarity'])
+        rows = np.flatnonzero(self._row_user[:self._size] == user)
+        rows = rows[np.argsort(self._row_bucket[rows])]
+        trend = pd.DataFrame(self._totals[rows], columns=COLUMNS,
+                             index=pd.DatetimeIndex(self._row_bucket[rows].astype('datetime64[ns]'), name='bucket'))
+        trend['mean_polarity'] = trend['polarity_sum'] / trend['messages']
+        rolling = trend[['messages', 'polarity_sum']].rolling(self.bucket * window).sum()
+        trend['rolling_polarity'] = rolling['polarity_sum'] / rolling['messages']
+        return trend
+
+    def summary(self, window=7, now=None):
+        """Return one row per user over the last ``window`` buckets, most concerning first
+
+        Compares mean polarity with the ``window`` buckets before, and reports
+        the time since each user's last critical message. ``now`` defaults to
+        the newest tracked message, so historical uploads read naturally.
+        """
+        import numpy as np
+        import pandas as pd
+
+        columns = ['user_id', 'messages', 'mean_polarity', 'polarity_change', 'critical', 'high',
+                   'depression', 'stress', 'last_seen', 'last_critical', 'since_last_critical']
+        if not self.users:
+            return pd.DataFrame(columns=columns)
+        now = pd.Timestamp(now) if now is not None else self.latest()
+        span = self.bucket.value * window
+        current_start = now.value - now.value % self.bucket.value - span + self.bucket.value
+        buckets = self._row_bucket[:self._size]
+        users = self._row_user[:self._size]
+        totals = self._totals[:self._size]
+
+        def window_totals(start, end):
+            mask = (buckets >= start) & (buckets < end)
+            return np.stack([np.bincount(users[mask], weights=totals[mask, column], minlength=len(self.users))
+                             for column in range(len(COLUMNS))], axis=1)
+
+        current = window_totals(current_start, current_start + span)
+        previous = window_totals(current_start - span, current_start)
+        column = COLUMNS.index
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_polarity = current[:, column('polarity_sum')] / current[:, column('messages')]
+            previous_polarity = previous[:, column('polarity_sum')] / previous[:, column('messages')]
+
+        last_seen = pd.to_datetime(np.where(self._last_seen == _NO_TIME, np.datetime64('NaT'),
+                                            self._last_seen.astype('datetime64[ns]')))
+        last_critical = pd.to_datetime(np.where(self._last_critical == _NO_TIME, np.datetime64('NaT'),
+                                                self._last_critical.astype('datetime64[ns]')))
+        summary = pd.DataFrame({
+            'user_id': self.users,
+            'messages': current[:, column('messages')].astype(np.int64),
+            'mean_polarity': mean_polarity,
+            'polarity_change': mean_polarity - previous_polarity,
+            'critical': current[:, column('severity_critical')].astype(np.int64),
+            'high': current[:, column('severity_high')].astype(np.int64),
+            'depression': current[:, column('emotion_depression')].astype(np.int64),
+            'stress': current[:, column('emotion_stress')].astype(np.int64),
+            'last_seen': last_seen,
+            'last_critical': last_critical,
+            'since_last_critical': now - last_critical,
+        }, columns=columns)
+        summary = summary[summary['messages'] > 0]
+        return summary.sort_values(['critical', 'high', 'polarity_change'], ascending=[False, False, True],
+                                   na_position='last').reset_index(drop=True)
+
+    def save(self, path):
+        """Write the tracker state to an .npz file"""
+        import numpy as np
+
+        with open(path, 'wb') as f:
+            np.savez(f, bucket=self.bucket.value, users=np.array(self.users, dtype=str),
+                     totals=self._totals[:self._size], row_user=self._row_user[:self._size],
+                     row_bucket=self._row_bucket[:self._size],
+                     last_critical=self._last_critical, last_seen=self._last_seen)
+
+    @classmethod
+    def load(cls, path):
+        """Read a tracker saved with save()"""
+        import numpy as np
+
+        with np.load(path) as state:
+            tracker = cls(int(state['bucket']))
+            tracker.users = state['users'].tolist()
+            tracker._user_index = {user_id: index for index, user_id in enumerate(tracker.users)}
+            tracker._size = len(state['totals'])
+            tracker._grow(tracker._size, len(tracker.users))
+            tracker._totals[:tracker._size] = state['totals']
+            tracker._row_user[:tracker._size] = state['row_user']
+            tracker._row_bucket[:tracker._size] = state['row_bucket']
+            tracker._last_critical[:] = state['last_critical']
+            tracker._last_seen[:] = state['last_seen']
+        tracker._rows = {key: row for row, key in enumerate(zip(tracker._row_user[:tracker._size].tolist(),
+                                                                 tracker._row_bucket[:tracker._size].tolist()))}
+        return tracker
+
+def main(argv=None):
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(prog='python -m wellness.trends',
+                                     description='Show per-user trends from a saved tracker.')
+    parser.add_argument('path', help='tracker file written by python -m wellness --trends')
+    parser.add_argument('--window', type=int, default=7, help='buckets per trend window (default: %(default)s)')
+    parser.add_argument('--user', help='show the bucket-by-bucket trend of one user')
+    parser.add_argument('--top', type=int, default=20, help='users to list (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.path):
+        parser.exit(1, f'No tracker at {args.path}\n')
+    tracker = TrendTracker.load(args.path)
+    with pd.option_context('display.width', 160, 'display.max_columns', None):
+        if args.user:
+            trend = tracker.user_trend(args.user, args.window)
+            if trend.empty:
+                parser.exit(1, f'No messages from {args.user}\n')
+            print(trend.round(3).to_string())
+        else:
+            print(f'{len(tracker.users)} users, {len(tracker)} buckets of {tracker.bucket}, '
+                  f'latest message {tracker.latest()}')
+            print(tracker.summary(args.window).head(args.top)
+                  .round({'mean_polarity': 3, 'polarity_change': 3}).to_string(index=False))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())